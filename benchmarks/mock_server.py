@@ -0,0 +1,407 @@
+"""A stand-in for the UltraDNS REST API, for benchmarking the client locally.
+
+It keeps zones and rrsets in memory and covers the endpoints the client cares about: token grants (with expiry),
+zone and rrset CRUD with paging, exports that run as tasks and come back as text or zip, and throttling.
+"""
+import gzip
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class MockConfig:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, token_ttl: int = 3600,
+                 rate_limit: float = None, task_duration: float = 0.5, page_size: int = 100):
+        """Behaviour of the mock server.
+
+        Parameters:
+        - latency (float, optional): Seconds added to every response. Defaults to 0.
+        - jitter (float, optional): Up to this many extra seconds, chosen at random per response. Defaults to 0.
+        - error_rate (float, optional): The fraction of API calls answered with a 503. Defaults to 0.
+        - token_ttl (int, optional): Seconds an access token stays valid before calls with it get a 401. Defaults to
+          3600.
+        - rate_limit (float, optional): Requests per second allowed before answering 429 with Retry-After. Defaults to
+          None (no limit).
+        - task_duration (float, optional): Seconds an export task stays IN_PROCESS. Defaults to 0.5.
+        - page_size (int, optional): The default page size of list endpoints. Defaults to 100.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.rate_limit = rate_limit
+        self.task_duration = task_duration
+        self.page_size = page_size
+
+
+class MockState:
+    """The in-memory account behind the server."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.refresh_tokens = set()
+        self.zones = {}
+        self.tasks = {}
+        self.requests = 0
+        self.counts = {}
+        self._window = (0, 0)
+
+    def seed(self, zones: int, rrsets_per_zone: int):
+        """Create `zones` zones, each with `rrsets_per_zone` A rrsets."""
+        with self.lock:
+            for i in range(zones):
+                name = f"zone{i}.example."
+                self.zones[name] = self._new_zone(name)
+                for j in range(rrsets_per_zone):
+                    self.zones[name]["rrsets"][(f"host{j}.{name}", "A")] = {"ttl": 300, "rdata": [f"192.0.2.{j % 254 + 1}"]}
+
+    @staticmethod
+    def _new_zone(name: str) -> dict:
+        return {"name": name, "rrsets": {(name, "SOA"): {"ttl": 86400, "rdata": [f"ns1.{name} admin.{name} 1 3600 600 604800 300"]}},
+                "modified": time.time()}
+
+    def issue_token(self) -> dict:
+        access, refresh = uuid.uuid4().hex, uuid.uuid4().hex
+        with self.lock:
+            self.tokens[access] = time.monotonic() + self.config.token_ttl
+            self.refresh_tokens.add(refresh)
+        return {"accessToken": access, "refreshToken": refresh, "expiresIn": str(self.config.token_ttl), "tokenType": "Bearer"}
+
+    def token_valid(self, header: str) -> bool:
+        token = (header or "").replace("Bearer ", "", 1)
+        expires = self.tokens.get(token)
+        return expires is not None and expires > time.monotonic()
+
+    def throttled(self) -> bool:
+        if not self.config.rate_limit:
+            return False
+        with self.lock:
+            second = int(time.monotonic())
+            start, count = self._window
+            if start != second:
+                start, count = second, 0
+            count += 1
+            self._window = (start, count)
+            return count > self.config.rate_limit
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockUltraDNS/1.0"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms to every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def _reply(self, status: int, body=None, content_type: str = "application/json", headers: dict = None):
+        config = self.state.config
+        if config.latency or config.jitter:
+            time.sleep(config.latency + random.uniform(0, config.jitter))
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode()
+        elif isinstance(body, str):
+            data = body.encode()
+        else:
+            data = body or b""
+        etag = None
+        if status == 200 and self.command == "GET" and data:
+            # Content-based ETags, so cached reads can be revalidated with If-None-Match
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                status, data = 304, b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if data and content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: dict = None):
+        self._reply(status, [{"errorCode": status, "errorMessage": message}], headers=headers)
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            raw = self._chunked_body()
+        else:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return raw
+
+    def _chunked_body(self) -> bytes:
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";", 1)[0], 16)
+            if size == 0:
+                # Skip any trailers up to the blank line
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _json_body(self) -> dict:
+        raw = self._body()
+        return json.loads(raw) if raw else {}
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        path = url.path
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.counts[method] = self.state.counts.get(method, 0) + 1
+
+        if path == "/authorization/token" and method == "POST":
+            return self._token()
+        if not self.state.token_valid(self.headers.get("Authorization")):
+            self._body()
+            return self._error(401, "invalid_grant: token expired")
+        if self.state.throttled():
+            self._body()
+            return self._error(429, "Too many requests", headers={"Retry-After": "1"})
+        if self.state.config.error_rate and random.random() < self.state.config.error_rate:
+            self._body()
+            return self._error(503, "Service unavailable")
+
+        parts = [part for part in path.split("/") if part]
+        try:
+            return self._route(method, parts, query)
+        except KeyError as e:
+            return self._error(404, f"Not found: {e}")
+
+    def _token(self):
+        form = {key: values[-1] for key, values in parse_qs(self._body().decode()).items()}
+        if form.get("grant_type") == "refresh_token":
+            with self.state.lock:
+                known = form.get("refresh_token") in self.state.refresh_tokens
+                self.state.refresh_tokens.discard(form.get("refresh_token"))
+            if not known:
+                return self._error(400, "invalid refresh token")
+        elif form.get("grant_type") != "password":
+            return self._error(400, "unsupported grant type")
+        return self._reply(200, self.state.issue_token())
+
+    def _route(self, method: str, parts: list, query: dict):
+        if parts == ["accounts"]:
+            return self._reply(200, {"accounts": [{"accountName": "bench", "accountType": "ORGANIZATION"}]})
+        if parts[:1] == ["tasks"] and len(parts) >= 2:
+            return self._task(parts[1], result=len(parts) == 3)
+        if parts[:2] != ["v3", "zones"]:
+            return self._error(404, "Unknown endpoint")
+
+        rest = parts[2:]
+        if not rest:
+            if method == "POST":
+                return self._create_zone()
+            return self._list_zones(query)
+        if rest == ["export"] and method == "POST":
+            return self._export()
+        zone = self._zone_name(rest[0])
+        if len(rest) == 1:
+            if method == "DELETE":
+                with self.state.lock:
+                    self.state.zones.pop(zone)
+                return self._reply(204)
+            data = self.state.zones[zone]
+            return self._reply(200, {"properties": {"name": zone, "type": "PRIMARY", "resourceRecordCount": len(data["rrsets"])}})
+        if rest[1] == "rrsets":
+            return self._rrsets(method, zone, rest[2:], query)
+        return self._error(404, "Unknown endpoint")
+
+    @staticmethod
+    def _zone_name(name: str) -> str:
+        return name if name.endswith(".") else f"{name}."
+
+    def _page(self, items: list, query: dict):
+        limit = int(query.get("limit") or self.state.config.page_size)
+        offset = int(query.get("offset") or query.get("cursor") or 0)
+        return items[offset:offset + limit], offset, limit
+
+    def _list_zones(self, query: dict):
+        with self.state.lock:
+            names = sorted(self.state.zones)
+            zones = self.state.zones
+            items, offset, limit = self._page(names, query)
+            listing = [{"properties": {"name": name, "type": "PRIMARY", "resourceRecordCount": len(zones[name]["rrsets"]),
+                                       "lastModifiedDateTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(zones[name]["modified"]))}}
+                       for name in items]
+        cursor = {"next": str(offset + limit)} if offset + limit < len(names) else {}
+        return self._reply(200, {"queryInfo": {"limit": limit}, "cursorInfo": cursor, "zones": listing})
+
+    def _create_zone(self):
+        name = self._zone_name(self._json_body()["properties"]["name"])
+        with self.state.lock:
+            exists = name in self.state.zones
+            if not exists:
+                self.state.zones[name] = self.state._new_zone(name)
+        if exists:
+            return self._error(400, "Zone already exists")
+        return self._reply(201, {"message": "Successful"})
+
+    def _rrsets(self, method: str, zone: str, rest: list, query: dict):
+        data = self.state.zones[zone]
+        rrsets = data["rrsets"]
+        rrtype = rest[0].upper() if rest else None
+        owner = self._zone_name(rest[1]) if len(rest) > 1 else None
+        if owner and not owner.endswith(zone):
+            owner = f"{owner}{zone}"
+
+        if method == "GET":
+            with self.state.lock:
+                matches = sorted((key, value) for key, value in rrsets.items()
+                                 if (rrtype is None or key[1] == rrtype) and (owner is None or key[0] == owner))
+            if not matches:
+                return self._error(404, "Data not found.")
+            items, offset, _ = self._page(matches, query)
+            return self._reply(200, {
+                "zoneName": zone,
+                "rrSets": [{"ownerName": key[0], "rrtype": key[1], "ttl": value["ttl"], "rdata": value["rdata"]} for key, value in items],
+                "resultInfo": {"totalCount": len(matches), "offset": offset, "returnedCount": len(items)}
+            })
+
+        if not (rrtype and owner):
+            return self._error(400, "rrtype and owner are required")
+        key = (owner, rrtype)
+        body = self._json_body() if method != "DELETE" else {}
+        with self.state.lock:
+            exists = key in rrsets
+            if method == "DELETE" and exists:
+                del rrsets[key]
+            elif method == "PATCH" and exists:
+                rrsets[key].update(body)
+            elif method in ("POST", "PUT") and not (method == "POST" and exists):
+                rrsets[key] = {"ttl": body.get("ttl", 300), "rdata": body.get("rdata", [])}
+            data["modified"] = time.time()
+        if method == "POST" and exists:
+            return self._error(400, "Resource Record of type already exists")
+        if method in ("DELETE", "PATCH") and not exists:
+            raise KeyError(f"{rrtype} {owner}")
+        if method == "DELETE":
+            return self._reply(204)
+        return self._reply(201 if method == "POST" else 200, {"message": "Successful"})
+
+    def _export(self):
+        names = [self._zone_name(name) for name in self._json_body().get("zoneNames", [])]
+        task_id = uuid.uuid4().hex
+        with self.state.lock:
+            for name in names:
+                if name not in self.state.zones:
+                    raise KeyError(name)
+            self.state.tasks[task_id] = {"ready": time.monotonic() + self.state.config.task_duration, "zones": names}
+        return self._reply(202, {"message": "Pending"}, headers={"X-Task-Id": task_id, "Location": f"/tasks/{task_id}"})
+
+    def _zone_file(self, name: str) -> str:
+        rrsets = self.state.zones[name]["rrsets"]
+        lines = [f"$ORIGIN {name}"]
+        for (owner, rrtype), value in sorted(rrsets.items()):
+            for rdata in value["rdata"]:
+                lines.append(f"{owner} {value['ttl']} IN {rrtype} {rdata}")
+        return "\n".join(lines) + "\n"
+
+    def _task(self, task_id: str, result: bool):
+        task = self.state.tasks[task_id]
+        done = time.monotonic() >= task["ready"]
+        if not result:
+            return self._reply(200, {"taskId": task_id, "code": "COMPLETE" if done else "IN_PROCESS",
+                                     "message": "Done" if done else "Processing"})
+        if not done:
+            return self._error(400, "Task is not complete")
+        with self.state.lock:
+            files = {name: self._zone_file(name) for name in task["zones"]}
+        if len(files) == 1:
+            return self._reply(200, next(iter(files.values())), content_type="text/plain")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, text in files.items():
+                archive.writestr(f"{name}txt", text)
+        return self._reply(200, buffer.getvalue(), content_type="application/zip")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class MockServer:
+    def __init__(self, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+        """Run the mock API on a background thread.
+
+        Parameters:
+        - config (MockConfig, optional): The server behaviour. Defaults to MockConfig().
+        - host (str, optional): The interface to bind. Defaults to "127.0.0.1".
+        - port (int, optional): The port to bind, 0 for any free port. Defaults to 0.
+        """
+        self.state = MockState(config or MockConfig())
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.request_queue_size = 1024
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a mock UltraDNS API.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--zones", type=int, default=10)
+    parser.add_argument("--rrsets", type=int, default=100)
+    args = parser.parse_args()
+
+    server = MockServer(MockConfig(latency=args.latency, error_rate=args.error_rate, rate_limit=args.rate_limit), port=args.port)
+    server.state.seed(args.zones, args.rrsets)
+    print(f"Mock UltraDNS listening on {server.url}")
+    server.start()._thread.join()
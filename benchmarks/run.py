@@ -0,0 +1,293 @@
+"""Benchmark the client against the mock UltraDNS server.
+
+    python -m benchmarks.run --concurrency 1 8 32 --output results.json
+
+Each scenario runs against a fresh, seeded server and reports requests/sec, p50/p99 request latency and memory use.
+The JSON output is meant to be diffed between client versions. Peak Python allocations are only traced with
+--trace-memory, since tracing slows everything else down.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+from ultra_auth import AsyncUltraApi, TaskHandler, UltraApi, ZoneSync
+from ultra_auth.about import __version__
+
+from .mock_server import MockConfig, MockServer
+
+
+class Recorder:
+    """Collects per-request latencies through the client's after hook."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.refreshes = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, info: dict):
+        with self._lock:
+            self.latencies.append(info["elapsed"])
+            self.refreshes += info["refreshes"]
+            self.retries += info["retries"]
+            if info["error"] is not None or (info["status"] or 500) >= 400:
+                self.errors += 1
+
+    async def timed(self, call):
+        """Await a call of the asyncio client, which has no hooks, and record its latency."""
+        start = time.perf_counter()
+        try:
+            return await call
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _client(server: MockServer, concurrency: int, **kwargs) -> UltraApi:
+    return UltraApi("bench", "bench", base_url=server.url, pool_maxsize=max(concurrency, 10), **kwargs)
+
+
+def get_sequential(server, concurrency, size):
+    client = yield
+    for i in range(size):
+        client.get(f"/v3/zones/zone{i % 10}.example.")
+
+
+def get_batch(server, concurrency, size):
+    client = yield
+    client.batch([("GET", f"/v3/zones/zone{i % 10}.example.") for i in range(size)], max_workers=concurrency)
+
+
+def rrset_bulk_create(server, concurrency, size):
+    client = yield
+    client.batch([("POST", f"/v3/zones/zone0.example./rrsets/A/bulk{i}.zone0.example.", {"ttl": 300, "rdata": ["192.0.2.1"]})
+                  for i in range(size)], max_workers=concurrency)
+
+
+def iter_rrsets(server, concurrency, size):
+    server.state.seed(1, size)
+    client = yield
+    for _ in client.iter_rrsets("zone0.example.", limit=100):
+        pass
+
+
+def zone_sync(server, concurrency, size):
+    server.state.seed(1, size)
+    desired = [{"ownerName": f"host{j}", "rrtype": "A", "ttl": 300 if j % 10 else 600, "rdata": [f"192.0.2.{j % 254 + 1}"]}
+               for j in range(size)]
+    client = yield
+    ZoneSync(client).apply("zone0.example.", desired, max_workers=concurrency)
+
+
+def export_tasks(server, concurrency, size):
+    client = yield
+    task_ids = [client.post("/v3/zones/export", {"zoneNames": [f"zone{i % 10}.example.", f"zone{(i + 1) % 10}.example."]})["task_id"]
+                for i in range(size)]
+    for _ in TaskHandler(client).wait_many(task_ids, initial_interval=0.1, fetch_result=True):
+        pass
+
+
+def token_expiry(server, concurrency, size):
+    server.state.config.token_ttl = 1
+    client = yield
+    client.batch([("GET", "/accounts") for _ in range(size)], max_workers=concurrency)
+    time.sleep(1.1)
+    client.batch([("GET", "/accounts") for _ in range(size)], max_workers=concurrency)
+
+
+def throttled(server, concurrency, size):
+    server.state.config.rate_limit = 200
+    client = yield {"rate_limit": 150}
+    client.batch([("GET", "/accounts") for _ in range(size)], max_workers=concurrency)
+
+
+def _check(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+
+async def async_client(server, concurrency, size, client, recorder):
+    """Concurrent GETs through AsyncUltraApi, then each of its response paths: a 401 refresh, 202 task ids, text and
+    zip results, a synthesized 204 body, and 429 retries."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def get(uri):
+        async with limit:
+            return await recorder.timed(client.get(uri))
+
+    await asyncio.gather(*(get(f"/v3/zones/zone{i % 10}.example.") for i in range(size)))
+
+    stale = client.access_token
+    client.access_token = "expired"
+    accounts = await recorder.timed(client.get("/accounts"))
+    _check(accounts["accounts"][0]["accountName"] == "bench", f"unexpected /accounts body after a 401: {accounts}")
+    _check(client.access_token not in ("expired", stale), "the 401 didn't refresh the access token")
+
+    single = await recorder.timed(client.post("/v3/zones/export", {"zoneNames": ["zone0.example."]}))
+    multiple = await recorder.timed(client.post("/v3/zones/export", {"zoneNames": ["zone0.example.", "zone1.example."]}))
+    for task in (single, multiple):
+        _check(task.get("message") == "Pending" and task.get("task_id") and task.get("location") == f"/tasks/{task['task_id']}",
+               f"202 body without the task id and location merged in: {task}")
+        while (await recorder.timed(client.get(f"/tasks/{task['task_id']}")))["code"] != "COMPLETE":
+            await asyncio.sleep(0.1)
+    text = await recorder.timed(client.get(f"/tasks/{single['task_id']}/result"))
+    _check(isinstance(text, str) and text.startswith("$ORIGIN zone0.example."), f"text/plain result not returned as text: {text!r:.80}")
+    archive = await recorder.timed(client.get(f"/tasks/{multiple['task_id']}/result"))
+    _check(isinstance(archive, bytes) and archive.startswith(b"PK"), f"zip result not returned as bytes: {archive!r:.80}")
+
+    deleted = await recorder.timed(client.delete("/v3/zones/zone0.example./rrsets/A/host0.zone0.example."))
+    _check(deleted == {"status_code": 204, "message": "No content"}, f"unexpected 204 body: {deleted}")
+
+    # Three seconds' worth of requests at once: two thirds are throttled at least once and have to retry
+    server.state.config.rate_limit = 5
+    before = server.state.requests
+    await asyncio.gather(*(recorder.timed(client.get("/accounts")) for _ in range(15)))
+    server.state.config.rate_limit = None
+    _check(server.state.requests - before > 15, "the rate limit didn't throttle any request")
+
+
+SCENARIOS = {
+    "get_sequential": get_sequential,
+    "get_batch": get_batch,
+    "rrset_bulk_create": rrset_bulk_create,
+    "iter_rrsets": iter_rrsets,
+    "zone_sync": zone_sync,
+    "export_tasks": export_tasks,
+    "token_expiry": token_expiry,
+    "throttled": throttled,
+    "async_client": async_client,
+}
+
+# Scenarios that drive AsyncUltraApi instead of UltraApi
+ASYNC = {"async_client"}
+
+# Scenarios that don't get faster with more workers only run once
+SEQUENTIAL = {"get_sequential", "iter_rrsets"}
+
+
+def run_scenario(name: str, concurrency: int, size: int, config: dict, trace_memory: bool = False) -> dict:
+    """Run one scenario against a fresh server and measure it.
+
+    Returns:
+    - dict: The measurements.
+    """
+    with MockServer(MockConfig(**config)) as server:
+        server.state.seed(10, 10)
+        recorder = Recorder()
+        if name in ASYNC:
+            run = _async_runner(name, server, concurrency, size, recorder)
+        else:
+            scenario = SCENARIOS[name](server, concurrency, size)
+            client = _client(server, concurrency, **(next(scenario) or {}))
+            client.add_hook("after", recorder)
+
+            def run():
+                try:
+                    scenario.send(client)
+                except StopIteration:
+                    pass
+                finally:
+                    client.close()
+
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        error = None
+        try:
+            run()
+        except Exception as e:
+            error = repr(e)
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        requests = len(recorder.latencies)
+        return {
+            "scenario": name,
+            "concurrency": concurrency,
+            "size": size,
+            "requests": requests,
+            "errors": recorder.errors,
+            "retries": recorder.retries,
+            "refreshes": recorder.refreshes,
+            "seconds": round(elapsed, 4),
+            "requests_per_second": round(requests / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(recorder.percentile(0.50) * 1000, 3),
+            "p99_ms": round(recorder.percentile(0.99) * 1000, 3),
+            "peak_memory_kb": round(peak / 1024, 1) if peak is not None else None,
+            # ru_maxrss is in KiB on Linux (bytes on macOS) and only ever grows across scenarios
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "server_requests": server.state.requests,
+            "error": error
+        }
+
+
+def _async_runner(name: str, server: MockServer, concurrency: int, size: int, recorder: Recorder):
+    async def scenario():
+        async with AsyncUltraApi("bench", "bench", base_url=server.url, pool_maxsize=max(concurrency, 10)) as client:
+            await SCENARIOS[name](server, concurrency, size, client, recorder)
+
+    return lambda: asyncio.run(scenario())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ultra_auth against a local mock UltraDNS server.")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--size", type=int, default=200, help="Requests (or records) per scenario.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds of server latency per response.")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--trace-memory", action="store_true", help="Trace peak Python allocations per scenario.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    config = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate}
+    results = []
+    for name in args.scenarios:
+        for concurrency in ([1] if name in SEQUENTIAL else args.concurrency):
+            result = run_scenario(name, concurrency, args.size, config, trace_memory=args.trace_memory)
+            results.append(result)
+            print(f"{name:<20} c={concurrency:<4} {result['requests_per_second']:>9.1f} req/s  "
+                  f"p50={result['p50_ms']:.1f}ms  p99={result['p99_ms']:.1f}ms  rss={result['max_rss_kb']}KiB",
+                  file=sys.stderr)
+            if result["error"]:
+                print(f"{'':<20} failed: {result['error']}", file=sys.stderr)
+
+    report = {
+        "client_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": dict(config, size=args.size),
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,15 @@ setup(
     install_requires=[
         "requests>=2.25.1"
     ],
+    entry_points={
+        "console_scripts": ["ultra-bulk=ultra_auth.cli:main"]
+    },
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "fast": ["orjson>=3.6"],
+        "http2": ["httpx[http2]>=0.23"],
+        "test": ["pytest>=6", "aiohttp>=3.8"]
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
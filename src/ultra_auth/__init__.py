@@ -1,2 +1,13 @@
 from .udns import UltraApi
-from .tasks import TaskHandler
\ No newline at end of file
+from .async_udns import AsyncUltraApi
+from .batch import BatchResult
+from .cache import ResponseCache
+from .metrics import Metrics
+from .pool import UltraApiPool
+from .ratelimit import RateLimiter
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from .snapshot import SnapshotStore
+from .sync import ZoneSync
+from .tasks import AsyncTaskHandler, TaskHandler
+from .tokens import TokenStore
+from .transport import Http2Transport, RequestsTransport, Transport, Urllib3Transport
@@ -0,0 +1,396 @@
+import asyncio
+import json
+import time
+from typing import Union
+from . import codec
+from .about import get_client_user_agent
+from .ratelimit import RateLimiter, parse_retry_after
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - aiohttp is an optional dependency
+    aiohttp = None
+
+
+class AsyncUltraApi:
+    def __init__(self, bu: str, pr: str = None, use_token: bool = False, debug: bool = False, pprint: bool = False, user_agent: str = None,
+                 pool_maxsize: int = 100, pool_maxsize_per_host: int = 0, keep_alive: bool = True,
+                 base_url: str = "https://api.ultradns.com", refresh_margin: int = 60,
+                 rate_limit: float = None, rate_burst: int = None, adaptive_rate_limit: bool = True, throttle_retries: int = 3):
+        """Initialize the asyncio client. This mirrors `UltraApi`, but every request method is a coroutine and all of
+        them share a single aiohttp connection pool.
+
+        Unlike `UltraApi`, the constructor doesn't authenticate (it can't await). The password grant happens on the
+        first request, or when the client is entered with `async with`.
+
+        Parameters:
+        - bu (str): Either username or bearer token based on `use_token` flag.
+        - pr (str, optional): Either password or refresh token based on `use_token` flag. Defaults to None.
+        - use_token (bool, optional): If True, treats `bu` as bearer token and `pr` as refresh token. Defaults to False.
+        - debug (bool, optional): If True, prints debug information. Defaults to False.
+        - pprint (bool, optional): If True, prints JSON responses in a more human-readable format. Defaults to False.
+        - user_agent (str, optional): The user agent to use. Defaults to None.
+        - pool_maxsize (int, optional): The maximum number of open connections. Defaults to 100.
+        - pool_maxsize_per_host (int, optional): The maximum number of open connections per host, 0 for no limit.
+          Defaults to 0.
+        - keep_alive (bool, optional): If False, connections are closed after every request. Defaults to True.
+        - base_url (str, optional): The API root. Defaults to "https://api.ultradns.com".
+        - refresh_margin (int, optional): How many seconds before the access token expires the client refreshes it.
+          Defaults to 60.
+        - rate_limit (float, optional): The maximum number of requests per second. Defaults to None (no limit).
+        - rate_burst (int, optional): How many requests may go out back to back before `rate_limit` applies. Defaults
+          to the rate limit.
+        - adaptive_rate_limit (bool, optional): If True, the rate limit is lowered after a 429 and recovers gradually.
+          Defaults to True.
+        - throttle_retries (int, optional): How many times a request is retried after a 429. Defaults to 3.
+
+        Raises:
+        - ImportError: If aiohttp is not installed.
+        - ValueError: If `pr` is not provided when `use_token` is False.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncUltraApi requires aiohttp. Install it with 'pip install ultra_auth[async]'.")
+
+        self.base_url = base_url.rstrip("/")
+        self.access_token = str()
+        self.refresh_token = str()
+        self.debug = debug
+        self.pprint = pprint
+        self.user_agent = user_agent
+        self.session = None
+        self._pool_maxsize = pool_maxsize
+        self._pool_maxsize_per_host = pool_maxsize_per_host
+        self._keep_alive = keep_alive
+        self._credentials = None
+        self._auth_lock = None
+        self.token_expires_at = None
+        self._refresh_at = None
+        self.refresh_margin = refresh_margin
+        self.rate_limiter = RateLimiter(rate_limit, rate_burst, adaptive=adaptive_rate_limit) if rate_limit else None
+        self.throttle_retries = throttle_retries
+
+        if use_token:
+            self.access_token = bu
+            self.refresh_token = pr
+            if not self.refresh_token:
+                print(
+                    "Warning: Passing a Bearer token with no refresh token means the client state will expire after an hour.")
+        else:
+            if not pr:
+                raise ValueError("Password is required when providing a username.")
+            self._credentials = (bu, pr)
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Return the shared session, creating it on first use. aiohttp sessions have to be created inside a running
+        event loop, which is why this doesn't happen in the constructor.
+
+        Returns:
+        - aiohttp.ClientSession: The session that owns the connection pool.
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_maxsize, limit_per_host=self._pool_maxsize_per_host,
+                                             force_close=not self._keep_alive)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def close(self):
+        """Close the session and release every pooled connection."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self._ensure_auth()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_auth_lock(self) -> asyncio.Lock:
+        """Return the lock that serializes token grants. Like the session, it's created lazily inside the event loop.
+
+        Returns:
+        - asyncio.Lock: The token lock.
+        """
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        return self._auth_lock
+
+    async def _ensure_auth(self):
+        """Run the password grant if the client was created with a username and hasn't authenticated yet, and refresh
+        the access token if it's about to expire."""
+        if self._credentials is not None:
+            async with self._get_auth_lock():
+                if self._credentials is not None:
+                    await self._auth(*self._credentials)
+                    self._credentials = None
+        if self._refresh_at is not None and self.refresh_token and time.monotonic() >= self._refresh_at:
+            await self._refresh(stale_token=self.access_token)
+
+    async def _token_request(self, payload: dict):
+        """Post a grant to the token endpoint and store the tokens it returns.
+
+        Parameters:
+        - payload (dict): The form body of the grant.
+
+        Raises:
+        - aiohttp.ClientResponseError: If the status is an error.
+        """
+        async with self._get_session().post(f"{self.base_url}/authorization/token", data=payload) as resp:
+            resp.raise_for_status()
+            body = codec.loads(await resp.read())
+        self.access_token = body.get('accessToken')
+        self.refresh_token = body.get('refreshToken')
+        expires_in = body.get('expiresIn')
+        if expires_in:
+            # Same rule as UltraApi: never refresh more than halfway through a token's life
+            expires_in = int(expires_in)
+            self.token_expires_at = time.monotonic() + expires_in
+            self._refresh_at = self.token_expires_at - min(self.refresh_margin, expires_in / 2)
+        else:
+            self.token_expires_at = self._refresh_at = None
+
+    async def _auth(self, username: str, password: str):
+        """Authenticate using username and password.
+
+        Raises:
+        - aiohttp.ClientResponseError: If the status is an error.
+        """
+        await self._token_request({
+            "grant_type": "password",
+            "username": username,
+            "password": password
+        })
+
+    async def _refresh(self, stale_token: str = None):
+        """Refresh the access token using the refresh token. Concurrent callers share a single refresh, the same way
+        `UltraApi._refresh` does.
+
+        Parameters:
+        - stale_token (str, optional): The access token the caller found to be expired. Defaults to None, which always
+          refreshes.
+
+        Raises:
+        - Exception: If the refresh token is not set.
+        """
+        async with self._get_auth_lock():
+            if stale_token is not None and stale_token != self.access_token:
+                return
+            if self.refresh_token:
+                await self._token_request({
+                    "grant_type": "refresh_token",
+                    "refresh_token": self.refresh_token
+                })
+            else:
+                raise Exception("Error: Your token cannot be refreshed.")
+
+    def _headers(self, content_type: str = None) -> dict:
+        """Generate request headers.
+
+        Parameters:
+        - content_type (str, optional): The content type of the request. Defaults to None.
+
+        Returns:
+        - dict: The request headers.
+        """
+        headers = {
+            "Accept": "application/json",
+            "Authorization": f"Bearer {self.access_token}",
+            "User-Agent": self.user_agent or get_client_user_agent()
+        }
+        if content_type:
+            headers["Content-Type"] = content_type
+        return headers
+
+    async def post(self, uri: str, payload: str = None, plain_text: bool = False) -> Union[dict, str, bytes]:
+        """Make a POST request.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - payload (str, optional): The payload to send. Defaults to None.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        return await self._call(uri, "POST", payload=payload, plain_text=plain_text)
+
+    async def put(self, uri: str, payload: str, plain_text: bool = False) -> Union[dict, str, bytes]:
+        """Make a PUT request.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - payload (string): The payload to send.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        return await self._call(uri, "PUT", payload=payload, plain_text=plain_text)
+
+    async def patch(self, uri: str, payload: str, plain_text: bool = False) -> Union[dict, str, bytes]:
+        """Make a PATCH request.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - payload (string): The payload to send.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        return await self._call(uri, "PATCH", payload=payload, plain_text=plain_text)
+
+    async def get(self, uri: str, params: dict = None, content_type: str = None) -> Union[dict, str, bytes]:
+        """Make a GET request.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - content_type (str, optional): The content type of the request. Defaults to None.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        if content_type:
+            return await self._call(uri, "GET", params=params, content_type=content_type)
+        else:
+            return await self._call(uri, "GET", params=params)
+
+    async def delete(self, uri: str, content_type: str = None) -> Union[dict, str, bytes]:
+        """Make a DELETE request.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - content_type (str, optional): The content type of the request. Defaults to None.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        if content_type:
+            return await self._call(uri, "DELETE", content_type=content_type)
+        else:
+            return await self._call(uri, "DELETE")
+
+    async def _send(self, uri: str, method: str, params: dict = None, payload: dict = None, content_type: str = "application/json", plain_text: bool = False) -> "aiohttp.ClientResponse":
+        """Send a request through the rate limiter, retrying throttled (429) responses like `UltraApi._send`.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - method (str): The HTTP method to use.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - payload (dict, optional): The payload to send. Defaults to None.
+        - content_type (str, optional): The content type of the request. Defaults to "application/json".
+        - plain_text (bool, optional): Whether to send the payload as-is instead of encoding it as JSON.
+
+        Returns:
+        - aiohttp.ClientResponse: The last response received. The caller must release it.
+        """
+        # See UltraApi._send for why plain text payloads are sent as-is
+        if plain_text:
+            body = {"data": payload}
+        else:
+            body = {"data": codec.dumps(payload)} if payload is not None else {}
+
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            resp = await self._get_session().request(method, self.base_url+uri, params=params, headers=self._headers(content_type), **body)
+
+            if resp.status != 429:
+                if self.rate_limiter:
+                    self.rate_limiter.succeeded()
+                return resp
+
+            retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+            if self.rate_limiter:
+                self.rate_limiter.throttled(retry_after)
+            if attempt >= self.throttle_retries:
+                return resp
+
+            delay = retry_after if retry_after is not None else min(2 ** attempt, 60)
+            if self.debug:
+                print(f"Throttled on {method} {uri}, retrying in {delay:.2f}s")
+            resp.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _call(self, uri: str, method: str, params: dict = None, payload: dict = None, retry: bool = True, content_type: str = "application/json", plain_text: bool = False) -> Union[dict, str, bytes]:
+        """Make an API call. The response handling is the same as `UltraApi._call`.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - method (str): The HTTP method to use.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - payload (dict, optional): The payload to send. Defaults to None.
+        - retry (bool, optional): Whether to retry the request if the access token has expired. Defaults to True.
+        - content_type (str, optional): The content type of the request. Defaults to "application/json".
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        await self._ensure_auth()
+        # The token this request goes out with, so a 401 only triggers a refresh if nobody has replaced it yet
+        token = self.access_token
+
+        if self.debug:
+            debug_info = {
+                "headers": self._headers(content_type),
+                "method": method,
+                "url": self.base_url+uri,
+                "params": params,
+                "payload": payload,
+                "payload_type": type(payload).__name__,
+                "retry": retry,
+                "access_token": self.access_token,
+                "refresh_token": self.refresh_token
+            }
+            print(f"Debug info: {json.dumps(debug_info, indent=4)}")
+
+        async with await self._send(uri, method, params=params, payload=payload, content_type=content_type, plain_text=plain_text) as resp:
+            if resp.status == 204:
+                if self.pprint:
+                    return codec.dumps_pretty({"status_code": resp.status, "message": "No content"})
+                else:
+                    return {'status_code': resp.status, 'message': 'No content'}
+
+            response_type = resp.headers.get('Content-Type', 'None')
+
+            if response_type == 'application/zip':
+                return await resp.read()
+
+            if response_type == 'text/plain':
+                return await resp.text()
+
+            content = await resp.read()
+
+            if resp.status == 202:
+                response_data = {}
+                if content:
+                    response_data = codec.loads(content)
+                if 'X-Task-Id' in resp.headers:
+                    response_data.update({"task_id": resp.headers['X-Task-Id']})
+                if 'Location' in resp.headers:
+                    response_data.update({"location": resp.headers['Location']})
+                return response_data
+
+            expired = resp.status == 401 and retry
+
+            if resp.status >= 400 and not expired:
+                if content and self.debug:
+                    print(f"Message: {content.decode(errors='replace')}")
+                resp.raise_for_status()
+
+        if expired:
+            # Refresh the token once the connection is back in the pool, then try again
+            await self._refresh(stale_token=token)
+            return await self._call(uri, method, params=params, payload=payload, retry=False, content_type=content_type, plain_text=plain_text)
+
+        if content:
+            if self.pprint:
+                return codec.dumps_pretty(codec.loads(content))
+            else:
+                return codec.loads(content)
+        else:
+            return None
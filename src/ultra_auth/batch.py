@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Iterable, Iterator, List, Tuple
+
+
+class BatchResult:
+    """The outcome of one request in a batch. Exactly one of `result` and `error` is set."""
+
+    __slots__ = ("index", "request", "result", "error")
+
+    def __init__(self, index: int, request: tuple, result: Any = None, error: Exception = None):
+        self.index = index
+        self.request = request
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """True if the request completed without raising."""
+        return self.error is None
+
+    def __repr__(self):
+        outcome = f"error={self.error!r}" if self.error else f"result={self.result!r}"
+        return f"BatchResult(index={self.index}, request={self.request!r}, {outcome})"
+
+
+def _dispatch(client, request: tuple) -> Any:
+    """Run a single (method, uri[, payload]) request through the matching verb helper of the client.
+
+    Parameters:
+    - client: Anything exposing the `UltraApi` verb methods.
+    - request (tuple): The method, URI and optional payload. For GET requests the payload is the query parameters.
+
+    Returns:
+    - Any: Whatever the verb helper returned.
+
+    Raises:
+    - ValueError: If the method isn't supported or the tuple is malformed.
+    """
+    if len(request) == 2:
+        method, uri = request
+        payload = None
+    elif len(request) == 3:
+        method, uri, payload = request
+    else:
+        raise ValueError(f"Batch requests must be (method, uri) or (method, uri, payload), got {request!r}")
+
+    method = method.upper()
+    if method == "GET":
+        return client.get(uri, payload or {})
+    if method == "DELETE":
+        return client.delete(uri)
+    if method in ("POST", "PUT", "PATCH"):
+        return getattr(client, method.lower())(uri, payload)
+    raise ValueError(f"Unsupported batch method '{method}'.")
+
+
+def _run(client, index: int, request: tuple) -> BatchResult:
+    try:
+        return BatchResult(index, request, result=_dispatch(client, request))
+    except Exception as e:
+        return BatchResult(index, request, error=e)
+
+
+def iter_batch(client, requests: Iterable[Tuple], max_workers: int = 10) -> Iterator[BatchResult]:
+    """Run requests concurrently and yield their results as they complete.
+
+    Parameters:
+    - client: Anything exposing the `UltraApi` verb methods.
+    - requests (Iterable[Tuple]): (method, uri) or (method, uri, payload) tuples.
+    - max_workers (int, optional): The number of requests in flight at once. Defaults to 10.
+
+    Returns:
+    - Iterator[BatchResult]: One result per request, in completion order. Use `index` to match them up.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run, client, index, request) for index, request in enumerate(requests)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # If the caller stops iterating early, don't send whatever hasn't started yet
+            for future in futures:
+                future.cancel()
+
+
+def run_batch(client, requests: Iterable[Tuple], max_workers: int = 10) -> List[BatchResult]:
+    """Run requests concurrently and return their results in the order they were given.
+
+    Parameters:
+    - client: Anything exposing the `UltraApi` verb methods.
+    - requests (Iterable[Tuple]): (method, uri) or (method, uri, payload) tuples.
+    - max_workers (int, optional): The number of requests in flight at once. Defaults to 10.
+
+    Returns:
+    - List[BatchResult]: One result per request.
+    """
+    requests = list(requests)
+    results = [None] * len(requests)
+    for item in iter_batch(client, requests, max_workers=max_workers):
+        results[item.index] = item
+    return results
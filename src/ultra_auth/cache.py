@@ -0,0 +1,249 @@
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Optional
+
+# Task status changes underneath us, so it's never cached unless a rule says otherwise
+DEFAULT_PATH_TTLS = {"/tasks/*": 0}
+
+_ZONE_PATH = re.compile(r"^(?P<prefix>(?:/v\d+)?/zones)(?:/(?P<zone>[^/?]+))?")
+
+
+def _zone_key(zone: str) -> str:
+    return zone.rstrip(".").lower()
+
+
+class _Entry:
+    __slots__ = ("uri", "value", "expires", "etag", "last_modified")
+
+    def __init__(self, uri: str, value: Any, expires: float, etag: str = None, last_modified: str = None):
+        self.uri = uri
+        self.value = value
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 30, maxsize: int = 1024, path_ttls: dict = None):
+        """An LRU cache of GET responses, for use with `UltraApi(cache=...)`.
+
+        Entries live for `ttl` seconds unless a glob in `path_ttls` matches their URI first, e.g.
+        {"/accounts": 300, "/v3/zones/*/rrsets*": 10}. A TTL of 0 disables caching for matching paths. Expired entries
+        that came with an ETag or Last-Modified header are kept and revalidated with a conditional request.
+
+        Parameters:
+        - ttl (float, optional): The default lifetime of an entry in seconds. Defaults to 30.
+        - maxsize (int, optional): The most entries kept before the least recently used are evicted. Defaults to 1024.
+        - path_ttls (dict, optional): Per-path TTLs keyed by glob pattern. Checked in order. Defaults to None.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.path_ttls = dict(path_ttls or {})
+        for pattern, path_ttl in DEFAULT_PATH_TTLS.items():
+            self.path_ttls.setdefault(pattern, path_ttl)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        # Bumped by invalidations, so a response fetched before one isn't stored after it. Zone writes bump their zone
+        # (and None, for the listings); `invalidate` bumps the epoch, which covers everything
+        self._epoch = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(uri: str, params: dict = None, content_type: str = None) -> tuple:
+        """Build the cache key for a request.
+
+        Returns:
+        - tuple: The key.
+        """
+        return uri, json.dumps(params or {}, sort_keys=True, default=str), content_type
+
+    def ttl_for(self, uri: str) -> float:
+        """Return the TTL that applies to a URI.
+
+        Parameters:
+        - uri (str): The request URI.
+
+        Returns:
+        - float: The TTL in seconds.
+        """
+        for pattern, path_ttl in self.path_ttls.items():
+            if fnmatchcase(uri, pattern):
+                return path_ttl
+        return self.ttl
+
+    @staticmethod
+    def _scope(uri: str) -> Any:
+        """The generation a URI belongs to: its zone, None for zone listings, or False for anything else."""
+        match = _ZONE_PATH.match(uri)
+        if not match:
+            return False
+        zone = match.group("zone")
+        return _zone_key(zone) if zone else None
+
+    def generation(self, uri: str) -> tuple:
+        """Take a marker to pass to `store`, before sending the request whose response will be stored.
+
+        Parameters:
+        - uri (str): The request URI.
+
+        Returns:
+        - tuple: The marker.
+        """
+        with self._lock:
+            return self._epoch, self._generations.get(self._scope(uri), 0)
+
+    def lookup(self, key: tuple) -> Optional[_Entry]:
+        """Find an entry and count the hit or miss. Expired entries without validators are dropped.
+
+        Parameters:
+        - key (tuple): The cache key.
+
+        Returns:
+        - Optional[_Entry]: The entry, which may be stale (check `fresh`), or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic() and not (entry.etag or entry.last_modified):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            # A stale entry still has to go to the API, even if only to be revalidated
+            if entry.expires > time.monotonic():
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    @staticmethod
+    def fresh(entry: _Entry) -> bool:
+        return entry.expires > time.monotonic()
+
+    @staticmethod
+    def value(entry: _Entry) -> Any:
+        """Return a copy of the cached body, so callers can't modify what's stored."""
+        return copy.deepcopy(entry.value)
+
+    def store(self, key: tuple, value: Any, etag: str = None, last_modified: str = None, generation: tuple = None):
+        """Store a response body. Nothing is stored if the TTL for its path is 0, or if an invalidation that covers it
+        happened since `generation` was taken, since the response may predate that write.
+
+        Parameters:
+        - key (tuple): The cache key.
+        - value (Any): The parsed response body.
+        - etag (str, optional): The ETag response header. Defaults to None.
+        - last_modified (str, optional): The Last-Modified response header. Defaults to None.
+        - generation (tuple, optional): What `generation` returned before the request was sent. Defaults to None (store
+          regardless).
+        """
+        ttl = self.ttl_for(key[0])
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(self._scope(key[0]), 0)):
+                return
+            self._entries[key] = _Entry(key[0], copy.deepcopy(value), time.monotonic() + ttl, etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, key: tuple) -> Optional[_Entry]:
+        """Mark an entry as confirmed by a 304 and extend its lifetime.
+
+        Parameters:
+        - key (tuple): The cache key.
+
+        Returns:
+        - Optional[_Entry]: The entry, or None if it was evicted in the meantime.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.ttl_for(key[0])
+                self.revalidations += 1
+            return entry
+
+    def invalidate(self, uri_prefix: str = None):
+        """Drop entries whose URI starts with a prefix, or every entry if no prefix is given.
+
+        Parameters:
+        - uri_prefix (str, optional): The URI prefix. Defaults to None.
+        """
+        with self._lock:
+            self._epoch += 1
+            keys = [key for key in self._entries if uri_prefix is None or key[0].startswith(uri_prefix)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def invalidate_for_write(self, uri: str):
+        """Drop the entries a write to `uri` may have made stale. A write under /zones/{zone} (in any API version)
+        drops everything cached for that zone along with the zone listings.
+
+        Parameters:
+        - uri (str): The URI that was written to.
+        """
+        match = _ZONE_PATH.match(uri)
+        if not match:
+            return
+        zone = match.group("zone")
+        with self._lock:
+            self._generations[None] = self._generations.get(None, 0) + 1
+            if zone:
+                self._generations[_zone_key(zone)] = self._generations.get(_zone_key(zone), 0) + 1
+            keys = []
+            for key in self._entries:
+                cached = _ZONE_PATH.match(key[0])
+                if not cached:
+                    continue
+                # Listings are always dropped; a write to the collection itself (e.g. creating a zone) stops there
+                if cached.group("zone") is None or (zone and _zone_key(cached.group("zone")) == _zone_key(zone)):
+                    keys.append(key)
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.revalidations = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        """Return the cache counters.
+
+        Returns:
+        - dict: hits, misses, revalidations, evictions, invalidations, size and hit_ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
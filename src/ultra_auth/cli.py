@@ -0,0 +1,359 @@
+"""Run bulk zone and rrset operations from a manifest.
+
+    ultra-bulk manifest.jsonl -u username -p password --workers 16
+
+Each line of a JSONL manifest (or row of a CSV one, with a header) is one operation:
+
+    {"op": "create_zone", "zone": "example.com.", "account": "my-account"}
+    {"op": "delete_zone", "zone": "example.com."}
+    {"op": "create_rrset", "zone": "example.com.", "owner": "www", "rrtype": "A", "ttl": 300, "rdata": ["192.0.2.1"]}
+    {"op": "update_rrset", "zone": "example.com.", "owner": "www", "rrtype": "A", "ttl": 300, "rdata": ["192.0.2.2"]}
+    {"op": "delete_rrset", "zone": "example.com.", "owner": "www", "rrtype": "A"}
+    {"op": "sync_zone", "zone": "example.com.", "file": "zones/example.com.txt", "prune": true}
+
+In CSV manifests, multiple rdata values are separated by "|". A sync_zone file is read as a BIND zone file with the zone
+as its origin. Its rdata is put in the API's form before it's compared (see `zonefile.to_rrsets`), and its SOA record is
+ignored. Every finished operation is appended to a journal, and a rerun with the same journal skips whatever already
+succeeded, so an interrupted run picks up where it stopped.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Tuple, Union
+
+from .sync import ZoneSync
+from .tasks import PENDING_CODES, TaskHandler
+from .udns import UltraApi
+from .zonefile import parse_zone, to_rrsets
+
+OPERATIONS = ("create_zone", "delete_zone", "create_rrset", "update_rrset", "delete_rrset", "sync_zone")
+
+
+def _csv_op(row: dict) -> dict:
+    if None in row:
+        raise ValueError(f"{len(row[None])} more fields than the header has columns")
+    op = {key: value for key, value in row.items() if value not in (None, "")}
+    if "rdata" in op:
+        op["rdata"] = op["rdata"].split("|")
+    if "ttl" in op:
+        try:
+            op["ttl"] = int(op["ttl"])
+        except ValueError:
+            raise ValueError(f"ttl '{op['ttl']}' isn't a whole number of seconds") from None
+    if "prune" in op:
+        op["prune"] = op["prune"].lower() in ("1", "true", "yes")
+    return op
+
+
+def _jsonl_op(line: str) -> dict:
+    try:
+        op = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"invalid JSON ({e})") from None
+    if not isinstance(op, dict):
+        raise ValueError(f"expected a JSON object, got {type(op).__name__}")
+    return op
+
+
+def read_manifest(path: str, fmt: str = None) -> Iterator[Tuple[int, Union[dict, ValueError]]]:
+    """Read a manifest one operation at a time.
+
+    A line that can't be read doesn't stop the manifest. It comes through as a ValueError in place of its operation,
+    so it can be reported along with the rest.
+
+    Parameters:
+    - path (str): The manifest file.
+    - fmt (str, optional): "csv" or "jsonl". Defaults to None (decided by the file extension).
+
+    Returns:
+    - Iterator[Tuple[int, Union[dict, ValueError]]]: (line number, operation or error) pairs.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="" if fmt == "csv" else None) as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+            for row in rows:
+                # The reader's line number, since quoted fields can span lines
+                number = rows.line_num
+                try:
+                    yield number, _csv_op(row)
+                except ValueError as e:
+                    yield number, ValueError(f"line {number}: {e}")
+        else:
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield number, _jsonl_op(line)
+                    except ValueError as e:
+                        yield number, ValueError(f"line {number}: {e}")
+
+
+def _op_key(number: int, op: dict) -> str:
+    """Identify an operation by its position and content, so an edited manifest doesn't inherit stale journal
+    entries."""
+    digest = hashlib.sha1(json.dumps(op, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return f"{number}:{digest}"
+
+
+class Journal:
+    def __init__(self, path: str, resume: bool = True):
+        """An append-only JSONL record of finished operations.
+
+        Parameters:
+        - path (str): The journal file.
+        - resume (bool, optional): Whether to read the existing journal. If False, it's started over. Defaults to True.
+        """
+        self.path = path
+        self.done = set()
+        self.pending = {}
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    key = entry["key"]
+                    if entry["status"] == "ok":
+                        self.done.add(key)
+                        self.pending.pop(key, None)
+                    elif entry["status"] == "task":
+                        self.pending[key] = entry
+                    else:
+                        self.pending.pop(key, None)
+        self._file = open(path, "a" if resume else "w")
+        self._lock = threading.Lock()
+
+    def write(self, key: str, number: int, op: dict, status: str, **extra):
+        entry = dict(key=key, line=number, op=op.get("op"), zone=op.get("zone"), status=status, time=time.time(), **extra)
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            # Flushed per entry, so a crash loses at most the operations in flight
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BulkRunner:
+    def __init__(self, client: UltraApi, journal: Journal, workers: int = 8):
+        """Runs manifest operations concurrently and journals each outcome.
+
+        Parameters:
+        - client (UltraApi): The client.
+        - journal (Journal): Where outcomes are recorded.
+        - workers (int, optional): Operations in flight at once. Defaults to 8.
+        """
+        self.client = client
+        self.journal = journal
+        self.workers = workers
+        self.counts = Counter()
+        self.errors = Counter()
+        self.tasks = {}
+        self._account = None
+        self._account_lock = threading.Lock()
+
+    def _account_name(self) -> str:
+        with self._account_lock:
+            if self._account is None:
+                self._account = self.client.get("/accounts")["accounts"][0]["accountName"]
+            return self._account
+
+    def execute(self, op: dict):
+        """Run one operation.
+
+        Returns:
+        - The response body, or a `SyncReport` for sync_zone.
+
+        Raises:
+        - ValueError: If the operation is malformed.
+        """
+        kind = op.get("op")
+        zone = op.get("zone")
+        if kind not in OPERATIONS:
+            raise ValueError(f"Unknown op '{kind}'")
+        if not zone:
+            raise ValueError("Missing 'zone'")
+
+        if kind == "create_zone":
+            return self.client.post("/v3/zones", {
+                "properties": {"name": zone, "accountName": op.get("account") or self._account_name(), "type": "PRIMARY"},
+                "primaryCreateInfo": {"forceImport": True, "createType": "NEW"}
+            })
+        if kind == "delete_zone":
+            return self.client.delete(f"/v3/zones/{zone}")
+        if kind == "sync_zone":
+            if not op.get("file"):
+                raise ValueError("sync_zone needs a 'file'")
+            try:
+                with open(op["file"]) as f:
+                    # Relative names are qualified against the zone and TXT values unquoted, so unchanged rrsets
+                    # compare equal to the API's and aren't rewritten on every run
+                    desired = [rrset for rrset in to_rrsets(parse_zone(f, origin=zone)) if rrset["rrtype"] != "SOA"]
+            except ValueError as e:
+                raise ValueError(f"{op['file']}: {e}") from e
+            report = ZoneSync(self.client).apply(zone, desired, prune=bool(op.get("prune")), max_workers=4)
+            if report.errors:
+                change, error = report.errors[0]
+                raise RuntimeError(f"{len(report.errors)} changes failed, first {change}: {error}")
+            return report
+
+        if not op.get("owner") or not op.get("rrtype"):
+            raise ValueError(f"{kind} needs 'owner' and 'rrtype'")
+        uri = f"/v3/zones/{zone}/rrsets/{op['rrtype']}/{op['owner']}"
+        if kind == "delete_rrset":
+            return self.client.delete(uri)
+        payload = {"rdata": op.get("rdata") or []}
+        if op.get("ttl") is not None:
+            payload["ttl"] = op["ttl"]
+        return self.client.post(uri, payload) if kind == "create_rrset" else self.client.put(uri, payload)
+
+    def _finish(self, key: str, number: int, op: dict, result=None, error: Exception = None):
+        if error is not None:
+            self.counts["failed"] += 1
+            self.errors[f"{op.get('op') or 'manifest'}: {_describe(error)}"] += 1
+            self.journal.write(key, number, op, "error", error=_describe(error))
+        elif isinstance(result, dict) and result.get("task_id"):
+            self.tasks[result["task_id"]] = (key, number, op)
+            self.journal.write(key, number, op, "task", task_id=result["task_id"])
+        else:
+            self.counts["ok"] += 1
+            self.journal.write(key, number, op, "ok")
+
+    def run(self, operations: Iterator[Tuple[int, Union[dict, ValueError]]]):
+        """Run every operation not already done, then wait for the tasks they started."""
+        for key, entry in self.journal.pending.items():
+            # Tasks started by an earlier run, still to be confirmed
+            self.tasks[entry["task_id"]] = (key, entry["line"], {"op": entry["op"], "zone": entry["zone"]})
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = {}
+            try:
+                for number, op in operations:
+                    if isinstance(op, ValueError):
+                        # An unreadable line fails on its own; it's never done, so a rerun reads it again
+                        self._finish(_op_key(number, {"error": str(op)}), number, {}, error=op)
+                        continue
+                    key = _op_key(number, op)
+                    if key in self.journal.done or key in self.journal.pending:
+                        self.counts["skipped"] += 1
+                        continue
+                    in_flight[executor.submit(self.execute, op)] = (key, number, op)
+                    # Read the manifest only as fast as operations finish
+                    if len(in_flight) >= self.workers * 2:
+                        self._collect(in_flight, FIRST_COMPLETED)
+            except BaseException:
+                # On Ctrl-C, drop what hasn't started but journal what has, so a rerun doesn't repeat it
+                for future in list(in_flight):
+                    if future.cancel():
+                        del in_flight[future]
+                self._collect(in_flight, ALL_COMPLETED)
+                raise
+            self._collect(in_flight, ALL_COMPLETED)
+
+        if self.tasks:
+            self._wait_for_tasks()
+
+    def _collect(self, in_flight: dict, return_when):
+        done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            key, number, op = in_flight.pop(future)
+            try:
+                self._finish(key, number, op, result=future.result())
+            except Exception as e:
+                self._finish(key, number, op, error=e)
+
+    def _task_finished(self, task_id: str, status: dict):
+        key, number, op = self.tasks.pop(task_id)
+        if status.get("code") == "COMPLETE":
+            self.counts["ok"] += 1
+            self.journal.write(key, number, op, "ok", task_id=task_id)
+        else:
+            self._finish(key, number, op, error=RuntimeError(f"task {status.get('code')}: {status.get('message')}"))
+
+    def _wait_for_tasks(self, attempts: int = 3):
+        """Wait for the tasks operations started. When polling fails, each task is checked on its own, and one that
+        can't be checked is journaled as an error, so its operation runs again next time instead of staying pending."""
+        handler = TaskHandler(self.client)
+        for _ in range(attempts):
+            try:
+                for task_id, status in handler.wait_many(list(self.tasks), initial_interval=1, with_ids=True):
+                    self._task_finished(task_id, status)
+                return
+            except Exception as e:
+                print(f"Polling {len(self.tasks)} tasks failed ({_describe(e)}), checking them one at a time",
+                      file=sys.stderr)
+            for task_id in list(self.tasks):
+                try:
+                    status = handler.check(task_id)
+                except Exception as e:
+                    key, number, op = self.tasks.pop(task_id)
+                    self._finish(key, number, op, error=RuntimeError(f"couldn't poll task {task_id}: {_describe(e)}"))
+                    continue
+                if status.get("code") not in PENDING_CODES:
+                    self._task_finished(task_id, status)
+            if not self.tasks:
+                return
+        # Still running after every attempt: they stay pending in the journal and are checked again on the next run
+        print(f"Stopped waiting for {len(self.tasks)} tasks", file=sys.stderr)
+
+
+def _describe(error: Exception) -> str:
+    response = getattr(error, "response", None)
+    if response is not None:
+        return f"{response.status_code} {response.text[:200]}"
+    return f"{type(error).__name__}: {error}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run bulk zone and rrset operations against UltraDNS from a manifest.")
+    parser.add_argument("manifest", help="A CSV or JSONL file of operations.")
+    parser.add_argument("-u", "--username", help="Username for authentication.", required=True)
+    parser.add_argument("-p", "--password", help="Password for authentication.", required=True)
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="The manifest format. Defaults to the file extension.")
+    parser.add_argument("--workers", type=int, default=8, help="Operations in flight at once.")
+    parser.add_argument("--journal", help="The progress journal. Defaults to the manifest path plus '.journal'.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the journal and run everything again.")
+    parser.add_argument("--rate-limit", type=float, help="Requests per second.")
+    parser.add_argument("--base-url", default="https://api.ultradns.com")
+    args = parser.parse_args(argv)
+
+    client = UltraApi(args.username, args.password, base_url=args.base_url, rate_limit=args.rate_limit,
+                      pool_maxsize=max(args.workers, 10))
+    journal = Journal(args.journal or f"{args.manifest}.journal", resume=not args.restart)
+    runner = BulkRunner(client, journal, workers=args.workers)
+
+    start = time.perf_counter()
+    interrupted = False
+    try:
+        runner.run(read_manifest(args.manifest, args.format))
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        elapsed = time.perf_counter() - start
+        journal.close()
+        client.close()
+
+    counts = runner.counts
+    finished = counts["ok"] + counts["failed"]
+    print(f"{'Interrupted' if interrupted else 'Done'} in {elapsed:.1f}s: {counts['ok']} ok, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped (already done), {len(runner.tasks)} tasks unconfirmed, "
+          f"{finished / elapsed if elapsed else 0.0:.1f} ops/s", file=sys.stderr)
+    for message, count in runner.errors.most_common(10):
+        print(f"  {count} x {message}", file=sys.stderr)
+    if interrupted or counts["failed"] or runner.tasks:
+        print(f"Rerun with the same journal ({journal.path}) to retry what didn't finish.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
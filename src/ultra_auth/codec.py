@@ -0,0 +1,92 @@
+"""JSON encoding and decoding, with orjson when it's installed and the standard library otherwise.
+
+The two backends are kept interchangeable for what the API deals in. Payloads can have int, float, bool and None dict
+keys, which both write as strings, and dataclasses, enums, UUIDs and datetime, date and time values, which both write
+the way orjson does (fields as an object, the member's value, the canonical string, ISO 8601). What still differs:
+
+- NaN and infinity are written as null by orjson and as the non-standard NaN and Infinity by the standard library.
+  Neither is valid in a payload.
+- orjson refuses integers outside the 64-bit range, and more than 254 levels of nesting, with a TypeError.
+- orjson also takes datetimes, UUIDs and enums as dict keys. The standard library raises TypeError for them.
+- When decoding, orjson only reads UTF-8, and rejects NaN, Infinity and numbers too large for a float. The standard
+  library reads them all (the last as infinity), and detects UTF-16 and UTF-32 in bytes.
+"""
+import datetime
+import enum
+import json
+import uuid
+from typing import Any, Union
+
+try:
+    import dataclasses
+except ImportError:  # pragma: no cover - Python 3.6, which has no dataclasses to encode
+    dataclasses = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+# The JSON library in use: "orjson" when it's installed, otherwise the standard library's "json"
+BACKEND = "orjson" if orjson else "json"
+
+
+def _default(value: Any) -> Any:
+    """Encode the types orjson handles natively, for the standard library."""
+    if dataclasses and dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document.
+
+    Parameters:
+    - data (Union[bytes, str]): The document.
+
+    Returns:
+    - Any: The decoded value.
+
+    Raises:
+    - json.JSONDecodeError: If the document isn't valid JSON (orjson's error is a subclass).
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as compact UTF-8 JSON, for request bodies.
+
+    Parameters:
+    - value (Any): The value to encode.
+
+    Returns:
+    - bytes: The encoded document.
+
+    Raises:
+    - TypeError: If the value, or one of its dict keys, can't be encoded.
+    """
+    if orjson:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def dumps_pretty(value: Any) -> str:
+    """Encode a value as JSON indented by 4 spaces, for pretty print mode.
+
+    orjson can only indent by 2, so this always uses the standard library to keep the output unchanged.
+
+    Parameters:
+    - value (Any): The value to encode.
+
+    Returns:
+    - str: The encoded document.
+    """
+    return json.dumps(value, indent=4)
@@ -0,0 +1,94 @@
+import mmap
+import os
+import zipfile
+from typing import IO, Iterable, Iterator, Tuple, Union
+
+# Large enough to keep syscalls down, small enough that a worker's footprint stays flat
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def write_chunks(chunks: Iterable[bytes], dest: Union[str, os.PathLike, IO[bytes]]) -> int:
+    """Write chunks of bytes to a path or an open binary file.
+
+    Parameters:
+    - chunks (Iterable[bytes]): The data.
+    - dest (Union[str, os.PathLike, IO[bytes]]): A path, which is created or truncated, or a writable binary file.
+
+    Returns:
+    - int: The number of bytes written.
+    """
+    if hasattr(dest, "write"):
+        return _write(chunks, dest)
+    with open(dest, "wb") as f:
+        return _write(chunks, f)
+
+
+def _write(chunks: Iterable[bytes], f: IO[bytes]) -> int:
+    written = 0
+    for chunk in chunks:
+        if chunk:
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+class _MappedFile:
+    """Presents a memory map as a seekable file. zipfile needs `seekable()`, which mmap only gained in Python 3.13."""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mapped = mapped
+
+    def __getattr__(self, name):
+        return getattr(self._mapped, name)
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        # mmap raises ValueError for a position before the start where a file raises OSError, which is what zipfile
+        # expects when it looks for the end record of something shorter than one
+        try:
+            return self._mapped.seek(pos, whence)
+        except ValueError as e:
+            raise OSError(str(e)) from e
+
+
+def iter_zip_members(path: Union[str, os.PathLike]) -> Iterator[Tuple[str, IO[bytes]]]:
+    """Walk the members of a zone export archive on disk without reading it into memory.
+
+    The archive is memory-mapped, and each member is decompressed as it's read from the file object yielded for it.
+    That file object is closed when the iteration moves on to the next member.
+
+    Parameters:
+    - path (Union[str, os.PathLike]): The archive.
+
+    Returns:
+    - Iterator[Tuple[str, IO[bytes]]]: (member name, binary file object) pairs. Directories are skipped.
+
+    Raises:
+    - zipfile.BadZipFile: If the file isn't a zip archive, including when it's empty.
+    """
+    with open(path, "rb") as f:
+        # An empty file can't be mapped (mmap raises ValueError), and it isn't an archive anyway
+        if os.fstat(f.fileno()).st_size == 0:
+            raise zipfile.BadZipFile(f"{os.fspath(path)} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, zipfile.ZipFile(_MappedFile(mapped)) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member
+
+
+def iter_zone_files(path: Union[str, os.PathLike], encoding: str = "utf-8") -> Iterator[Tuple[str, str]]:
+    """Walk the zone files in an export archive on disk, one zone at a time.
+
+    Parameters:
+    - path (Union[str, os.PathLike]): The archive.
+    - encoding (str, optional): The encoding of the zone files. Defaults to "utf-8".
+
+    Returns:
+    - Iterator[Tuple[str, str]]: (member name, zone file text) pairs. Only one zone is held in memory at a time.
+    """
+    for name, member in iter_zip_members(path):
+        yield name, member.read().decode(encoding)
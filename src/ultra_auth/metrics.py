@@ -0,0 +1,186 @@
+import threading
+from bisect import bisect_left
+from typing import Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Path segments following these are identifiers, and get replaced by a placeholder in endpoint templates
+_ID_SEGMENTS = {
+    "zones": "{zone}",
+    "tasks": "{task_id}",
+    "accounts": "{account}",
+    "users": "{user}",
+    "reports": "{report_id}",
+}
+
+
+def endpoint_template(uri: str) -> str:
+    """Collapse a URI into its endpoint template, so metrics aren't split per zone or task. For example,
+    "/v3/zones/example.com./rrsets/A/www" becomes "/v3/zones/{zone}/rrsets/{rrtype}/{owner}".
+
+    Parameters:
+    - uri (str): The request URI.
+
+    Returns:
+    - str: The template.
+    """
+    segments = uri.split("?", 1)[0].split("/")
+    template = []
+    placeholders = []
+    for segment in segments:
+        if placeholders:
+            template.append(placeholders.pop(0))
+            continue
+        template.append(segment)
+        if segment == "rrsets":
+            placeholders = ["{rrtype}", "{owner}"]
+        elif segment in _ID_SEGMENTS:
+            placeholders = [_ID_SEGMENTS[segment]]
+    return "/".join(template)
+
+
+def _label_value(value: str) -> str:
+    # The exposition format's escapes for label values; a backslash goes first so the others aren't doubled
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, buckets: Tuple[float, ...], value: float):
+        # Non-cumulative here; cumulated on export so recording stays O(log n)
+        index = bisect_left(buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        running = 0
+        result = []
+        for count in self.counts:
+            running += count
+            result.append(running)
+        return result
+
+
+class _Series:
+    __slots__ = ("duration", "ttfb", "retries", "refreshes")
+
+    def __init__(self, size: int):
+        self.duration = _Histogram(size)
+        self.ttfb = _Histogram(size)
+        self.retries = 0
+        self.refreshes = 0
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, prefix: str = "ultra_auth"):
+        """Per-endpoint request counters and latency histograms, for use with `UltraApi(metrics=...)`.
+
+        Requests are grouped by method, endpoint template and status. Each group records the total duration, the time
+        to first byte, and how many retries and token refreshes its requests needed.
+
+        Parameters:
+        - buckets (Tuple[float, ...], optional): Histogram upper bounds in seconds. Defaults to DEFAULT_BUCKETS.
+        - prefix (str, optional): The prefix of the Prometheus metric names. Defaults to "ultra_auth".
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, endpoint: str, status, duration: float, ttfb: float = None, retries: int = 0, refreshes: int = 0):
+        """Record one request.
+
+        Parameters:
+        - method (str): The HTTP method.
+        - endpoint (str): The endpoint template.
+        - status: The final status code, or "error" if no response was received.
+        - duration (float): The total time in seconds.
+        - ttfb (float, optional): The time to the response headers in seconds. Defaults to None.
+        - retries (int, optional): How many times the request was resent. Defaults to 0.
+        - refreshes (int, optional): How many token refreshes the request triggered. Defaults to 0.
+        """
+        key = (method, endpoint, str(status))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.duration.observe(self.buckets, duration)
+            if ttfb is not None:
+                series.ttfb.observe(self.buckets, ttfb)
+            series.retries += retries
+            series.refreshes += refreshes
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> list:
+        """Return everything recorded so far as plain data.
+
+        Returns:
+        - list: One dict per (method, endpoint, status) with count, mean and cumulative bucket counts.
+        """
+        with self._lock:
+            items = list(self._series.items())
+            result = []
+            for (method, endpoint, status), series in items:
+                result.append({
+                    "method": method,
+                    "endpoint": endpoint,
+                    "status": status,
+                    "count": series.duration.count,
+                    "duration_sum": series.duration.total,
+                    "duration_mean": series.duration.total / series.duration.count if series.duration.count else 0.0,
+                    "duration_buckets": dict(zip(self.buckets, series.duration.cumulative())),
+                    "ttfb_sum": series.ttfb.total,
+                    "ttfb_count": series.ttfb.count,
+                    "ttfb_buckets": dict(zip(self.buckets, series.ttfb.cumulative())),
+                    "retries": series.retries,
+                    "refreshes": series.refreshes
+                })
+            return result
+
+    def to_prometheus(self) -> str:
+        """Render everything recorded so far in the Prometheus text exposition format.
+
+        Returns:
+        - str: The exposition text.
+        """
+        lines = []
+
+        def histogram(name: str, help_text: str, attr: str):
+            lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {self.prefix}_{name} histogram")
+            for labels, series in rows:
+                hist = getattr(series, attr)
+                for bound, count in zip(self.buckets, hist.cumulative()):
+                    lines.append(f'{self.prefix}_{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{self.prefix}_{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{self.prefix}_{name}_sum{{{labels}}} {hist.total}")
+                lines.append(f"{self.prefix}_{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name: str, help_text: str, value):
+            lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            for labels, series in rows:
+                lines.append(f"{self.prefix}_{name}{{{labels}}} {value(series)}")
+
+        with self._lock:
+            rows = [(",".join(f'{label}="{_label_value(value)}"' for label, value in zip(("method", "endpoint", "status"), key)),
+                     series)
+                    for key, series in sorted(self._series.items())]
+            counter("requests_total", "API requests made.", lambda series: series.duration.count)
+            histogram("request_duration_seconds", "Total time spent on API requests.", "duration")
+            histogram("time_to_first_byte_seconds", "Time until the response headers arrived.", "ttfb")
+            counter("retries_total", "Requests resent after a throttle or transient error.", lambda series: series.retries)
+            counter("token_refreshes_total", "Token refreshes triggered by requests.", lambda series: series.refreshes)
+        return "\n".join(lines) + "\n"
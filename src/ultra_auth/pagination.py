@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from . import codec
+
+
+def _next_params(page: dict, params: dict) -> Optional[dict]:
+    """Work out the query parameters for the page after this one.
+
+    Cursor paging (`cursorInfo.next`, used by /v3/zones) wins when it's present. Otherwise the offset is advanced using
+    `resultInfo`.
+
+    Parameters:
+    - page (dict): The page that was just fetched.
+    - params (dict): The query parameters that fetched it.
+
+    Returns:
+    - Optional[dict]: The parameters for the next page, or None if this was the last one.
+    """
+    cursor = (page.get("cursorInfo") or {}).get("next")
+    if cursor:
+        return dict(params, cursor=cursor)
+
+    result_info = page.get("resultInfo")
+    if not result_info:
+        return None
+    returned = result_info.get("returnedCount", 0)
+    offset = result_info.get("offset", params.get("offset", 0)) + returned
+    if not returned or offset >= result_info.get("totalCount", 0):
+        return None
+    return dict(params, offset=offset)
+
+
+def iter_pages(client, uri: str, params: dict = None, prefetch: bool = True) -> Iterator[dict]:
+    """Yield every page of a paged list endpoint.
+
+    With `prefetch`, the request for the next page is sent as soon as a page arrives, so it downloads while the caller
+    works on the current one. At most two pages are held at any time.
+
+    Parameters:
+    - client: Anything exposing `UltraApi.get`.
+    - uri (str): The list endpoint.
+    - params (dict, optional): Query parameters for the first page. Defaults to None.
+    - prefetch (bool, optional): Whether to fetch the next page in the background. Defaults to True.
+
+    Returns:
+    - Iterator[dict]: The pages, in order.
+    """
+    def fetch(page_params):
+        page = client.get(uri, page_params)
+        # Pretty print mode hands back a string
+        return codec.loads(page) if isinstance(page, str) else page
+
+    params = dict(params or {})
+    if not prefetch:
+        while params is not None:
+            page = fetch(params)
+            yield page
+            params = _next_params(page, params)
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(fetch, params)
+        while pending is not None:
+            page = pending.result()
+            params = _next_params(page, params)
+            pending = executor.submit(fetch, params) if params is not None else None
+            yield page
+
+
+def iter_items(client, uri: str, key: str, params: dict = None, prefetch: bool = True) -> Iterator[dict]:
+    """Yield the items of a paged list endpoint one at a time.
+
+    Parameters:
+    - client: Anything exposing `UltraApi.get`.
+    - uri (str): The list endpoint.
+    - key (str): The key holding the items in each page, e.g. "zones" or "rrSets".
+    - params (dict, optional): Query parameters for the first page. Defaults to None.
+    - prefetch (bool, optional): Whether to fetch the next page in the background. Defaults to True.
+
+    Returns:
+    - Iterator[dict]: The items, in order.
+    """
+    for page in iter_pages(client, uri, params=params, prefetch=prefetch):
+        yield from page.get(key) or []
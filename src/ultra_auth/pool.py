@@ -0,0 +1,310 @@
+import itertools
+import re
+import threading
+import time
+import zlib
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import requests
+
+from .batch import BatchResult, iter_batch, run_batch
+from .ratelimit import parse_retry_after
+from .resilience import CircuitOpenError
+from .udns import UltraApi
+from .uploads import UploadBody, is_stream
+
+ROUTING_STRATEGIES = ("least_loaded", "round_robin", "sticky")
+
+_ZONE_PATTERN = re.compile(r"/zones/([^/?]+)")
+
+
+def zone_of(uri: str) -> Union[str, None]:
+    """Pull the zone name out of a URI such as "/v3/zones/example.com./rrsets".
+
+    Parameters:
+    - uri (str): The request URI.
+
+    Returns:
+    - Union[str, None]: The zone, lower-cased and without a trailing dot, or None if the URI isn't about one zone.
+    """
+    match = _ZONE_PATTERN.search(uri)
+    if not match:
+        return None
+    return match.group(1).lower().rstrip(".") or None
+
+
+def _stream_start(stream) -> Union[int, None]:
+    """Where a file payload starts, so it can be rewound for a resend, or None if it can't be."""
+    try:
+        return stream.tell() if hasattr(stream, "seek") and stream.seekable() else None
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _rewind(stream, start: Union[int, None]) -> bool:
+    """Get a streamed payload ready to be sent again.
+
+    Returns:
+    - bool: False if it has been consumed and can't be rewound.
+    """
+    if stream is None:
+        return True
+    if isinstance(stream, UploadBody):
+        # It rewinds itself when it's sent again
+        return stream.replayable
+    if start is None:
+        return False
+    stream.seek(start)
+    return True
+
+
+class _Member:
+    """One client of the pool, and what the pool knows about it."""
+
+    __slots__ = ("client", "index", "in_flight", "requests", "errors", "throttles", "failures",
+                 "unhealthy_until", "throttled_until")
+
+    def __init__(self, client: UltraApi, index: int):
+        self.client = client
+        self.index = index
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.throttles = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        self.throttled_until = 0.0
+
+    def available_at(self) -> float:
+        return max(self.unhealthy_until, self.throttled_until)
+
+
+class UltraApiPool:
+    def __init__(self, clients: Iterable[UltraApi], routing: str = "least_loaded", unhealthy_after: int = 3,
+                 cooldown: float = 30.0, throttle_failover: bool = True):
+        """Spread requests across several clients, each logged in as a different API user.
+
+        The API rate limits each user, so adding users adds throughput. Every member keeps its own tokens, connection
+        pool and rate limiter. The pool picks a member for each call and keeps track of which members are busy,
+        throttled or failing. Throttled and failing members are skipped until they recover, unless every member is
+        unavailable.
+
+        Parameters:
+        - clients (Iterable[UltraApi]): The members.
+        - routing (str, optional): How to pick a member. "least_loaded" picks the one with the fewest requests in
+          flight. "round_robin" takes turns. "sticky" sends every request about the same zone to the same member, and
+          anything else to the least loaded one. Defaults to "least_loaded".
+        - unhealthy_after (int, optional): Consecutive failures (connection errors, 5xx responses or an open circuit)
+          after which a member is benched. Defaults to 3.
+        - cooldown (float, optional): Seconds a benched member sits out. Defaults to 30.
+        - throttle_failover (bool, optional): Whether to resend a request on another member when its member answers
+          429 even after its own retries. A throttled request wasn't processed, so it's safe to resend, as long as the
+          payload can be sent again: streamed payloads only fail over if they're seekable files (or replayable
+          `UploadBody` objects), which are rewound first. A throttled iterator payload raises the 429. Defaults to
+          True.
+
+        Raises:
+        - ValueError: If there are no clients, or the routing strategy is unknown.
+        """
+        self.members = [_Member(client, index) for index, client in enumerate(clients)]
+        if not self.members:
+            raise ValueError("A pool needs at least one client.")
+        if routing not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown routing strategy '{routing}', expected one of {', '.join(ROUTING_STRATEGIES)}.")
+        self.routing = routing
+        self.unhealthy_after = unhealthy_after
+        self.cooldown = cooldown
+        self.throttle_failover = throttle_failover
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[Tuple[str, str]], routing: str = "least_loaded", **client_kwargs) -> "UltraApiPool":
+        """Log in as each of several users and pool the clients.
+
+        Parameters:
+        - credentials (Iterable[Tuple[str, str]]): (username, password) pairs.
+        - routing (str, optional): How to pick a member. Defaults to "least_loaded".
+        - client_kwargs: Passed to every `UltraApi`, e.g. rate_limit or pool_maxsize.
+
+        Returns:
+        - UltraApiPool: The pool.
+        """
+        return cls([UltraApi(username, password, **client_kwargs) for username, password in credentials], routing=routing)
+
+    def close(self):
+        """Close every member's connection pool."""
+        for member in self.members:
+            member.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _pick(self, uri: str, exclude: set = frozenset()) -> _Member:
+        """Choose the member for a request and count it as in flight.
+
+        Parameters:
+        - uri (str): The request URI.
+        - exclude (set, optional): Indexes of members not to use, unless there's no one else. Defaults to none.
+
+        Returns:
+        - _Member: The member.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [m for m in self.members if m.index not in exclude and m.available_at() <= now]
+            if not candidates:
+                # Everyone is benched or throttled: use whoever comes back first rather than fail outright
+                remaining = [m for m in self.members if m.index not in exclude] or self.members
+                candidates = [min(remaining, key=_Member.available_at)]
+
+            member = None
+            if self.routing == "round_robin":
+                member = candidates[next(self._turns) % len(candidates)]
+            elif self.routing == "sticky":
+                zone = zone_of(uri)
+                if zone is not None:
+                    # Hash over all members so a zone only moves while its member is unavailable
+                    home = self.members[zlib.crc32(zone.encode()) % len(self.members)]
+                    member = home if home in candidates else candidates[zlib.crc32(zone.encode()) % len(candidates)]
+            if member is None:
+                member = min(candidates, key=lambda m: (m.in_flight, m.requests))
+
+            member.in_flight += 1
+            member.requests += 1
+            return member
+
+    def _release(self, member: _Member, error: Exception = None):
+        """Count a request as finished and update the member's health from how it went."""
+        now = time.monotonic()
+        with self._lock:
+            member.in_flight -= 1
+            response = getattr(error, "response", None)
+            status = response.status_code if response is not None else None
+
+            if error is None or (status is not None and status < 500 and status != 429):
+                # Client errors are the caller's problem, not the member's
+                member.failures = 0
+                return
+
+            member.errors += 1
+            if status == 429:
+                member.throttles += 1
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                member.throttled_until = now + (retry_after if retry_after is not None else 1.0)
+                return
+
+            if isinstance(error, (requests.RequestException, CircuitOpenError)):
+                member.failures += 1
+                if member.failures >= self.unhealthy_after:
+                    member.unhealthy_until = now + self.cooldown
+
+    def _call(self, uri: str, verb: str, *args, **kwargs):
+        """Run a verb method of a member chosen for the URI, failing over on throttling."""
+        tried = set()
+        # A streamed payload is consumed by the first member; it can only go to another one if it can be rewound
+        stream = next((arg for arg in args if isinstance(arg, UploadBody) or is_stream(arg)), None)
+        start = _stream_start(stream) if stream is not None and not isinstance(stream, UploadBody) else None
+        while True:
+            member = self._pick(uri, exclude=tried)
+            try:
+                result = getattr(member.client, verb)(uri, *args, **kwargs)
+            except Exception as e:
+                self._release(member, e)
+                response = getattr(e, "response", None)
+                tried.add(member.index)
+                if (self.throttle_failover and response is not None and response.status_code == 429
+                        and len(tried) < len(self.members) and _rewind(stream, start)):
+                    continue
+                raise
+            self._release(member)
+            return result
+
+    def post(self, uri: str, payload: str = None, plain_text: bool = False, idempotent: bool = False) -> Union[dict, str, bytes]:
+        """Make a POST request through one of the members. See `UltraApi.post`."""
+        return self._call(uri, "post", payload, plain_text=plain_text, idempotent=idempotent)
+
+    def put(self, uri: str, payload: str, plain_text: bool = False) -> Union[dict, str, bytes]:
+        """Make a PUT request through one of the members. See `UltraApi.put`."""
+        return self._call(uri, "put", payload, plain_text=plain_text)
+
+    def patch(self, uri: str, payload: str, plain_text: bool = False, idempotent: bool = False) -> Union[dict, str, bytes]:
+        """Make a PATCH request through one of the members. See `UltraApi.patch`."""
+        return self._call(uri, "patch", payload, plain_text=plain_text, idempotent=idempotent)
+
+    def get(self, uri: str, params: dict = {}, content_type: str = None, **kwargs) -> Union[dict, str, bytes]:
+        """Make a GET request through one of the members. See `UltraApi.get` for the other arguments."""
+        return self._call(uri, "get", params, content_type, **kwargs)
+
+    def delete(self, uri: str, content_type: str = None) -> Union[dict, str, bytes]:
+        """Make a DELETE request through one of the members. See `UltraApi.delete`."""
+        return self._call(uri, "delete", content_type)
+
+    def batch(self, requests: Iterable[Tuple], max_workers: int = None) -> List[BatchResult]:
+        """Run many requests concurrently across the members. See `UltraApi.batch`.
+
+        Parameters:
+        - requests (Iterable[Tuple]): The requests to run.
+        - max_workers (int, optional): The number of requests in flight at once. Defaults to the members'
+          `pool_maxsize` added up.
+
+        Returns:
+        - List[BatchResult]: One result per request, in the order they were given.
+        """
+        return run_batch(self, requests, max_workers=max_workers or self._capacity())
+
+    def batch_iter(self, requests: Iterable[Tuple], max_workers: int = None) -> Iterator[BatchResult]:
+        """Like `batch`, but yields results as they complete.
+
+        Parameters:
+        - requests (Iterable[Tuple]): The requests to run.
+        - max_workers (int, optional): The number of requests in flight at once. Defaults to the members'
+          `pool_maxsize` added up.
+
+        Returns:
+        - Iterator[BatchResult]: One result per request, in completion order.
+        """
+        return iter_batch(self, requests, max_workers=max_workers or self._capacity())
+
+    def iter_zones(self, params: dict = None, limit: int = 1000, prefetch: bool = True) -> Iterator[dict]:
+        """Iterate over every zone, with all pages fetched by one member. See `UltraApi.iter_zones`."""
+        member = self._member_for("/v3/zones")
+        return member.client.iter_zones(params=params, limit=limit, prefetch=prefetch)
+
+    def iter_rrsets(self, zone: str, rrtype: str = None, owner: str = None, params: dict = None, limit: int = 1000, prefetch: bool = True) -> Iterator[dict]:
+        """Iterate over the rrsets of a zone, with all pages fetched by one member. See `UltraApi.iter_rrsets`."""
+        member = self._member_for(f"/v3/zones/{zone}/rrsets")
+        return member.client.iter_rrsets(zone, rrtype=rrtype, owner=owner, params=params, limit=limit, prefetch=prefetch)
+
+    def _member_for(self, uri: str) -> _Member:
+        # Only the choice is wanted here; the pages are counted by the member itself
+        member = self._pick(uri)
+        with self._lock:
+            member.in_flight -= 1
+        return member
+
+    def _capacity(self) -> int:
+        return sum(member.client.pool_maxsize for member in self.members)
+
+    def stats(self) -> List[dict]:
+        """Report what the pool knows about each member.
+
+        Returns:
+        - List[dict]: One dict per member with its request counts, whether it's throttled or benched, and for how
+          much longer.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "index": m.index,
+                "in_flight": m.in_flight,
+                "requests": m.requests,
+                "errors": m.errors,
+                "throttles": m.throttles,
+                "healthy": m.unhealthy_until <= now,
+                "throttled": m.throttled_until > now,
+                "available_in": max(0.0, m.available_at() - now)
+            } for m in self.members]
@@ -0,0 +1,96 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = None, adaptive: bool = True, min_rate: float = None, recovery: float = None):
+        """A thread-safe token bucket. Every request takes one token; tokens refill at `rate` per second up to `burst`.
+
+        In adaptive mode, a throttled response cuts the rate in half (down to `min_rate`), and every successful request
+        after that wins back `recovery` requests/second until the configured rate is reached again.
+
+        Parameters:
+        - rate (float): The sustained number of requests per second.
+        - burst (int, optional): The bucket size, i.e. how many requests can go out back to back. Defaults to the rate,
+          rounded up.
+        - adaptive (bool, optional): Whether to slow down after throttled responses. Defaults to True.
+        - min_rate (float, optional): The floor for the adaptive rate. Defaults to a tenth of `rate`.
+        - recovery (float, optional): How much the adaptive rate grows per successful request. Defaults to 1% of `rate`.
+
+        Raises:
+        - ValueError: If `rate` is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("The rate limit must be greater than zero.")
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(-(-rate // 1)))
+        self.adaptive = adaptive
+        self.min_rate = min_rate or self.max_rate / 10
+        self.recovery = recovery or self.max_rate / 100
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, going into debt if the bucket is empty.
+
+        Returns:
+        - float: How many seconds the caller has to wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """Block until the caller may send a request."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttled(self, retry_after: float = None):
+        """Report a 429. Holds back every caller for `retry_after` seconds and, in adaptive mode, lowers the rate.
+
+        Parameters:
+        - retry_after (float, optional): The delay the server asked for. Defaults to None.
+        """
+        with self._lock:
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            if self.adaptive:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+
+    def succeeded(self):
+        """Report a request that wasn't throttled. In adaptive mode this slowly restores the configured rate."""
+        if self.adaptive and self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.recovery)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, which is either a number of seconds or an HTTP date.
+
+    Parameters:
+    - value (str, optional): The header value.
+
+    Returns:
+    - Optional[float]: The delay in seconds, or None if the header is missing or unreadable.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Iterable, Optional, Tuple, Type
+
+import requests
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """Fail fast while the API is persistently failing.
+
+        After `failure_threshold` consecutive failures (5xx responses or connection errors) the circuit opens, and
+        requests raise `CircuitOpenError` without being sent. After `recovery_timeout` seconds one trial request is let
+        through. If it succeeds the circuit closes again; if it fails the circuit stays open for another period.
+
+        Parameters:
+        - failure_threshold (int, optional): Consecutive failures that open the circuit. Defaults to 5.
+        - recovery_timeout (float, optional): Seconds to wait before letting a trial request through. Defaults to 30.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Check whether a request may go out.
+
+        Raises:
+        - CircuitOpenError: If the circuit is open, or half-open with a trial request already in flight.
+        """
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(f"Circuit open after {self.failures} consecutive failures; not sending the request.")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give up the trial slot without an outcome, e.g. when the request failed on this side before the API could
+        answer. The next request becomes the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """A rolling window of request latencies, used to pick the hedging delay.
+
+        Parameters:
+        - window (int, optional): How many recent latencies to keep. Defaults to 200.
+        - min_samples (int, optional): How many latencies are needed before a percentile is reported. Defaults to 20.
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return a percentile of the recent latencies.
+
+        Parameters:
+        - fraction (float): The percentile as a fraction, e.g. 0.95.
+
+        Returns:
+        - Optional[float]: The latency in seconds, or None if there aren't enough samples yet.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, backoff: float = 0.5, max_backoff: float = 30.0, jitter: bool = True,
+                 statuses: Iterable[int] = (502, 503, 504),
+                 exceptions: Tuple[Type[BaseException], ...] = (requests.ConnectionError, requests.Timeout),
+                 methods: Iterable[str] = IDEMPOTENT_METHODS):
+        """Which failed requests to send again, and how long to wait in between.
+
+        Only requests using one of `methods` are retried, unless the call says its request is safe to repeat. POST and
+        PATCH are left out by default, since repeating one that reached the server could apply it twice.
+
+        Parameters:
+        - max_attempts (int, optional): The most times a request is sent, including the first. Defaults to 3.
+        - backoff (float, optional): Seconds to wait before the first retry; doubled for each one after. Defaults to 0.5.
+        - max_backoff (float, optional): The longest wait between attempts. Defaults to 30.
+        - jitter (bool, optional): Whether to wait a random time of up to the backoff ("full jitter"), so clients that
+          failed together don't retry together. Defaults to True.
+        - statuses (Iterable[int], optional): Response codes worth retrying. Defaults to (502, 503, 504).
+        - exceptions (Tuple[Type[BaseException], ...], optional): Exceptions worth retrying. Defaults to connection
+          errors and timeouts.
+        - methods (Iterable[str], optional): Methods retried without being asked. Defaults to IDEMPOTENT_METHODS.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def allows(self, method: str, idempotent: bool = None) -> bool:
+        """Whether a request may be retried at all.
+
+        Parameters:
+        - method (str): The HTTP method.
+        - idempotent (bool, optional): Overrides the method-based decision when not None. Defaults to None.
+
+        Returns:
+        - bool: True if it may be retried.
+        """
+        if self.max_attempts < 2:
+            return False
+        if idempotent is not None:
+            return idempotent
+        return method in self.methods
+
+    def delay(self, attempt: int) -> float:
+        """How long to wait before the next attempt.
+
+        Parameters:
+        - attempt (int): How many attempts have failed so far, starting at 1.
+
+        Returns:
+        - float: The delay in seconds.
+        """
+        ceiling = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
@@ -0,0 +1,232 @@
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Tuple
+
+import requests
+
+from . import codec
+from .sync import _rrtype
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS zones (
+    name TEXT PRIMARY KEY,
+    last_modified TEXT,
+    record_count INTEGER,
+    properties TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS records (
+    zone TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    rrtype TEXT NOT NULL,
+    ttl INTEGER,
+    rdata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_zone ON records (zone);
+CREATE INDEX IF NOT EXISTS records_owner ON records (owner, rrtype);
+CREATE INDEX IF NOT EXISTS records_rrtype ON records (rrtype);
+CREATE INDEX IF NOT EXISTS records_rdata ON records (rdata);
+"""
+
+
+def _zone_key(name: str) -> str:
+    return name.lower() if name.endswith(".") else f"{name.lower()}."
+
+
+class SnapshotStore:
+    def __init__(self, client, path: str = "ultra_snapshot.db"):
+        """A local copy of an account's zones and rrsets in SQLite, for lookups that would otherwise mean fetching
+        every zone, e.g. which zones point at an IP address.
+
+        `sync` brings the copy up to date. It lists the zones and only downloads those whose lastModifiedDateTime or
+        resourceRecordCount has changed since the last sync. Records are stored one rdata value per row, indexed by
+        zone, owner, type and rdata.
+
+        Parameters:
+        - client (UltraApi): The client to read the account with. An `UltraApiPool` works too.
+        - path (str, optional): The database file. ":memory:" keeps it in memory. Defaults to "ultra_snapshot.db".
+        """
+        self.client = client
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _fetch(self, zone: str) -> List[dict]:
+        """Download every rrset of a zone. Runs on a worker thread."""
+        try:
+            return list(self.client.iter_rrsets(zone, prefetch=False))
+        except requests.HTTPError as e:
+            # A zone without rrsets answers 404
+            if e.response is not None and e.response.status_code == 404:
+                return []
+            raise
+
+    def _write_zone(self, zone: dict, rrsets: List[dict]):
+        """Replace a zone's records in one transaction."""
+        properties = zone["properties"]
+        name = _zone_key(properties["name"])
+        rows = []
+        for rrset in rrsets:
+            owner = _zone_key(rrset["ownerName"])
+            rrtype = _rrtype(rrset["rrtype"])
+            rdata = rrset.get("rdata") or []
+            for value in ([rdata] if isinstance(rdata, str) else rdata):
+                rows.append((name, owner, rrtype, rrset.get("ttl"), value))
+        with self.db:
+            self.db.execute("DELETE FROM records WHERE zone = ?", (name,))
+            self.db.executemany("INSERT INTO records (zone, owner, rrtype, ttl, rdata) VALUES (?, ?, ?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO zones (name, last_modified, record_count, properties, synced_at) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            (name, properties.get("lastModifiedDateTime"), properties.get("resourceRecordCount"),
+                             codec.dumps(properties).decode("utf-8"), time.time()))
+
+    def sync(self, max_workers: int = 8, force: bool = False, params: dict = None) -> dict:
+        """Bring the snapshot up to date with the account.
+
+        Changed zones are downloaded concurrently and written as they arrive, one transaction per zone. A zone that
+        fails to download keeps its old records and is tried again on the next sync. Zones that no longer exist are
+        removed.
+
+        Parameters:
+        - max_workers (int, optional): The number of zones downloaded at once. Defaults to 8.
+        - force (bool, optional): Download every zone, changed or not. Defaults to False.
+        - params (dict, optional): Extra query parameters for listing zones, e.g. {"q": "zone_type:PRIMARY"}. Zones
+          outside the filter aren't removed. Defaults to None.
+
+        Returns:
+        - dict: How many zones were listed, fetched, unchanged and removed, and the errors as (zone, exception) pairs.
+        """
+        known = {row["name"]: (row["last_modified"], row["record_count"])
+                 for row in self.db.execute("SELECT name, last_modified, record_count FROM zones")}
+        listed = set()
+        stale = []
+        for zone in self.client.iter_zones(params=params):
+            properties = zone["properties"]
+            name = _zone_key(properties["name"])
+            listed.add(name)
+            version = (properties.get("lastModifiedDateTime"), properties.get("resourceRecordCount"))
+            if force or known.get(name) != version:
+                stale.append(zone)
+
+        errors: List[Tuple[str, Exception]] = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            queue = iter(stale)
+            pending = {}
+
+            def submit():
+                zone = next(queue, None)
+                if zone is not None:
+                    pending[executor.submit(self._fetch, zone["properties"]["name"])] = zone
+
+            # Keep only a few zones' rrsets in memory at a time; SQLite is written from this thread only
+            for _ in range(max_workers * 2):
+                submit()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    zone = pending.pop(future)
+                    try:
+                        self._write_zone(zone, future.result())
+                    except Exception as e:
+                        errors.append((zone["properties"]["name"], e))
+                    submit()
+
+        removed = [] if params else [name for name in known if name not in listed]
+        if removed:
+            with self.db:
+                self.db.executemany("DELETE FROM records WHERE zone = ?", [(name,) for name in removed])
+                self.db.executemany("DELETE FROM zones WHERE name = ?", [(name,) for name in removed])
+
+        return {
+            "zones": len(listed),
+            "fetched": len(stale) - len(errors),
+            "unchanged": len(listed) - len(stale),
+            "removed": len(removed),
+            "errors": errors
+        }
+
+    def zones(self) -> List[dict]:
+        """List the zones in the snapshot.
+
+        Returns:
+        - List[dict]: The zone properties as the API returned them at the last sync.
+        """
+        return [codec.loads(row["properties"]) for row in self.db.execute("SELECT properties FROM zones ORDER BY name")]
+
+    def rrsets(self, zone: str, owner: str = None, rrtype: str = None) -> List[dict]:
+        """Return a zone's rrsets from the snapshot, shaped like the API's.
+
+        Parameters:
+        - zone (str): The zone name.
+        - owner (str, optional): Only this owner (a FQDN). Defaults to None.
+        - rrtype (str, optional): Only this type. Defaults to None.
+
+        Returns:
+        - List[dict]: ownerName, rrtype, ttl and rdata of each rrset.
+        """
+        sql = "SELECT owner, rrtype, ttl, rdata FROM records WHERE zone = ?"
+        args = [_zone_key(zone)]
+        if owner:
+            sql += " AND owner = ?"
+            args.append(_zone_key(owner))
+        if rrtype:
+            sql += " AND rrtype = ?"
+            args.append(rrtype.upper())
+        rrsets = {}
+        for row in self.db.execute(sql + " ORDER BY owner, rrtype, rowid", args):
+            key = (row["owner"], row["rrtype"])
+            if key not in rrsets:
+                rrsets[key] = {"ownerName": row["owner"], "rrtype": row["rrtype"], "ttl": row["ttl"], "rdata": []}
+            rrsets[key]["rdata"].append(row["rdata"])
+        return list(rrsets.values())
+
+    def find_by_rdata(self, value: str, rrtype: str = None) -> List[dict]:
+        """Find the records with a given rdata value, e.g. every A record pointing at an IP address.
+
+        Parameters:
+        - value (str): The exact rdata value.
+        - rrtype (str, optional): Only this type. Defaults to None.
+
+        Returns:
+        - List[dict]: zone, owner, rrtype, ttl and rdata of each matching record.
+        """
+        return self.query("SELECT zone, owner, rrtype, ttl, rdata FROM records WHERE rdata = ?" +
+                          (" AND rrtype = ?" if rrtype else "") + " ORDER BY zone, owner",
+                          (value, rrtype.upper()) if rrtype else (value,))
+
+    def find_by_owner(self, owner: str, rrtype: str = None) -> List[dict]:
+        """Find the records of an owner name across every zone.
+
+        Parameters:
+        - owner (str): The owner (a FQDN).
+        - rrtype (str, optional): Only this type. Defaults to None.
+
+        Returns:
+        - List[dict]: zone, owner, rrtype, ttl and rdata of each matching record.
+        """
+        return self.query("SELECT zone, owner, rrtype, ttl, rdata FROM records WHERE owner = ?" +
+                          (" AND rrtype = ?" if rrtype else "") + " ORDER BY zone, rrtype",
+                          (_zone_key(owner), rrtype.upper()) if rrtype else (_zone_key(owner),))
+
+    def query(self, sql: str, args: tuple = ()) -> List[dict]:
+        """Run any read query against the snapshot. The tables are `zones` and `records`.
+
+        Parameters:
+        - sql (str): The query.
+        - args (tuple, optional): Its parameters. Defaults to ().
+
+        Returns:
+        - List[dict]: The rows.
+        """
+        return [dict(row) for row in self.db.execute(sql, args)]
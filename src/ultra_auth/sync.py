@@ -0,0 +1,200 @@
+from typing import Iterable, List, Tuple
+
+# Never touched when pruning, since the zone can't exist without them
+PROTECTED_TYPES = ("SOA",)
+
+
+def _fqdn(owner: str, zone: str) -> str:
+    """Turn an owner name into a lowercase FQDN with a trailing dot. Names that don't end in the zone are treated as
+    relative to it, and "@" is the apex."""
+    zone = zone.rstrip(".").lower()
+    owner = owner.strip().lower()
+    if owner in ("@", ""):
+        return f"{zone}."
+    if owner.endswith("."):
+        return owner
+    if owner == zone or owner.endswith(f".{zone}"):
+        return f"{owner}."
+    return f"{owner}.{zone}."
+
+
+def _rrtype(rrtype: str) -> str:
+    """Strip the numeric suffix the API puts on types, e.g. "A (1)" becomes "A"."""
+    return rrtype.split(" ")[0].upper()
+
+
+class Change:
+    """One rrset that needs to be created, updated or deleted."""
+
+    __slots__ = ("action", "owner", "rrtype", "ttl", "rdata", "current")
+
+    def __init__(self, action: str, owner: str, rrtype: str, ttl: int = None, rdata: list = None, current: dict = None):
+        self.action = action
+        self.owner = owner
+        self.rrtype = rrtype
+        self.ttl = ttl
+        self.rdata = rdata
+        self.current = current
+
+    def request(self, zone: str) -> tuple:
+        """Build the (method, uri, payload) tuple that applies this change."""
+        uri = f"/v3/zones/{zone}/rrsets/{self.rrtype}/{self.owner}"
+        if self.action == "delete":
+            return "DELETE", uri
+        payload = {"rdata": self.rdata}
+        if self.ttl is not None:
+            payload["ttl"] = self.ttl
+        return ("POST" if self.action == "create" else "PATCH"), uri, payload
+
+    def as_dict(self) -> dict:
+        return {"action": self.action, "ownerName": self.owner, "rrtype": self.rrtype, "ttl": self.ttl, "rdata": self.rdata}
+
+    def __repr__(self):
+        return f"Change({self.action} {self.rrtype} {self.owner})"
+
+
+class SyncReport:
+    """The outcome of a `ZoneSync` run. In a dry run, `errors` is always empty and nothing was sent."""
+
+    def __init__(self, zone: str, changes: List[Change], unchanged: int, dry_run: bool):
+        self.zone = zone
+        self.changes = changes
+        self.unchanged = unchanged
+        self.dry_run = dry_run
+        self.errors: List[Tuple[Change, Exception]] = []
+
+    def _by_action(self, action: str) -> List[Change]:
+        return [change for change in self.changes if change.action == action]
+
+    @property
+    def creates(self) -> List[Change]:
+        return self._by_action("create")
+
+    @property
+    def updates(self) -> List[Change]:
+        return self._by_action("update")
+
+    @property
+    def deletes(self) -> List[Change]:
+        return self._by_action("delete")
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> dict:
+        """Return the number of rrsets in each outcome.
+
+        Returns:
+        - dict: create, update, delete, unchanged and error counts.
+        """
+        return {
+            "zone": self.zone,
+            "dry_run": self.dry_run,
+            "create": len(self.creates),
+            "update": len(self.updates),
+            "delete": len(self.deletes),
+            "unchanged": self.unchanged,
+            "errors": len(self.errors)
+        }
+
+    def __repr__(self):
+        return f"SyncReport({self.summary()})"
+
+
+class ZoneSync:
+    def __init__(self, client):
+        """Bring the rrsets of a zone in line with a desired state, sending only what differs.
+
+        Parameters:
+        - client (UltraApi): The client to read and write the zone with.
+        """
+        self.client = client
+
+    @staticmethod
+    def _index(rrsets: Iterable[dict], zone: str) -> dict:
+        """Index rrsets by (owner FQDN, type). Later duplicates of a key are merged into the first.
+
+        Parameters:
+        - rrsets (Iterable[dict]): rrsets shaped like the API's, with ownerName, rrtype, ttl and rdata.
+        - zone (str): The zone, for resolving relative owner names.
+
+        Returns:
+        - dict: (owner, type) mapped to {"ttl": ..., "rdata": [...]}.
+        """
+        index = {}
+        for rrset in rrsets:
+            key = (_fqdn(rrset["ownerName"], zone), _rrtype(rrset["rrtype"]))
+            rdata = rrset.get("rdata") or []
+            if isinstance(rdata, str):
+                rdata = [rdata]
+            if key in index:
+                index[key]["rdata"].extend(rdata)
+            else:
+                index[key] = {"ttl": rrset.get("ttl"), "rdata": list(rdata)}
+        return index
+
+    def plan(self, zone: str, desired: Iterable[dict], prune: bool = False) -> SyncReport:
+        """Work out which changes would bring the zone to the desired state. Nothing is written.
+
+        Parameters:
+        - zone (str): The zone name.
+        - desired (Iterable[dict]): The rrsets the zone should have, shaped like the API's (ownerName, rrtype, ttl,
+          rdata). Owner names may be relative to the zone. A missing ttl leaves the current TTL alone.
+        - prune (bool, optional): Whether to delete rrsets that aren't in the desired state. SOA and apex NS records
+          are never pruned. Defaults to False.
+
+        Returns:
+        - SyncReport: The planned changes, as a dry run.
+        """
+        wanted = self._index(desired, zone)
+        current = self._index(self.client.iter_rrsets(zone), zone)
+        apex = _fqdn("@", zone)
+
+        changes = []
+        unchanged = 0
+        for (owner, rrtype), want in wanted.items():
+            have = current.get((owner, rrtype))
+            if have is None:
+                changes.append(Change("create", owner, rrtype, want["ttl"], want["rdata"]))
+            elif sorted(want["rdata"]) != sorted(have["rdata"]) or (want["ttl"] is not None and want["ttl"] != have["ttl"]):
+                changes.append(Change("update", owner, rrtype, want["ttl"], want["rdata"], current=have))
+            else:
+                unchanged += 1
+
+        if prune:
+            for (owner, rrtype), have in current.items():
+                if (owner, rrtype) in wanted or rrtype in PROTECTED_TYPES or (rrtype == "NS" and owner == apex):
+                    continue
+                changes.append(Change("delete", owner, rrtype, have["ttl"], have["rdata"], current=have))
+
+        return SyncReport(zone, changes, unchanged, dry_run=True)
+
+    def apply(self, zone: str, desired: Iterable[dict], prune: bool = False, dry_run: bool = False, max_workers: int = None) -> SyncReport:
+        """Bring the zone to the desired state.
+
+        Deletes go out first, then updates, then creates, so that e.g. an A rrset can be swapped for a CNAME. The
+        changes within each phase are sent concurrently. A failed change doesn't stop the rest; it's recorded in
+        `errors`.
+
+        Parameters:
+        - zone (str): The zone name.
+        - desired (Iterable[dict]): The rrsets the zone should have. See `plan`.
+        - prune (bool, optional): Whether to delete rrsets that aren't in the desired state. Defaults to False.
+        - dry_run (bool, optional): If True, only plan the changes. Defaults to False.
+        - max_workers (int, optional): The number of changes in flight at once. Defaults to the client's default.
+
+        Returns:
+        - SyncReport: What changed.
+        """
+        report = self.plan(zone, desired, prune=prune)
+        if dry_run:
+            return report
+
+        report.dry_run = False
+        for phase in (report.deletes, report.updates, report.creates):
+            if not phase:
+                continue
+            results = self.client.batch([change.request(zone) for change in phase], max_workers=max_workers)
+            report.errors.extend((change, item.error) for change, item in zip(phase, results) if not item.ok)
+        return report
@@ -1,4 +1,52 @@
+import asyncio
+import heapq
+import random
 import time
+from typing import AsyncIterator, Iterable, Iterator, Tuple, Union
+
+# Task codes that mean the task hasn't finished yet
+PENDING_CODES = ("PENDING", "IN_PROCESS")
+
+
+class _PollSchedule:
+    """Tracks when each outstanding task is next due to be polled, backing off exponentially (with jitter) between
+    polls of the same task."""
+
+    def __init__(self, task_ids: Iterable[str], initial_interval: float, max_interval: float, backoff: float, jitter: float):
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        now = time.monotonic()
+        self._heap = [(now, task_id, initial_interval) for task_id in dict.fromkeys(task_ids)]
+        heapq.heapify(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def pending(self) -> list:
+        return [task_id for _, task_id, _ in self._heap]
+
+    def delay(self) -> float:
+        """Seconds until the next task is due."""
+        return max(self._heap[0][0] - time.monotonic(), 0)
+
+    def pop_due(self) -> dict:
+        """Remove and return every task that is due, mapped to its current interval."""
+        now = time.monotonic()
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, task_id, interval = heapq.heappop(self._heap)
+            due[task_id] = interval
+        return due
+
+    def reschedule(self, task_id: str, interval: float):
+        interval = min(interval * self.backoff, self.max_interval)
+        wait = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        heapq.heappush(self._heap, (time.monotonic() + wait, task_id, interval))
+
 
 class TaskHandler:
     def __init__(self, client):
@@ -17,7 +65,7 @@ class TaskHandler:
 
     def wait(self, task_id: str, poll_interval: int = 10) -> dict:
         """Wait for a task to complete. This function will poll the task status every poll_interval seconds until the task
-        is no longer in progress.
+        is no longer pending or in progress.
 
         Args:
         - task_id (str): The task ID.
@@ -28,11 +76,69 @@ class TaskHandler:
         """
         while True:
             task_status = self.check(task_id)
-            if task_status['code'] != 'IN_PROCESS':
+            if task_status['code'] not in PENDING_CODES:
                 break
             time.sleep(poll_interval)
         return task_status
 
+    def wait_many(self, task_ids: Iterable[str], initial_interval: float = 0.5, max_interval: float = 30,
+                  backoff: float = 2.0, jitter: float = 0.2, fetch_result: bool = False, timeout: float = None,
+                  with_ids: bool = False) -> Iterator[Union[dict, Tuple[str, dict]]]:
+        """Wait for many tasks at once, yielding each one as soon as it finishes.
+
+        All tasks share one poll loop. Each task is first polled straight away, then after `initial_interval` seconds,
+        with the interval multiplied by `backoff` (up to `max_interval`) after every poll that finds it still running.
+        Tasks that come due together are polled concurrently when the client supports `batch`.
+
+        Args:
+        - task_ids (Iterable[str]): The task IDs.
+        - initial_interval (float): The first delay between polls of a task. Defaults to 0.5.
+        - max_interval (float): The longest delay between polls of a task. Defaults to 30.
+        - backoff (float): The factor the delay grows by after each poll. Defaults to 2.0.
+        - jitter (float): The fraction each delay is randomly varied by, so tasks don't poll in lockstep. Defaults to 0.2.
+        - fetch_result (bool): If True, the result of every completed task is fetched and stored under "result" in its
+          status. Defaults to False.
+        - timeout (float): The most seconds to wait overall. Defaults to None (no limit).
+        - with_ids (bool): If True, (task ID, status) pairs are yielded, so a status can be matched to its task even if
+          it doesn't say which one it is. Defaults to False.
+
+        Returns:
+        - Iterator[Union[dict, Tuple[str, dict]]]: The final status of each task, in the order they finish.
+
+        Raises:
+        - TimeoutError: If `timeout` passes before every task has finished.
+        """
+        schedule = _PollSchedule(task_ids, initial_interval / backoff, max_interval, backoff, jitter)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while schedule:
+            if deadline is not None and time.monotonic() + schedule.delay() > deadline:
+                raise TimeoutError(f"Tasks still running after {timeout}s: {', '.join(schedule.pending())}")
+            time.sleep(schedule.delay())
+
+            due = schedule.pop_due()
+            for task_id, task_status in zip(due, self._check_many(list(due))):
+                if task_status['code'] in PENDING_CODES:
+                    schedule.reschedule(task_id, due[task_id])
+                    continue
+                if fetch_result and task_status['code'] == 'COMPLETE':
+                    task_status['result'] = self.result(task_id)
+                yield (task_id, task_status) if with_ids else task_status
+
+    def _check_many(self, task_ids: list) -> list:
+        """Check several tasks, concurrently if the client can batch.
+
+        Raises:
+        - Exception: The first error raised while polling.
+        """
+        if len(task_ids) == 1 or not hasattr(self.client, "batch"):
+            return [self.check(task_id) for task_id in task_ids]
+        results = self.client.batch([("GET", f"/tasks/{task_id}") for task_id in task_ids])
+        for item in results:
+            if not item.ok:
+                raise item.error
+        return [item.result for item in results]
+
     def result(self, task_id: str) -> dict:
         """Get the result of a task.
 
@@ -42,4 +148,80 @@ class TaskHandler:
         Returns:
         - dict: The task result.
         """
-        return self.client.get(f"/tasks/{task_id}/result")
\ No newline at end of file
+        return self.client.get(f"/tasks/{task_id}/result")
+
+
+class AsyncTaskHandler:
+    def __init__(self, client):
+        """The asyncio counterpart of `TaskHandler`, for use with `AsyncUltraApi`."""
+        self.client = client
+
+    async def check(self, task_id: str) -> dict:
+        """Check the status of a task.
+
+        Args:
+        - task_id (str): The task ID.
+
+        Returns:
+        - dict: The task status.
+        """
+        return await self.client.get(f"/tasks/{task_id}")
+
+    async def wait(self, task_id: str, poll_interval: int = 10) -> dict:
+        """Wait for a task to complete, polling every poll_interval seconds.
+
+        Args:
+        - task_id (str): The task ID.
+        - poll_interval (int): The number of seconds to wait between polling the task status.
+
+        Returns:
+        - dict: The task status.
+        """
+        while True:
+            task_status = await self.check(task_id)
+            if task_status['code'] not in PENDING_CODES:
+                break
+            await asyncio.sleep(poll_interval)
+        return task_status
+
+    async def wait_many(self, task_ids: Iterable[str], initial_interval: float = 0.5, max_interval: float = 30,
+                        backoff: float = 2.0, jitter: float = 0.2, fetch_result: bool = False, timeout: float = None,
+                        with_ids: bool = False) -> AsyncIterator[Union[dict, Tuple[str, dict]]]:
+        """Wait for many tasks at once, yielding each one as soon as it finishes. See `TaskHandler.wait_many`; tasks that
+        come due together are polled concurrently.
+
+        Returns:
+        - AsyncIterator[Union[dict, Tuple[str, dict]]]: The final status of each task, or (task ID, status) pairs with
+          `with_ids`, in the order they finish.
+
+        Raises:
+        - TimeoutError: If `timeout` passes before every task has finished.
+        """
+        schedule = _PollSchedule(task_ids, initial_interval / backoff, max_interval, backoff, jitter)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while schedule:
+            if deadline is not None and time.monotonic() + schedule.delay() > deadline:
+                raise TimeoutError(f"Tasks still running after {timeout}s: {', '.join(schedule.pending())}")
+            await asyncio.sleep(schedule.delay())
+
+            due = schedule.pop_due()
+            statuses = await asyncio.gather(*(self.check(task_id) for task_id in due))
+            for task_id, task_status in zip(due, statuses):
+                if task_status['code'] in PENDING_CODES:
+                    schedule.reschedule(task_id, due[task_id])
+                    continue
+                if fetch_result and task_status['code'] == 'COMPLETE':
+                    task_status['result'] = await self.result(task_id)
+                yield (task_id, task_status) if with_ids else task_status
+
+    async def result(self, task_id: str) -> dict:
+        """Get the result of a task.
+
+        Args:
+        - task_id (str): The task ID.
+
+        Returns:
+        - dict: The task result.
+        """
+        return await self.client.get(f"/tasks/{task_id}/result")
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+def _default_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ultra_auth", "tokens.json")
+
+
+class TokenStore:
+    def __init__(self, path: str = None):
+        """A token cache on disk, shared by every process that points at the same file.
+
+        The file holds access and refresh tokens keyed by API URL and username, and is readable by its owner only.
+        All reads and writes happen under an exclusive lock on a sibling ".lock" file, so processes starting together
+        wait for one password grant instead of each running their own.
+
+        Parameters:
+        - path (str, optional): The cache file. Defaults to ~/.cache/ultra_auth/tokens.json (honouring XDG_CACHE_HOME).
+        """
+        self.path = path or _default_path()
+        self._lock_path = f"{self.path}.lock"
+
+    @staticmethod
+    def key(base_url: str, username: str) -> str:
+        return f"{base_url}|{username}"
+
+    def _ensure_dir(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    @contextmanager
+    def lock(self):
+        """Hold the exclusive cross-process lock for the duration of the block."""
+        self._ensure_dir()
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            os.close(fd)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A missing or corrupt cache just means starting over
+            return {}
+
+    def _write(self, data: dict):
+        self._ensure_dir()
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), prefix=".tokens-")
+        try:
+            os.chmod(temp_path, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def load(self, key: str) -> Optional[dict]:
+        """Read the tokens stored under a key. Call this while holding `lock`.
+
+        Parameters:
+        - key (str): The key, from `TokenStore.key`.
+
+        Returns:
+        - Optional[dict]: access_token, refresh_token and expires_at (a Unix timestamp, or None), or None if nothing is
+          stored.
+        """
+        return self._read().get(key)
+
+    def save(self, key: str, access_token: str, refresh_token: str, expires_at: float = None):
+        """Store tokens under a key. Call this while holding `lock`.
+
+        Parameters:
+        - key (str): The key, from `TokenStore.key`.
+        - access_token (str): The access token.
+        - refresh_token (str): The refresh token.
+        - expires_at (float, optional): When the access token expires, as a Unix timestamp. Defaults to None.
+        """
+        data = self._read()
+        data[key] = {"access_token": access_token, "refresh_token": refresh_token, "expires_at": expires_at}
+        self._write(data)
+
+    def delete(self, key: str):
+        """Forget the tokens stored under a key.
+
+        Parameters:
+        - key (str): The key, from `TokenStore.key`.
+        """
+        with self.lock():
+            data = self._read()
+            if data.pop(key, None) is not None:
+                self._write(data)
@@ -0,0 +1,337 @@
+import datetime
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, Tuple
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from . import codec
+
+try:
+    import urllib3
+except ImportError:  # pragma: no cover - requests always brings urllib3 along
+    urllib3 = None
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is an optional dependency
+    httpx = None
+
+# How much of a file upload to read at a time when a transport needs an iterator
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class Transport(ABC):
+    """Sends HTTP requests for `UltraApi`.
+
+    Transports take fully built requests (the client adds authentication, content type and user agent) and return
+    objects that behave like `requests.Response`: `status_code`, `headers`, `content`, `text`, `json()`,
+    `raise_for_status()`, `iter_content()`, `close()` and `elapsed`. Errors are raised as `requests` exceptions, so
+    retries, circuit breaking and callers see the same thing whichever transport is in use. Transports must be safe to
+    use from several threads at once. Subclasses must implement `request` and `close`.
+    """
+
+    @abstractmethod
+    def request(self, method: str, url: str, params: dict = None, data=None, headers: dict = None,
+                timeout: Tuple[float, float] = None, stream: bool = False):
+        """Send a request.
+
+        Parameters:
+        - method (str): The HTTP method.
+        - url (str): The full URL.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - data (optional): The body: bytes, str, a file object or an iterator of bytes. Defaults to None.
+        - headers (dict, optional): The request headers. Defaults to None.
+        - timeout (Tuple[float, float], optional): The connect and read timeouts in seconds. Defaults to None.
+        - stream (bool, optional): Whether to leave the body unread until it's accessed. Defaults to False.
+
+        Returns:
+        - The response.
+        """
+
+    @abstractmethod
+    def close(self):
+        """Release every pooled connection."""
+
+
+class RequestsTransport(Transport):
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False, keep_alive: bool = True):
+        """The default transport, a `requests.Session` with a connection pool.
+
+        Parameters:
+        - pool_connections (int, optional): The number of host connection pools to cache. Defaults to 10.
+        - pool_maxsize (int, optional): The maximum number of connections kept per host. Defaults to 10.
+        - pool_block (bool, optional): Whether to block when the pool has no free connections. Defaults to False.
+        - keep_alive (bool, optional): Whether to keep connections open between requests. Defaults to True.
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def request(self, method: str, url: str, params: dict = None, data=None, headers: dict = None,
+                timeout: Tuple[float, float] = None, stream: bool = False) -> requests.Response:
+        return self.session.request(method, url, params=params, data=data, headers=headers, timeout=timeout, stream=stream)
+
+    def close(self):
+        self.session.close()
+
+
+class _Response(ABC):
+    """The parts of `requests.Response` the client relies on, for transports that don't use requests. Subclasses
+    provide the body with `_read` and `_iter`, and `close`."""
+
+    def __init__(self, status_code: int, reason: str, url: str, headers, elapsed: float):
+        self.status_code = status_code
+        self.reason = reason or ""
+        self.url = url
+        self.headers = CaseInsensitiveDict(headers)
+        self.elapsed = datetime.timedelta(seconds=elapsed)
+        self.encoding = "utf-8"
+        self._content = None
+
+    @abstractmethod
+    def _read(self) -> bytes:
+        """Read the whole body."""
+
+    @abstractmethod
+    def _iter(self, chunk_size: int) -> Iterator[bytes]:
+        """Read the body a chunk at a time."""
+
+    @abstractmethod
+    def close(self):
+        """Release the connection."""
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = self._read()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return codec.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+            return
+        yield from self._iter(chunk_size)
+
+    def raise_for_status(self):
+        """Raise `requests.HTTPError` for 4xx and 5xx statuses, with the same message requests uses."""
+        if 400 <= self.status_code < 500:
+            kind = "Client Error"
+        elif 500 <= self.status_code < 600:
+            kind = "Server Error"
+        else:
+            return
+        raise requests.HTTPError(f"{self.status_code} {kind}: {self.reason} for url: {self.url}", response=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _full_url(url: str, params: dict) -> str:
+    if not params:
+        return url
+    # Like requests, leave out parameters set to None
+    query = urlencode([(key, value) for key, value in params.items() if value is not None], doseq=True)
+    if not query:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}{query}"
+
+
+def _file_chunks(f) -> Iterator[bytes]:
+    while True:
+        chunk = f.read(_UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+class _Urllib3Response(_Response):
+    def __init__(self, raw, url: str, elapsed: float):
+        super().__init__(raw.status, raw.reason, url, raw.headers, elapsed)
+        self.raw = raw
+
+    def _read(self) -> bytes:
+        try:
+            return self.raw.read(decode_content=True)
+        except urllib3.exceptions.HTTPError as e:
+            raise _requests_error(e) from e
+        finally:
+            self.raw.release_conn()
+
+    def _iter(self, chunk_size: int) -> Iterator[bytes]:
+        try:
+            for chunk in self.raw.stream(chunk_size, decode_content=True):
+                if chunk:
+                    yield chunk
+        except urllib3.exceptions.HTTPError as e:
+            raise _requests_error(e) from e
+        finally:
+            self.raw.release_conn()
+
+    def close(self):
+        self.raw.close()
+        self.raw.release_conn()
+
+
+def _requests_error(error: Exception) -> requests.RequestException:
+    """Translate a urllib3 exception into the requests exception requests itself would raise."""
+    exceptions = urllib3.exceptions
+    if isinstance(error, exceptions.MaxRetryError) and error.reason is not None:
+        error = error.reason
+    if isinstance(error, exceptions.ConnectTimeoutError):
+        return requests.ConnectTimeout(error)
+    if isinstance(error, exceptions.ReadTimeoutError):
+        return requests.ReadTimeout(error)
+    if isinstance(error, exceptions.SSLError):
+        return requests.exceptions.SSLError(error)
+    if isinstance(error, exceptions.ProxyError):
+        return requests.exceptions.ProxyError(error)
+    if isinstance(error, (exceptions.NewConnectionError, exceptions.ProtocolError)):
+        return requests.ConnectionError(error)
+    if isinstance(error, exceptions.DecodeError):
+        return requests.exceptions.ContentDecodingError(error)
+    return requests.ConnectionError(error)
+
+
+class Urllib3Transport(Transport):
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False, keep_alive: bool = True):
+        """A lean transport straight on a urllib3 connection pool. It skips the request preparation, cookie handling,
+        hooks and adapter lookups requests does on every call, which adds up in tight loops. Redirects aren't followed
+        and there's no proxy support from the environment.
+
+        Parameters:
+        - pool_connections (int, optional): The number of host connection pools to cache. Defaults to 10.
+        - pool_maxsize (int, optional): The maximum number of connections kept per host. Defaults to 10.
+        - pool_block (bool, optional): Whether to block when the pool has no free connections. Defaults to False.
+        - keep_alive (bool, optional): Whether to keep connections open between requests. Defaults to True.
+
+        Raises:
+        - ImportError: If urllib3 isn't installed.
+        """
+        if urllib3 is None:
+            raise ImportError("Urllib3Transport requires urllib3.")
+        self.pool = urllib3.PoolManager(num_pools=pool_connections, maxsize=pool_maxsize, block=pool_block)
+        # Sent with every request; the client's headers are layered on top
+        self.base_headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive" if keep_alive else "close"}
+
+    def request(self, method: str, url: str, params: dict = None, data=None, headers: dict = None,
+                timeout: Tuple[float, float] = None, stream: bool = False) -> _Urllib3Response:
+        url = _full_url(url, params)
+        request_headers = dict(self.base_headers, **headers) if headers else self.base_headers
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        elif data is not None and hasattr(data, "read") and not isinstance(data, (bytes, bytearray)):
+            data = _file_chunks(data)
+        chunked = data is not None and not isinstance(data, (bytes, bytearray))
+
+        start = time.perf_counter()
+        try:
+            raw = self.pool.request(method, url, body=data, headers=request_headers, chunked=chunked,
+                                    timeout=urllib3.Timeout(connect=timeout[0], read=timeout[1]) if timeout else None,
+                                    retries=False, redirect=False, preload_content=False, decode_content=True)
+        except urllib3.exceptions.HTTPError as e:
+            raise _requests_error(e) from e
+        resp = _Urllib3Response(raw, url, time.perf_counter() - start)
+        if not stream:
+            # Read the body now, so the connection goes straight back to the pool
+            resp._content = resp._read()
+        return resp
+
+    def close(self):
+        self.pool.clear()
+
+
+class _HttpxResponse(_Response):
+    def __init__(self, raw, elapsed: float):
+        super().__init__(raw.status_code, raw.reason_phrase, str(raw.url), raw.headers, elapsed)
+        self.raw = raw
+
+    def _read(self) -> bytes:
+        try:
+            return self.raw.read()
+        except httpx.HTTPError as e:
+            raise _httpx_error(e) from e
+        finally:
+            self.raw.close()
+
+    def _iter(self, chunk_size: int) -> Iterator[bytes]:
+        try:
+            yield from self.raw.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise _httpx_error(e) from e
+        finally:
+            self.raw.close()
+
+    def close(self):
+        self.raw.close()
+
+
+def _httpx_error(error: Exception) -> requests.RequestException:
+    """Translate an httpx exception into the closest requests exception."""
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(error)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.ReadTimeout(error)
+    if isinstance(error, httpx.DecodingError):
+        return requests.exceptions.ContentDecodingError(error)
+    return requests.ConnectionError(error)
+
+
+class Http2Transport(Transport):
+    def __init__(self, pool_maxsize: int = 10, keep_alive: bool = True):
+        """A transport that speaks HTTP/2 where the server supports it, multiplexing concurrent requests over a single
+        connection instead of opening one per request. Needs httpx with HTTP/2 support (`pip install ultra_auth[http2]`).
+
+        Parameters:
+        - pool_maxsize (int, optional): The maximum number of connections kept. Defaults to 10.
+        - keep_alive (bool, optional): Whether to keep connections open between requests. Defaults to True.
+
+        Raises:
+        - ImportError: If httpx (or h2) isn't installed.
+        """
+        if httpx is None:
+            raise ImportError("Http2Transport requires httpx. Install it with `pip install ultra_auth[http2]`.")
+        limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize if keep_alive else 0)
+        self.client = httpx.Client(http2=True, limits=limits, follow_redirects=False)
+
+    def request(self, method: str, url: str, params: dict = None, data=None, headers: dict = None,
+                timeout: Tuple[float, float] = None, stream: bool = False) -> _HttpxResponse:
+        if data is not None and hasattr(data, "read") and not isinstance(data, (bytes, bytearray, str)):
+            data = _file_chunks(data)
+        params = {key: value for key, value in params.items() if value is not None} if params else None
+        request = self.client.build_request(method, url, params=params, content=data, headers=headers,
+                                            timeout=httpx.Timeout(timeout[1], connect=timeout[0]) if timeout else None)
+        start = time.perf_counter()
+        try:
+            raw = self.client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise _httpx_error(e) from e
+        resp = _HttpxResponse(raw, time.perf_counter() - start)
+        if not stream:
+            # Read the body now, so the connection goes straight back to the pool
+            resp._content = resp._read()
+        return resp
+
+    def close(self):
+        self.client.close()
@@ -1,10 +1,33 @@
 import requests
 import json
-from typing import Union
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import IO, Callable, Iterable, Iterator, List, Tuple, Union
+from urllib.parse import urlencode
+from . import codec
 from .about import get_client_user_agent
+from .cache import ResponseCache
+from .metrics import Metrics, endpoint_template
+from .exports import DEFAULT_CHUNK_SIZE, write_chunks
+from .batch import BatchResult, iter_batch, run_batch
+from .pagination import iter_items
+from .ratelimit import RateLimiter, parse_retry_after
+from .resilience import CircuitBreaker, LatencyTracker, RetryPolicy
+from .tokens import TokenStore
+from .transport import RequestsTransport, Transport
+from .uploads import UploadBody, gzip_bytes, is_stream
 
 class UltraApi:
-    def __init__(self, bu: str, pr: str = None, use_token: bool = False, debug: bool = False, pprint: bool = False, user_agent: str = None):
+    def __init__(self, bu: str, pr: str = None, use_token: bool = False, debug: bool = False, pprint: bool = False, user_agent: str = None,
+                 pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False, keep_alive: bool = True,
+                 base_url: str = "https://api.ultradns.com", refresh_margin: int = 60, background_refresh: bool = False,
+                 rate_limit: float = None, rate_burst: int = None, adaptive_rate_limit: bool = True, throttle_retries: int = 3,
+                 cache: ResponseCache = None, metrics: Metrics = None, token_store: TokenStore = None,
+                 connect_timeout: float = 10, read_timeout: float = 120, hedge_after: Union[float, str] = None,
+                 circuit_breaker: CircuitBreaker = None, retry_policy: RetryPolicy = None,
+                 compress_threshold: int = None, compress_level: int = 6, accept_encoding: str = "gzip, deflate",
+                 transport: Transport = None):
         """Initialize the client.
 
         Parameters:
@@ -14,16 +37,88 @@ class UltraApi:
         - debug (bool, optional): If True, prints debug information. Defaults to False.
         - pprint (bool, optional): If True, prints JSON responses in a more human-readable format. Defaults to False.
         - user_agent (str, optional): The user agent to use. Defaults to None.
+        - pool_connections (int, optional): The number of host connection pools to cache. Defaults to 10.
+        - pool_maxsize (int, optional): The maximum number of connections kept per host. Defaults to 10.
+        - pool_block (bool, optional): If True, callers wait for a free connection when the pool is exhausted instead of
+          opening a throwaway one. Defaults to False.
+        - keep_alive (bool, optional): If False, connections are closed after every request. Defaults to True.
+          The four pool settings configure the default transport, and are ignored when `transport` is given.
+        - base_url (str, optional): The API root. Defaults to "https://api.ultradns.com".
+        - refresh_margin (int, optional): How many seconds before the access token expires the client refreshes it.
+          Defaults to 60.
+        - background_refresh (bool, optional): If True, a daemon timer refreshes the token ahead of expiry even while
+          the client is idle. Otherwise it's refreshed by the first call that finds it about to expire. Defaults to False.
+        - rate_limit (float, optional): The maximum number of requests per second across all threads using the client.
+          Defaults to None (no limit).
+        - rate_burst (int, optional): How many requests may go out back to back before `rate_limit` applies. Defaults
+          to the rate limit.
+        - adaptive_rate_limit (bool, optional): If True, the rate limit is lowered after a 429 and recovers gradually.
+          Defaults to True.
+        - throttle_retries (int, optional): How many times a request is retried after a 429, waiting for Retry-After
+          (or an exponential backoff) each time. Defaults to 3.
+        - cache (ResponseCache, optional): A cache for GET responses. Writes to a zone invalidate its entries. Defaults
+          to None (no caching).
+        - metrics (Metrics, optional): Where to record per-endpoint request counts and latencies. Defaults to None.
+        - token_store (TokenStore, optional): An on-disk token cache shared between processes. When authenticating
+          with a username, a cached token is reused instead of running the password grant, and refreshed tokens are
+          shared. Defaults to None.
+        - connect_timeout (float, optional): Seconds to wait for a connection. Defaults to 10.
+        - read_timeout (float, optional): Seconds to wait for the server between bytes of the response. Defaults to 120.
+        - hedge_after (Union[float, str], optional): For GET requests, send a duplicate if no response has arrived after
+          this many seconds, and use whichever comes back first. Pass a percentile such as "p95" to use that percentile
+          of recently observed GET latencies. Defaults to None (no hedging).
+        - circuit_breaker (CircuitBreaker, optional): Fails requests fast while the API keeps returning 5xx errors or
+          dropping connections. Defaults to None.
+        - retry_policy (RetryPolicy, optional): How to retry connection errors, timeouts and 502/503/504 responses.
+          Defaults to RetryPolicy(), which makes up to 3 attempts for GET, PUT and DELETE. Pass
+          RetryPolicy(max_attempts=1) to turn retries off.
+        - compress_threshold (int, optional): Gzip request bodies of at least this many bytes, and all streamed uploads.
+          Only enable this for endpoints that accept compressed bodies. Defaults to None (never compress).
+        - compress_level (int, optional): The gzip level, 1 (fastest) to 9 (smallest). Defaults to 6.
+        - accept_encoding (str, optional): The Accept-Encoding header, i.e. which response compressions to ask for.
+          Defaults to "gzip, deflate".
+        - transport (Transport, optional): What sends the requests, e.g. `Urllib3Transport` or `Http2Transport`.
+          Defaults to a `RequestsTransport` built from the pool settings.
 
         Raises:
         - ValueError: If `pr` is not provided when `use_token` is True.
         """
-        self.base_url = "https://api.ultradns.com"
+        self.base_url = base_url.rstrip("/")
         self.access_token = str()
         self.refresh_token = str()
         self.debug = debug
         self.pprint = pprint
         self.user_agent = user_agent
+        self.pool_maxsize = pool_maxsize
+        self.transport = transport or RequestsTransport(pool_connections, pool_maxsize, pool_block, keep_alive)
+        # The requests session, when the transport has one
+        self.session = getattr(self.transport, "session", None)
+        self._base_headers = None
+        self._base_headers_key = None
+        self.token_expires_at = None
+        self._refresh_at = None
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+        self._token_lock = threading.Lock()
+        self._refresh_timer = None
+        self.rate_limiter = RateLimiter(rate_limit, rate_burst, adaptive=adaptive_rate_limit) if rate_limit else None
+        self.throttle_retries = throttle_retries
+        self.cache = cache
+        self.metrics = metrics
+        self.hooks = {"before": [], "after": []}
+        self.token_store = token_store
+        self._token_key = None
+        self.timeout = (connect_timeout, read_timeout)
+        self.hedge_after = hedge_after
+        self.circuit_breaker = circuit_breaker
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self.accept_encoding = accept_encoding
+        self._latencies = LatencyTracker() if isinstance(hedge_after, str) else None
+        self._hedge_executor = None
+        # Not the token lock: a refresh holds that for a whole round trip, and hedging shouldn't wait on it
+        self._hedge_lock = threading.Lock()
 
         if use_token:
             self.access_token = bu
@@ -34,7 +129,27 @@ class UltraApi:
         else:
             if not pr:
                 raise ValueError("Password is required when providing a username.")
-            self._auth(bu, pr)
+            if token_store is not None:
+                self._token_key = TokenStore.key(self.base_url, bu)
+                self._auth_from_store(bu, pr)
+            else:
+                self._auth(bu, pr)
+
+    def close(self):
+        """Close the transport and release every pooled connection. This also stops the background refresh timer."""
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self._hedge_executor:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def _auth(self, username: str, password: str):
         """Authenticate using username and password.
@@ -50,31 +165,164 @@ class UltraApi:
             "username": username,
             "password": password
         }
-        resp = requests.post(f"{self.base_url}/authorization/token", data=payload)
+        resp = self._token_request(payload)
         resp.raise_for_status()
-        self.access_token = resp.json().get('accessToken')
-        self.refresh_token = resp.json().get('refreshToken')
+        self._store_tokens(codec.loads(resp.content))
+
+    def _token_request(self, payload: dict):
+        """Post a grant to the token endpoint.
+
+        Parameters:
+        - payload (dict): The form body of the grant.
+
+        Returns:
+        - The response.
+        """
+        headers = {"Content-Type": "application/x-www-form-urlencoded", "User-Agent": self.user_agent or get_client_user_agent()}
+        return self.transport.request("POST", f"{self.base_url}/authorization/token", data=urlencode(payload),
+                                      headers=headers, timeout=self.timeout)
+
+    def _auth_from_store(self, username: str, password: str):
+        """Authenticate using the token store. A cached access token is used as-is if it's still good. Otherwise the
+        cached refresh token is tried, and the password grant is the last resort. The store stays locked throughout,
+        so processes starting together wait for one grant instead of each running their own.
+
+        Raises:
+        - Exception: If the status is an error.
+        """
+        with self.token_store.lock():
+            cached = self.token_store.load(self._token_key)
+            if cached:
+                self._adopt_tokens(cached)
+                if not self._token_expiring():
+                    return
+                try:
+                    self._grant_refresh()
+                    return
+                except requests.RequestException:
+                    pass
+            self._auth(username, password)
 
-    def _refresh(self):
+    def _adopt_tokens(self, cached: dict):
+        """Use tokens read from the token store.
+
+        Parameters:
+        - cached (dict): The stored entry.
+        """
+        expires_at = cached.get("expires_at")
+        expires_in = expires_at - time.time() if expires_at is not None else None
+        self._set_tokens(cached.get("access_token"), cached.get("refresh_token"), expires_in, persist=False)
+
+    def _grant_refresh(self):
+        """Exchange the refresh token for new tokens.
+
+        Raises:
+        - Exception: If the status is an error.
+        """
+        payload = {
+            "grant_type": "refresh_token",
+            "refresh_token": self.refresh_token
+        }
+        resp = self._token_request(payload)
+        resp.raise_for_status()
+        self._store_tokens(codec.loads(resp.content))
+
+    def _refresh(self, stale_token: str = None):
         """Refresh the access token using the refresh token.
 
+        Only one refresh runs at a time. Callers that pass the access token they were using wait for any refresh
+        already in flight and, if it replaced their token, return without spending the refresh token again.
+
+        Parameters:
+        - stale_token (str, optional): The access token the caller found to be expired. Defaults to None, which always
+          refreshes.
+
         Raises:
         - Exception: If the refresh token is not set.
+        """
+        with self._token_lock:
+            if stale_token is not None and stale_token != self.access_token:
+                # Another thread already refreshed while this one was waiting on the lock
+                return
+            if not self.refresh_token:
+                raise Exception("Error: Your token cannot be refreshed.")
+            if self._token_key is None:
+                self._grant_refresh()
+                return
+            with self.token_store.lock():
+                cached = self.token_store.load(self._token_key)
+                if cached and cached.get("access_token") != (stale_token or self.access_token) and \
+                        (cached.get("expires_at") is None or cached["expires_at"] > time.time()):
+                    # Another process refreshed already
+                    self._adopt_tokens(cached)
+                    return
+                if cached and cached.get("refresh_token"):
+                    # Refresh tokens are single use, so take the newest one any process has seen
+                    self.refresh_token = cached["refresh_token"]
+                self._grant_refresh()
 
-        Returns:
-        - dict: The response body.
+    def _store_tokens(self, body: dict):
+        """Store the tokens from a grant response and work out when the access token expires.
+
+        Parameters:
+        - body (dict): The token endpoint response body.
         """
-        if self.refresh_token:
-            payload = {
-                "grant_type": "refresh_token",
-                "refresh_token": self.refresh_token
-            }
-            resp = requests.post(f"{self.base_url}/authorization/token", data=payload)
-            resp.raise_for_status()
-            self.access_token = resp.json().get('accessToken')
-            self.refresh_token = resp.json().get('refreshToken')
+        # expiresIn comes back as a string of seconds
+        expires_in = body.get('expiresIn')
+        self._set_tokens(body.get('accessToken'), body.get('refreshToken'), int(expires_in) if expires_in else None)
+
+    def _set_tokens(self, access_token: str, refresh_token: str, expires_in: float = None, persist: bool = True):
+        """Switch to new tokens.
+
+        Parameters:
+        - access_token (str): The access token.
+        - refresh_token (str): The refresh token.
+        - expires_in (float, optional): Seconds until the access token expires, if known. Defaults to None.
+        - persist (bool, optional): Whether to write the tokens to the token store. Defaults to True.
+        """
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        if expires_in is not None:
+            # Never refresh more than halfway through a token's life, or short-lived tokens would refresh on every call
+            self.token_expires_at = time.monotonic() + expires_in
+            self._refresh_at = self.token_expires_at - min(self.refresh_margin, max(expires_in, 0) / 2)
         else:
-            raise Exception("Error: Your token cannot be refreshed.")
+            self.token_expires_at = self._refresh_at = None
+        if persist and self._token_key is not None:
+            self.token_store.save(self._token_key, access_token, refresh_token,
+                                  time.time() + expires_in if expires_in is not None else None)
+        if self.background_refresh:
+            self._schedule_refresh()
+
+    def _token_expiring(self) -> bool:
+        """Check whether the access token is within `refresh_margin` seconds of expiring.
+
+        Returns:
+        - bool: True if the token should be refreshed before it's used.
+        """
+        if self._refresh_at is None or not self.refresh_token:
+            return False
+        return time.monotonic() >= self._refresh_at
+
+    def _schedule_refresh(self):
+        """(Re)start the daemon timer that refreshes the token `refresh_margin` seconds before it expires."""
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self._refresh_at is None or not self.refresh_token:
+            return
+        delay = max(self._refresh_at - time.monotonic(), 0)
+        self._refresh_timer = threading.Timer(delay, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        """Timer callback. Failures are left for the next call to deal with, since that will refresh on demand."""
+        try:
+            self._refresh(stale_token=self.access_token)
+        except Exception as e:
+            if self.debug:
+                print(f"Background token refresh failed: {e}")
 
     def _headers(self, content_type: str = None) -> dict:
         """Generate request headers.
@@ -85,20 +333,54 @@ class UltraApi:
         Returns:
         - dict: The request headers.
         """
-        headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {self.access_token}"
-        }
+        # The base headers only change with the token or settings, so they're built once and copied per request
+        key = (self.access_token, self.user_agent, self.accept_encoding)
+        if key != self._base_headers_key:
+            base = {
+                "Accept": "application/json",
+                "Authorization": f"Bearer {self.access_token}"
+            }
+            if self.accept_encoding:
+                base["Accept-Encoding"] = self.accept_encoding
 
-        if self.user_agent:
-            headers["User-Agent"] = self.user_agent
-        else:
-            headers["User-Agent"] = get_client_user_agent()
+            if self.user_agent:
+                base["User-Agent"] = self.user_agent
+            else:
+                base["User-Agent"] = get_client_user_agent()
+            self._base_headers, self._base_headers_key = base, key
+        headers = dict(self._base_headers)
 
         if content_type:
             headers["Content-Type"] = content_type
         return headers
 
+    def add_hook(self, event: str, hook: Callable[[dict], None]):
+        """Register a callback that runs around every API request.
+
+        Both kinds of hook get a dict with the method, uri, endpoint template and params. "after" hooks also get the
+        status (None if no response arrived), elapsed and ttfb in seconds, the number of retries and token refreshes,
+        and the error raised, if any. Hooks run on the calling thread, so keep them quick.
+
+        Parameters:
+        - event (str): "before" or "after".
+        - hook (Callable[[dict], None]): The callback.
+
+        Raises:
+        - ValueError: If the event is unknown.
+        """
+        if event not in self.hooks:
+            raise ValueError(f"Unknown hook event '{event}'. Use 'before' or 'after'.")
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event: str, hook: Callable[[dict], None]):
+        """Unregister a callback added with `add_hook`.
+
+        Parameters:
+        - event (str): "before" or "after".
+        - hook (Callable[[dict], None]): The callback.
+        """
+        self.hooks[event].remove(hook)
+
     def toggle_debug(self):
         """Toggle debug mode. When this is enabled, the client will print verbose request information."""
         if self.debug:
@@ -131,59 +413,145 @@ class UltraApi:
         print(f"User agent set to '{user_agent}'")
         self.user_agent = user_agent
 
-    def post(self, uri: str, payload: str = None, plain_text: bool = False) -> Union[dict, str, bytes]:
+    def post(self, uri: str, payload: str = None, plain_text: bool = False, idempotent: bool = False) -> Union[dict, str, bytes]:
         """Make a POST request.
 
         Parameters:
         - uri (str): The URI to call.
-        - payload (str, optional): The payload to send. Defaults to None.
+        - payload (str, optional): The payload to send. An open file or an iterator of chunks is streamed rather than
+          read into memory. Defaults to None.
+        - idempotent (bool, optional): Whether the request is safe to send again after a transient failure, so the
+          retry policy may retry it. Defaults to False.
 
         Returns:
         - Union[dict, str, bytes]: The response body.
         """
-        return self._call(uri, "POST", payload=payload, plain_text=plain_text)
+        return self._call(uri, "POST", payload=payload, plain_text=plain_text, idempotent=idempotent or None)
 
     def put(self, uri: str, payload: str, plain_text: bool = False) -> Union[dict, str, bytes]:
         """Make a PUT request.
 
         Parameters:
         - uri (str): The URI to call.
-        - payload (string): The payload to send.
+        - payload (string): The payload to send. An open file or an iterator of chunks is streamed rather than read
+          into memory.
 
         Returns:
         - Union[dict, str, bytes]: The response body.
         """
         return self._call(uri, "PUT", payload=payload, plain_text=plain_text)
 
-    def patch(self, uri: str, payload: str, plain_text: bool = False) -> Union[dict, str, bytes]:
+    def patch(self, uri: str, payload: str, plain_text: bool = False, idempotent: bool = False) -> Union[dict, str, bytes]:
         """Make a PATCH request.
 
         Parameters:
         - uri (str): The URI to call.
-        - payload (string): The payload to send.
+        - payload (string): The payload to send. An open file or an iterator of chunks is streamed rather than read
+          into memory.
+        - idempotent (bool, optional): Whether the request is safe to send again after a transient failure, so the
+          retry policy may retry it. Defaults to False.
 
         Returns:
         - Union[dict, str, bytes]: The response body.
         """
-        return self._call(uri, "PATCH", payload=payload, plain_text=plain_text)
+        return self._call(uri, "PATCH", payload=payload, plain_text=plain_text, idempotent=idempotent or None)
 
-    def get(self, uri: str, params: dict = {}, content_type: str = None) -> Union[dict, str, bytes]:
+    def get(self, uri: str, params: dict = {}, content_type: str = None, stream_to: Union[str, IO[bytes]] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE, raw: bool = False) -> Union[dict, str, bytes]:
         """Make a GET request.
 
         Parameters:
         - uri (str): The URI to call.
         - params (dict, optional): Query parameters. Defaults to {}.
         - content_type (str, optional): The content type of the request. Defaults to None.
+        - stream_to (Union[str, IO[bytes]], optional): A path or binary file to write the response body to, in chunks,
+          instead of returning it. Useful for zone exports. Defaults to None.
+        - chunk_size (int, optional): The chunk size used with `stream_to`. Defaults to 1 MiB.
+        - raw (bool, optional): Return the response body as bytes, without decoding it. Raw responses bypass the cache.
+          Defaults to False.
 
         Returns:
-        - Union[dict, str, bytes]: The response body.
+        - Union[dict, str, bytes]: The response body. With `stream_to`, a dict with the status code, content type and
+          number of bytes written.
         """
+        if stream_to is not None:
+            return self._stream_to(uri, params, content_type or "application/json", stream_to, chunk_size)
+        if raw:
+            return self._call(uri, "GET", params=params, content_type=content_type or "application/json", raw=True)
+
         # GET requests should always be x-www-form-urlencoded, but the UDNS endpoints inexplicably require "application/json"
+        if self.cache is not None:
+            return self._cached_get(uri, params, content_type or "application/json")
         if content_type:
             return self._call(uri, "GET", params=params, content_type=content_type)
         else:
             return self._call(uri, "GET", params=params)
 
+    def stream(self, uri: str, params: dict = None, content_type: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Make a GET request and yield the response body in chunks as it arrives, without buffering it.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - content_type (str, optional): The content type of the request. Defaults to None.
+        - chunk_size (int, optional): The most bytes yielded at once. Defaults to 1 MiB.
+
+        Returns:
+        - Iterator[bytes]: The body.
+
+        Raises:
+        - requests.HTTPError: If the status is an error.
+        """
+        resp = self._request(uri, "GET", params=params, content_type=content_type or "application/json", stream=True)
+        with resp:
+            if resp.status_code >= 400:
+                self._parse_response(resp)
+            yield from resp.iter_content(chunk_size=chunk_size)
+
+    def _stream_to(self, uri: str, params: dict, content_type: str, dest: Union[str, IO[bytes]], chunk_size: int) -> dict:
+        """Write the body of a GET request to a path or file, one chunk at a time.
+
+        Returns:
+        - dict: The status code, content type and number of bytes written.
+        """
+        resp = self._request(uri, "GET", params=params, content_type=content_type, stream=True)
+        with resp:
+            if resp.status_code >= 400:
+                self._parse_response(resp)
+            written = write_chunks(resp.iter_content(chunk_size=chunk_size), dest)
+            return {"status_code": resp.status_code, "content_type": resp.headers.get('Content-Type'), "bytes": written}
+
+    def _cached_get(self, uri: str, params: dict, content_type: str) -> Union[dict, str, bytes]:
+        """Serve a GET from the cache, revalidating stale entries with a conditional request when they have an ETag or
+        Last-Modified date.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - params (dict): Query parameters.
+        - content_type (str): The content type of the request.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        key = self.cache.key(uri, params, content_type)
+        entry = self.cache.lookup(key)
+        if entry is not None and self.cache.fresh(entry):
+            return self.cache.value(entry)
+
+        # Taken before sending, so a write that lands while this GET is in flight keeps its response out of the cache
+        generation = self.cache.generation(uri)
+
+        resp = self._request(uri, "GET", params=params, content_type=content_type,
+                             headers=entry.validators() if entry is not None else None)
+        if resp.status_code == requests.codes.NOT_MODIFIED and entry is not None:
+            entry = self.cache.revalidated(key) or entry
+            return self.cache.value(entry)
+
+        value = self._parse_response(resp)
+        if resp.status_code == requests.codes.OK:
+            self.cache.store(key, value, resp.headers.get('ETag'), resp.headers.get('Last-Modified'), generation=generation)
+        return value
+
     def delete(self, uri: str, content_type: str = None) -> Union[dict, str, bytes]:
         """Make a DELETE request.
 
@@ -200,7 +568,280 @@ class UltraApi:
         else:
             return self._call(uri, "DELETE")
 
-    def _call(self, uri: str, method: str, params: dict = None, payload: dict = None, retry: bool = True, content_type: str = "application/json", plain_text: bool = False) -> Union[dict, str, bytes]:
+    def batch(self, requests: Iterable[Tuple], max_workers: int = None) -> List[BatchResult]:
+        """Run many requests concurrently over the shared connection pool.
+
+        Each request is a (method, uri) or (method, uri, payload) tuple. For GET requests the payload is the query
+        parameters. A failing request doesn't stop the batch; its exception is stored on its result instead.
+
+        Parameters:
+        - requests (Iterable[Tuple]): The requests to run.
+        - max_workers (int, optional): The number of requests in flight at once. Defaults to `pool_maxsize`.
+
+        Returns:
+        - List[BatchResult]: One result per request, in the order they were given.
+        """
+        return run_batch(self, requests, max_workers=max_workers or self.pool_maxsize)
+
+    def batch_iter(self, requests: Iterable[Tuple], max_workers: int = None) -> Iterator[BatchResult]:
+        """Like `batch`, but yields results as they complete. Use `BatchResult.index` to match them to requests.
+
+        Parameters:
+        - requests (Iterable[Tuple]): The requests to run.
+        - max_workers (int, optional): The number of requests in flight at once. Defaults to `pool_maxsize`.
+
+        Returns:
+        - Iterator[BatchResult]: One result per request, in completion order.
+        """
+        return iter_batch(self, requests, max_workers=max_workers or self.pool_maxsize)
+
+    def iter_zones(self, params: dict = None, limit: int = 1000, prefetch: bool = True) -> Iterator[dict]:
+        """Iterate over every zone visible to the account, following the cursor of /v3/zones.
+
+        Parameters:
+        - params (dict, optional): Extra query parameters, e.g. {"q": "zone_type:PRIMARY"}. Defaults to None.
+        - limit (int, optional): The page size. Defaults to 1000.
+        - prefetch (bool, optional): Whether to fetch the next page while the current one is consumed. Defaults to True.
+
+        Returns:
+        - Iterator[dict]: The zones, one at a time.
+        """
+        return iter_items(self, "/v3/zones", "zones", params=dict(params or {}, limit=limit), prefetch=prefetch)
+
+    def iter_rrsets(self, zone: str, rrtype: str = None, owner: str = None, params: dict = None, limit: int = 1000, prefetch: bool = True) -> Iterator[dict]:
+        """Iterate over the rrsets of a zone, following the offset paging of /v3/zones/{zone}/rrsets.
+
+        Parameters:
+        - zone (str): The zone name.
+        - rrtype (str, optional): Only return rrsets of this type. Defaults to None.
+        - owner (str, optional): Only return rrsets with this owner name. Requires `rrtype`. Defaults to None.
+        - params (dict, optional): Extra query parameters. Defaults to None.
+        - limit (int, optional): The page size. Defaults to 1000.
+        - prefetch (bool, optional): Whether to fetch the next page while the current one is consumed. Defaults to True.
+
+        Returns:
+        - Iterator[dict]: The rrsets, one at a time.
+
+        Raises:
+        - ValueError: If `owner` is given without `rrtype`.
+        """
+        uri = f"/v3/zones/{zone}/rrsets"
+        if owner and not rrtype:
+            raise ValueError("An rrtype is required when filtering by owner.")
+        if rrtype:
+            uri += f"/{rrtype}"
+        if owner:
+            uri += f"/{owner}"
+        return iter_items(self, uri, "rrSets", params=dict(params or {}, limit=limit), prefetch=prefetch)
+
+    def _send(self, uri: str, method: str, params: dict = None, payload: dict = None, content_type: str = "application/json", plain_text: bool = False, headers: dict = None, stream: bool = False, trace: dict = None, idempotent: bool = None) -> requests.Response:
+        """Send a request through the rate limiter. Throttled (429) responses are retried up to `throttle_retries`
+        times, honouring the Retry-After header. Transient failures are retried as the retry policy allows.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - method (str): The HTTP method to use.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - payload (dict, optional): The payload to send. Defaults to None.
+        - content_type (str, optional): The content type of the request. Defaults to "application/json".
+        - plain_text (bool, optional): Whether to send the payload as-is instead of encoding it as JSON.
+        - headers (dict, optional): Extra request headers. Defaults to None.
+        - stream (bool, optional): Whether to leave the body unread so it can be streamed. Defaults to False.
+        - trace (dict, optional): Counters for the request's metrics, updated in place. Defaults to None.
+        - idempotent (bool, optional): Overrides whether the retry policy treats the request as safe to repeat.
+          Defaults to None (decided by the method).
+
+        Returns:
+        - requests.Response: The last response received.
+        """
+        # Encode once, up front, so retries resend the same bytes
+        body, body_headers = self._encode_body(payload, plain_text)
+        replayable = not isinstance(body, UploadBody) or body.replayable
+
+        policy = self.retry_policy
+        retryable = replayable and policy.allows(method, idempotent)
+        attempt = 0
+        failures = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            # While uncommon, when dealing with records that have / characters in the name, you need to use a unicode string
+            # representation of that character. This is a hacky way to do that. First, dump the json payload to a string,
+            # then use the replace method to replace instances of "/" with "\u002F". If you load it back into a dict, it
+            # reinterprets the unicode as the literal character. Instead, you need to use the "data" parameter of the
+            # requests module and send it as a string. There may be other cases where this is necessary, but I haven't
+            # encountered them yet. By default, this is disabled and the payload is sent as a dict.
+            request_headers = self._headers(content_type)
+            if headers:
+                request_headers.update(headers)
+            if body_headers:
+                request_headers.update(body_headers)
+            if body is not None and not plain_text and "Content-Type" not in request_headers:
+                request_headers["Content-Type"] = "application/json"
+            try:
+                data = body.data() if isinstance(body, UploadBody) else body
+                resp = self._transmit(method, uri, params=params, data=data, headers=request_headers, stream=stream)
+            except policy.exceptions as e:
+                failures += 1
+                if not retryable or failures >= policy.max_attempts:
+                    raise
+                self._retry_after_failure(method, uri, failures, repr(e), trace)
+                continue
+
+            if resp.status_code in policy.statuses and retryable and failures + 1 < policy.max_attempts:
+                failures += 1
+                resp.close()
+                self._retry_after_failure(method, uri, failures, resp.status_code, trace)
+                continue
+
+            if resp.status_code != requests.codes.TOO_MANY_REQUESTS:
+                if self.rate_limiter:
+                    self.rate_limiter.succeeded()
+                return resp
+
+            retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+            if self.rate_limiter:
+                self.rate_limiter.throttled(retry_after)
+            if attempt >= self.throttle_retries or not replayable:
+                return resp
+
+            delay = retry_after if retry_after is not None else min(2 ** attempt, 60)
+            if self.debug:
+                print(f"Throttled on {method} {uri}, retrying in {delay:.2f}s")
+            resp.close()
+            time.sleep(delay)
+            attempt += 1
+            if trace is not None:
+                trace["retries"] += 1
+
+    def _encode_body(self, payload, plain_text: bool) -> Tuple[Union[bytes, str, UploadBody, None], dict]:
+        """Encode a request payload, compressing it if it's large enough.
+
+        Parameters:
+        - payload: The payload: a JSON-serialisable value, a string or bytes (with `plain_text`), an open file or an
+          iterator of chunks.
+        - plain_text (bool): Whether to send the payload as-is instead of encoding it as JSON.
+
+        Returns:
+        - Tuple[Union[bytes, str, UploadBody, None], dict]: The body, and any headers it needs.
+        """
+        if payload is None:
+            return None, {}
+        if isinstance(payload, UploadBody):
+            return payload, {"Content-Encoding": "gzip"} if payload.compress else {}
+        if is_stream(payload):
+            body = UploadBody(payload, compress=self.compress_threshold is not None, level=self.compress_level)
+            return self._encode_body(body, plain_text)
+
+        body = payload if plain_text else codec.dumps(payload)
+        if self.compress_threshold is not None and isinstance(body, (str, bytes)) and len(body) >= self.compress_threshold:
+            raw = body.encode("utf-8") if isinstance(body, str) else body
+            return gzip_bytes(raw, self.compress_level), {"Content-Encoding": "gzip"}
+        return body, {}
+
+    def _retry_after_failure(self, method: str, uri: str, failures: int, reason, trace: dict):
+        """Wait out the retry policy's backoff before resending a request that failed transiently."""
+        delay = self.retry_policy.delay(failures)
+        if self.debug:
+            print(f"{method} {uri} failed ({reason}), retrying in {delay:.2f}s")
+        time.sleep(delay)
+        if trace is not None:
+            trace["retries"] += 1
+
+    def _transmit(self, method: str, uri: str, **kwargs) -> requests.Response:
+        """Put one request on the wire, through the circuit breaker and, for GETs, hedging.
+
+        Parameters:
+        - method (str): The HTTP method to use.
+        - uri (str): The URI to call.
+        - kwargs: Passed on to `Transport.request`.
+
+        Returns:
+        - requests.Response: The response.
+
+        Raises:
+        - CircuitOpenError: If the circuit breaker is open.
+        """
+        if self.circuit_breaker:
+            self.circuit_breaker.before_request()
+
+        start = time.perf_counter()
+        try:
+            delay = self._hedge_delay() if method == "GET" else None
+            if delay is not None:
+                resp = self._hedged_request(method, uri, delay, **kwargs)
+            else:
+                resp = self.transport.request(method, self.base_url+uri, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            if self.circuit_breaker:
+                self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # Not the API's doing (a bug, an interrupt, an error the transport didn't map), but a half-open trial
+            # must not be left in flight, or the circuit would never let another request through
+            if self.circuit_breaker:
+                self.circuit_breaker.release_trial()
+            raise
+
+        if self.circuit_breaker:
+            if resp.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+        if self._latencies is not None and method == "GET":
+            self._latencies.observe(time.perf_counter() - start)
+        return resp
+
+    def _hedge_delay(self):
+        """Work out how long to wait before hedging a GET.
+
+        Returns:
+        - Optional[float]: The delay in seconds, or None to send a single request.
+        """
+        if self.hedge_after is None:
+            return None
+        if self._latencies is None:
+            return float(self.hedge_after)
+        # e.g. "p95"; until enough latencies have been seen, don't hedge
+        return self._latencies.percentile(float(self.hedge_after.lstrip("pP")) / 100)
+
+    def _hedged_request(self, method: str, uri: str, delay: float, **kwargs) -> requests.Response:
+        """Send a request, and a duplicate if the first hasn't answered within `delay` seconds. The first response
+        wins; the other one is closed when it arrives.
+
+        Returns:
+        - requests.Response: The winning response.
+        """
+        if self._hedge_executor is None:
+            with self._hedge_lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(max_workers=self.pool_maxsize * 2, thread_name_prefix="ultra-hedge")
+
+        def send():
+            return self.transport.request(method, self.base_url+uri, timeout=self.timeout, **kwargs)
+
+        primary = self._hedge_executor.submit(send)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        pending = {primary, self._hedge_executor.submit(send)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    resp = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(_close_response)
+                return resp
+        raise error
+
+    def _call(self, uri: str, method: str, params: dict = None, payload: dict = None, retry: bool = True, content_type: str = "application/json", plain_text: bool = False, idempotent: bool = None, raw: bool = False) -> Union[dict, str, bytes]:
         """Make an API call.
 
         Parameters:
@@ -210,40 +851,136 @@ class UltraApi:
         - payload (dict, optional): The payload to send. Defaults to None.
         - retry (bool, optional): Whether to retry the request if the access token has expired. Defaults to True.
         - content_type (str, optional): The content type of the request. Defaults to "application/json".
+        - idempotent (bool, optional): Overrides whether the retry policy treats the request as safe to repeat.
+          Defaults to None (decided by the method).
+        - raw (bool, optional): Return the response body as bytes, without decoding it. Defaults to False.
 
         Returns:
         - Union[dict, str, bytes]: The response body.
         """
-        # Debugging
-        if self.debug:
-            debug_info ={
-                "headers": self._headers(content_type),
-                "method": method,
-                "url": self.base_url+uri,
-                "params": params,
-                "payload": payload,
-                "payload_type": type(payload).__name__,
-                "retry": retry,
-                "access_token": self.access_token,
-                "refresh_token": self.refresh_token
-            }
-            print(f"Debug info: {json.dumps(debug_info, indent=4)}")
-
-        # While uncommon, when dealing with records that have / characters in the name, you need to use a unicode string
-        # representation of that character. This is a hacky way to do that. First, dump the json payload to a string,
-        # then use the replace method to replace instances of "/" with "\u002F". If you load it back into a dict, it
-        # reinterprets the unicode as the literal character. Instead, you need to use the "data" parameter of the
-        # requests module and send it as a string. There may be other cases where this is necessary, but I haven't
-        # encountered them yet. By default, this is disabled and the payload is sent as a dict.
-        if plain_text:
-            resp = requests.request(method, self.base_url+uri, params=params, data=payload, headers=self._headers(content_type))
-        else:
-            resp = requests.request(method, self.base_url+uri, params=params, json=payload, headers=self._headers(content_type))
+        try:
+            resp = self._request(uri, method, params=params, payload=payload, retry=retry, content_type=content_type, plain_text=plain_text, idempotent=idempotent)
+        finally:
+            if self.cache is not None and method != "GET":
+                # Even a failed write may have partly applied, so drop anything it could have changed
+                self.cache.invalidate_for_write(uri)
+        return self._parse_response(resp, raw=raw)
+
+    def _request(self, uri: str, method: str, params: dict = None, payload: dict = None, retry: bool = True, content_type: str = "application/json", plain_text: bool = False, headers: dict = None, stream: bool = False, idempotent: bool = None) -> requests.Response:
+        """Send an API call, refreshing the access token ahead of expiry or after a 401.
+
+        Parameters:
+        - uri (str): The URI to call.
+        - method (str): The HTTP method to use.
+        - params (dict, optional): Query parameters. Defaults to None.
+        - payload (dict, optional): The payload to send. Defaults to None.
+        - retry (bool, optional): Whether to retry the request if the access token has expired. Defaults to True.
+        - content_type (str, optional): The content type of the request. Defaults to "application/json".
+        - headers (dict, optional): Extra request headers. Defaults to None.
+        - stream (bool, optional): Whether to leave the body unread so it can be streamed. Defaults to False.
+        - idempotent (bool, optional): Overrides whether the retry policy treats the request as safe to repeat.
+          Defaults to None (decided by the method).
+
+        Returns:
+        - requests.Response: The response.
+        """
+        if self.metrics is None and not self.hooks["before"] and not self.hooks["after"]:
+            return self._authorized_send(uri, method, params, payload, retry, content_type, plain_text, headers, stream, None, idempotent)
+
+        info = {"method": method, "uri": uri, "endpoint": endpoint_template(uri), "params": params}
+        for hook in self.hooks["before"]:
+            hook(info)
+
+        trace = {"retries": 0, "refreshes": 0}
+        resp = None
+        error = None
+        start = time.perf_counter()
+        try:
+            resp = self._authorized_send(uri, method, params, payload, retry, content_type, plain_text, headers, stream, trace, idempotent)
+            return resp
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            status = resp.status_code if resp is not None else None
+            # requests measures up to the point the response headers were parsed
+            ttfb = resp.elapsed.total_seconds() if resp is not None else None
+            if self.metrics is not None:
+                self.metrics.record(method, info["endpoint"], status if status is not None else "error", elapsed, ttfb,
+                                    trace["retries"], trace["refreshes"])
+            if self.hooks["after"]:
+                info.update(status=status, elapsed=elapsed, ttfb=ttfb, error=error, **trace)
+                for hook in self.hooks["after"]:
+                    hook(info)
+
+    def _authorized_send(self, uri: str, method: str, params: dict, payload: dict, retry: bool, content_type: str, plain_text: bool, headers: dict, stream: bool, trace: dict, idempotent: bool = None) -> requests.Response:
+        """Send a request with a valid access token: refresh it ahead of expiry, and once more after a 401.
+
+        Returns:
+        - requests.Response: The response.
+        """
+        # Wrap streamed uploads once, so a resend after a 401 can rewind them
+        if is_stream(payload):
+            payload = UploadBody(payload, compress=self.compress_threshold is not None, level=self.compress_level)
+
+        # Refresh ahead of expiry rather than waiting to be rejected
+        if self._token_expiring():
+            self._refresh(stale_token=self.access_token)
+            if trace is not None:
+                trace["refreshes"] += 1
+
+        while True:
+            token = self.access_token
+
+            # Debugging
+            if self.debug:
+                debug_info ={
+                    "headers": self._headers(content_type),
+                    "method": method,
+                    "url": self.base_url+uri,
+                    "params": params,
+                    "payload": payload,
+                    "payload_type": type(payload).__name__,
+                    "retry": retry,
+                    "access_token": self.access_token,
+                    "refresh_token": self.refresh_token
+                }
+                print(f"Debug info: {json.dumps(debug_info, indent=4, default=repr)}")
+
+            resp = self._send(uri, method, params=params, payload=payload, content_type=content_type, plain_text=plain_text, headers=headers, stream=stream, trace=trace, idempotent=idempotent)
+
+            if resp.status_code != 401 or not retry:
+                return resp
+            if isinstance(payload, UploadBody) and not payload.replayable:
+                # The upload is gone; report the 401 rather than send an empty body
+                return resp
+
+            # Refresh the token if it expired, then try again
+            resp.close()
+            self._refresh(stale_token=token)
+            retry = False
+            if trace is not None:
+                trace["refreshes"] += 1
+
+    def _parse_response(self, resp: requests.Response, raw: bool = False) -> Union[dict, str, bytes]:
+        """Turn a response into the value returned to the caller, based on its status and content type.
+
+        Parameters:
+        - resp (requests.Response): The response.
+        - raw (bool, optional): Return the body as bytes, only raising for error statuses. Defaults to False.
+
+        Returns:
+        - Union[dict, str, bytes]: The response body.
+        """
+        if raw:
+            self._raise_for_status(resp)
+            return resp.content
 
         if resp.status_code == requests.codes.NO_CONTENT:
             # DELETE requests and a few other things return no response body
             if self.pprint:
-                return json.dumps({"status_code": resp.status_code, "message": "No content"}, indent=4)
+                return codec.dumps_pretty({"status_code": resp.status_code, "message": "No content"})
             else:
                 return {'status_code': resp.status_code, 'message': 'No content'}
 
@@ -263,19 +1000,30 @@ class UltraApi:
             # If there's a task ID in the header, add it to the JSON so the result can be retrieved
             response_data = {}
             if resp.content:  # Check if the response content is not empty
-                response_data = resp.json()
+                response_data = codec.loads(resp.content)
             if 'X-Task-Id' in resp.headers:  # Check if the header is present
                 response_data.update({"task_id": resp.headers['X-Task-Id']})
             if 'Location' in resp.headers:
                 response_data.update({"location": resp.headers['Location']})
             return response_data
 
-        if resp.status_code == 401 and retry:
-            # Refresh the token if it expired, then try again
-            self._refresh()
-            return self._call(uri, method, params=params, payload=payload, retry=False, content_type=content_type, plain_text=plain_text)
+        self._raise_for_status(resp)
+
+        # Everything else should be JSON (hopefully). Decode it once, straight from the bytes
+        if resp.content:  # Check if the response content is not empty
+            if self.pprint:
+                return codec.dumps_pretty(codec.loads(resp.content))
+            else:
+                return codec.loads(resp.content)
+        else:
+            return None  # or an appropriate default value or message
+
+    def _raise_for_status(self, resp: requests.Response):
+        """Raise any error statuses. Since the UDNS API also produces a response body in most cases, print that too.
 
-        # Raise any error statuses. Since the UDNS API also produces a response body in most cases, print that too
+        Raises:
+        - requests.HTTPError: If the status is an error.
+        """
         try:
             resp.raise_for_status()
         except Exception as e:
@@ -283,11 +1031,8 @@ class UltraApi:
                 print(f"Message: {resp.text}")
             raise
 
-        # Everything else should be JSON (hopefully)
-        if resp.content:  # Check if the response content is not empty
-            if self.pprint:
-                return json.dumps(resp.json(), indent=4)
-            else:
-                return resp.json()
-        else:
-            return None  # or an appropriate default value or message
+
+def _close_response(future):
+    """Done-callback that releases the connection of a hedged request that lost the race."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
@@ -0,0 +1,120 @@
+import gzip
+import io
+import zlib
+from typing import IO, Iterable, Iterator, Union
+
+# Small enough to keep an upload's footprint flat, large enough that the compressor has something to work with
+DEFAULT_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def is_stream(payload) -> bool:
+    """Whether a payload should be streamed rather than encoded in memory: an open file or an iterator of chunks.
+
+    Parameters:
+    - payload: The payload.
+
+    Returns:
+    - bool: True for file objects and iterators (including generators).
+    """
+    if isinstance(payload, (str, bytes, bytearray, dict, list, tuple)):
+        return False
+    return hasattr(payload, "read") or isinstance(payload, Iterator)
+
+
+def gzip_bytes(data: bytes, level: int = 6) -> bytes:
+    """Compress a request body that's already in memory.
+
+    Parameters:
+    - data (bytes): The body.
+    - level (int, optional): The compression level, 1 (fastest) to 9 (smallest). Defaults to 6.
+
+    Returns:
+    - bytes: The gzip-compressed body.
+    """
+    return gzip.compress(data, compresslevel=level)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a stream of chunks into a gzip stream, one chunk at a time.
+
+    Parameters:
+    - chunks (Iterable[bytes]): The data.
+    - level (int, optional): The compression level, 1 (fastest) to 9 (smallest). Defaults to 6.
+
+    Returns:
+    - Iterator[bytes]: The compressed data. Chunks the compressor buffers internally aren't yielded as empty bytes.
+    """
+    # wbits=31 selects the gzip container rather than a bare zlib stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _read_chunks(f: IO, chunk_size: int) -> Iterator[bytes]:
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def _encoded(chunks: Iterable[Union[bytes, str]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        if chunk:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+
+class UploadBody:
+    def __init__(self, source: Union[IO, Iterable[Union[bytes, str]]], compress: bool = False, level: int = 6,
+                 chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE):
+        """A request body read from a file or an iterator while it's being sent, so it never has to fit in memory.
+
+        Files opened in binary mode and sent uncompressed go out with a Content-Length. Anything else is sent with
+        chunked transfer encoding. Text is encoded as UTF-8.
+
+        Parameters:
+        - source (Union[IO, Iterable[Union[bytes, str]]]): An open file, or an iterator of chunks.
+        - compress (bool, optional): Whether to gzip the body on the fly. Defaults to False.
+        - level (int, optional): The compression level. Defaults to 6.
+        - chunk_size (int, optional): How much of a file to read at a time. Defaults to 64 KiB.
+        """
+        self.source = source
+        self.compress = compress
+        self.level = level
+        self.chunk_size = chunk_size
+        self._start = None
+        self._sent = False
+        if hasattr(source, "seek"):
+            try:
+                if source.seekable():
+                    self._start = source.tell()
+            except (AttributeError, OSError, ValueError):
+                pass
+
+    @property
+    def replayable(self) -> bool:
+        """Whether the body can be sent again, e.g. after a retryable failure. Only seekable files can be."""
+        return self._start is not None
+
+    def data(self) -> Union[IO[bytes], Iterator[bytes]]:
+        """Return the body to hand to requests, rewinding it first if it has been sent before.
+
+        Raises:
+        - ValueError: If the body has already been sent and can't be rewound.
+        """
+        if self._sent:
+            if not self.replayable:
+                raise ValueError("The upload has already been consumed and can't be sent again.")
+            self.source.seek(self._start)
+        self._sent = True
+
+        if hasattr(self.source, "read"):
+            if not self.compress and not isinstance(self.source, io.TextIOBase):
+                return self.source
+            chunks = _read_chunks(self.source, self.chunk_size)
+        else:
+            chunks = _encoded(self.source)
+        return gzip_chunks(chunks, self.level) if self.compress else chunks
@@ -0,0 +1,413 @@
+import io
+import os
+import re
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterable, Iterator, List, Tuple, Union
+
+CLASSES = ("IN", "CH", "HS", "CS")
+
+_TTL_PATTERN = re.compile(r"^(?:\d+[smhdw]?)+$", re.IGNORECASE)
+_TTL_PART = re.compile(r"(\d+)([smhdw]?)", re.IGNORECASE)
+_TTL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+# A quoted string (escapes included), a comment, a parenthesis, or a run of anything else
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|;.*|[()]|[^\s"();]+')
+_SPECIAL = frozenset('"();')
+_ESCAPE = re.compile(r"\\(\d{3}|.)")
+# Which rdata fields of each type are domain names, and so are relative to the origin when they don't end in a dot
+NAME_FIELDS = {
+    "CNAME": (0,), "DNAME": (0,), "NS": (0,), "PTR": (0,), "MX": (1,), "SRV": (3,), "SOA": (0, 1), "RP": (0, 1),
+    "AFSDB": (1,), "NAPTR": (5,), "SVCB": (1,), "HTTPS": (1,)
+}
+TEXT_TYPES = ("TXT", "SPF")
+
+
+class Record:
+    """One resource record. Owner names, types and classes are interned, so a zone's worth of records shares them."""
+
+    __slots__ = ("owner", "ttl", "rrclass", "rrtype", "rdata")
+
+    def __init__(self, owner: str, ttl: int, rrclass: str, rrtype: str, rdata: str):
+        self.owner = sys.intern(owner)
+        self.ttl = ttl
+        self.rrclass = sys.intern(rrclass)
+        self.rrtype = sys.intern(rrtype)
+        self.rdata = rdata
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return (self.owner, self.ttl, self.rrclass, self.rrtype, self.rdata) == \
+               (other.owner, other.ttl, other.rrclass, other.rrtype, other.rdata)
+
+    def __hash__(self):
+        return hash((self.owner, self.ttl, self.rrclass, self.rrtype, self.rdata))
+
+    def __getstate__(self):
+        return (self.owner, self.ttl, self.rrclass, self.rrtype, self.rdata)
+
+    def __setstate__(self, state):
+        # Re-intern after crossing a process boundary
+        self.__init__(*state)
+
+    def __repr__(self):
+        return f"Record({self.owner} {self.ttl} {self.rrclass} {self.rrtype} {self.rdata})"
+
+
+class ZoneRecords:
+    """The records of one zone, stored column by column. Much smaller than a list of `Record` objects, and cheap to
+    send between processes. Iterating yields `Record` objects."""
+
+    __slots__ = ("owners", "ttls", "classes", "types", "rdata")
+
+    def __init__(self):
+        self.owners = []
+        self.ttls = []
+        self.classes = []
+        self.types = []
+        self.rdata = []
+
+    def append(self, owner: str, ttl: int, rrclass: str, rrtype: str, rdata: str):
+        self.owners.append(sys.intern(owner))
+        self.ttls.append(ttl)
+        self.classes.append(sys.intern(rrclass))
+        self.types.append(sys.intern(rrtype))
+        self.rdata.append(rdata)
+
+    def rows(self) -> Iterator[Tuple[str, int, str, str, str]]:
+        """Iterate over (owner, ttl, class, type, rdata) tuples, without building `Record` objects."""
+        return zip(self.owners, self.ttls, self.classes, self.types, self.rdata)
+
+    def __len__(self):
+        return len(self.owners)
+
+    def __getitem__(self, index: int) -> Record:
+        return Record(self.owners[index], self.ttls[index], self.classes[index], self.types[index], self.rdata[index])
+
+    def __iter__(self) -> Iterator[Record]:
+        for row in self.rows():
+            yield Record(*row)
+
+    def __repr__(self):
+        return f"ZoneRecords({len(self)} records)"
+
+
+def parse_ttl(value: str) -> int:
+    """Parse a TTL, in seconds or with BIND units such as "1h30m".
+
+    Parameters:
+    - value (str): The TTL.
+
+    Returns:
+    - int: The TTL in seconds.
+
+    Raises:
+    - ValueError: If it isn't a TTL.
+    """
+    if not _TTL_PATTERN.match(value):
+        raise ValueError(f"Invalid TTL '{value}'")
+    return sum(int(number) * _TTL_UNITS[unit.lower()] for number, unit in _TTL_PART.findall(value))
+
+
+def _absolute(name: str, origin: str) -> str:
+    if name == "@":
+        if origin is None:
+            raise ValueError("'@' used before an $ORIGIN was set")
+        return origin
+    name = name.lower()
+    if name.endswith("."):
+        return name
+    if origin is None:
+        return name
+    return f"{name}.{origin}" if origin != "." else f"{name}."
+
+
+def _qualify(name: str, origin: str) -> str:
+    """Make a domain name from rdata fully qualified, like `_absolute`, but leave it alone if there's no origin."""
+    if name == "@":
+        return origin or name
+    name = name.lower()
+    if name.endswith(".") or origin is None:
+        return name
+    return f"{name}.{origin}" if origin != "." else f"{name}."
+
+
+def _unescape(match) -> str:
+    value = match.group(1)
+    return chr(int(value)) if len(value) == 3 else value
+
+
+def unquote_txt(rdata: str) -> str:
+    """Turn TXT rdata as written in a zone file into the API's form, which is the text itself, unquoted and unescaped.
+
+    Quoted strings written next to each other are joined without a separator, since that's how values longer than 255
+    bytes are split across character strings. Unquoted words are separate strings and keep a space between them, so
+    `TXT hello world` reads "hello world".
+
+    Parameters:
+    - rdata (str): The rdata, e.g. '"v=spf1 include:example.net" " -all"'.
+
+    Returns:
+    - str: The text, e.g. 'v=spf1 include:example.net -all'.
+    """
+    text = []
+    previous_quoted = False
+    for token in _TOKEN.findall(rdata):
+        quoted = token[0] == '"'
+        if text and not (quoted and previous_quoted):
+            text.append(" ")
+        text.append(_ESCAPE.sub(_unescape, token[1:-1] if quoted else token))
+        previous_quoted = quoted
+    return "".join(text)
+
+
+def _lines(source: Union[str, IO, Iterable[str]]) -> Iterator[str]:
+    if isinstance(source, str):
+        yield from source.splitlines()
+        return
+    for line in source:
+        yield line.decode("utf-8") if isinstance(line, bytes) else line
+
+
+def _entries(source: Union[str, IO, Iterable[str]]) -> Iterator[Tuple[bool, List[str]]]:
+    """Split zone file text into logical entries, joining lines held together by parentheses and dropping comments.
+
+    Returns:
+    - Iterator[Tuple[bool, List[str]]]: Whether the entry started with whitespace (and so reuses the previous owner),
+      and its tokens.
+    """
+    tokens = []
+    indented = False
+    depth = 0
+    for line in _lines(source):
+        if depth == 0:
+            indented = line[:1] in (" ", "\t")
+        if _SPECIAL.isdisjoint(line):
+            # The common case, no quotes, comments or parentheses
+            tokens.extend(line.split())
+        else:
+            for token in _TOKEN.findall(line):
+                if token == "(":
+                    depth += 1
+                elif token == ")":
+                    depth -= 1
+                elif token[0] != ";":
+                    tokens.append(token)
+        if depth == 0 and tokens:
+            yield indented, tokens
+            tokens = []
+    if depth:
+        raise ValueError("Unbalanced parentheses at the end of the zone file")
+    if tokens:
+        yield indented, tokens
+
+
+def parse_zone(source: Union[str, IO, Iterable[str]], origin: str = None, default_ttl: int = None) -> Iterator[Record]:
+    """Parse a zone file in BIND format, one record at a time.
+
+    $ORIGIN, $TTL, comments, parentheses, quoted strings, relative names, blank owners (the previous owner) and TTLs with
+    units are understood. $INCLUDE and $GENERATE are not. Owner names come out lower-cased and fully qualified, and so
+    do the domain names in the rdata of the types in `NAME_FIELDS` (CNAME and MX targets, for instance). Otherwise rdata
+    is kept as written, with whitespace between fields collapsed. Without an origin, relative names stay relative.
+
+    Parameters:
+    - source (Union[str, IO, Iterable[str]]): The zone file text, an open file, or an iterable of lines.
+    - origin (str, optional): The origin relative names are resolved against, until an $ORIGIN changes it. Defaults to
+      None.
+    - default_ttl (int, optional): The TTL of records that don't give one, until a $TTL changes it. Defaults to None
+      (the last TTL seen, as BIND did before $TTL existed).
+
+    Returns:
+    - Iterator[Record]: The records, in file order.
+
+    Raises:
+    - ValueError: If the file can't be parsed.
+    """
+    for row in _parse(source, origin, default_ttl):
+        yield Record(*row)
+
+
+def parse_zone_records(source: Union[str, IO, Iterable[str]], origin: str = None, default_ttl: int = None) -> ZoneRecords:
+    """Parse a whole zone file into columns. See `parse_zone` for what's understood.
+
+    Parameters:
+    - source (Union[str, IO, Iterable[str]]): The zone file text, an open file, or an iterable of lines.
+    - origin (str, optional): The initial origin. Defaults to None.
+    - default_ttl (int, optional): The initial default TTL. Defaults to None.
+
+    Returns:
+    - ZoneRecords: The records.
+
+    Raises:
+    - ValueError: If the file can't be parsed.
+    """
+    records = ZoneRecords()
+    for row in _parse(source, origin, default_ttl):
+        records.append(*row)
+    return records
+
+
+def _parse(source: Union[str, IO, Iterable[str]], origin: str, default_ttl: int) -> Iterator[Tuple[str, int, str, str, str]]:
+    origin = _absolute(origin, ".") if origin else None
+    ttl = default_ttl
+    last_ttl = default_ttl
+    owner = None
+    for indented, tokens in _entries(source):
+        first = tokens[0]
+        if first[0] == "$":
+            directive = first.upper()
+            if directive == "$ORIGIN":
+                origin = _absolute(tokens[1], origin or ".")
+            elif directive == "$TTL":
+                ttl = parse_ttl(tokens[1])
+            else:
+                raise ValueError(f"Unsupported directive {first}")
+            continue
+
+        if not indented:
+            owner = _absolute(first, origin)
+            tokens = tokens[1:]
+        elif owner is None:
+            raise ValueError("The first record has no owner name")
+
+        record_ttl = None
+        rrclass = "IN"
+        index = 0
+        # The TTL and class come in either order, and both are optional
+        while index < len(tokens) - 1:
+            token = tokens[index]
+            if record_ttl is None and token[0].isdigit() and _TTL_PATTERN.match(token):
+                record_ttl = parse_ttl(token)
+            elif token.upper() in CLASSES:
+                rrclass = token.upper()
+            else:
+                break
+            index += 1
+        if index >= len(tokens):
+            raise ValueError(f"No record type for {owner}")
+
+        if record_ttl is None:
+            record_ttl = ttl if ttl is not None else last_ttl
+        last_ttl = record_ttl
+        rrtype = tokens[index].upper()
+        fields = tokens[index + 1:]
+        name_fields = NAME_FIELDS.get(rrtype)
+        if name_fields:
+            # Relative names in rdata are relative to the $ORIGIN in effect here, so they're resolved now
+            for field in name_fields:
+                if field < len(fields):
+                    fields[field] = _qualify(fields[field], origin)
+        yield owner, record_ttl, rrclass, rrtype, " ".join(fields)
+
+
+def _parse_member(path: str, name: str, encoding: str) -> Tuple[str, ZoneRecords]:
+    """Parse one member of an archive. Runs in a worker process, which reads the member from disk itself."""
+    with zipfile.ZipFile(path) as archive, archive.open(name) as member:
+        return name, parse_zone_records(io.TextIOWrapper(member, encoding=encoding))
+
+
+def iter_zip_zones(path: Union[str, os.PathLike], max_workers: int = None, encoding: str = "utf-8") -> Iterator[Tuple[str, ZoneRecords]]:
+    """Parse every zone file in an export archive, spread across worker processes.
+
+    Workers read their members straight from the archive, so only the parsed records travel between processes. Zones
+    come back in archive order, and at most two per worker are held at once.
+
+    Parameters:
+    - path (Union[str, os.PathLike]): The archive.
+    - max_workers (int, optional): The number of worker processes. Defaults to the number of CPUs. With 1, everything is
+      parsed in this process.
+    - encoding (str, optional): The encoding of the zone files. Defaults to "utf-8".
+
+    Returns:
+    - Iterator[Tuple[str, ZoneRecords]]: (member name, records) pairs, one zone at a time.
+    """
+    path = os.fspath(path)
+    with zipfile.ZipFile(path) as archive:
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        for name in names:
+            yield _parse_member(path, name, encoding)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        try:
+            for name in names:
+                pending.append(executor.submit(_parse_member, path, name, encoding))
+                if len(pending) >= max_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def zone_apex(records: Union[ZoneRecords, Iterable[Record]]) -> str:
+    """Find the name of the zone that records belong to, from its SOA record.
+
+    Parameters:
+    - records (Union[ZoneRecords, Iterable[Record]]): The records of one zone.
+
+    Returns:
+    - str: The owner of the SOA record.
+
+    Raises:
+    - ValueError: If there's no SOA record.
+    """
+    if isinstance(records, ZoneRecords):
+        if "SOA" in records.types:
+            return records.owners[records.types.index("SOA")]
+    else:
+        for record in records:
+            if record.rrtype == "SOA":
+                return record.owner
+    raise ValueError("No SOA record, so the zone apex isn't known")
+
+
+def to_rrsets(records: Union[ZoneRecords, Iterable[Record]], types: Iterable[str] = None) -> List[dict]:
+    """Group records into rrsets shaped like the API's, ready for `ZoneSync` or an rrset payload.
+
+    Rdata is put in the form the API returns, so it compares equal to what's already there: TXT and SPF values are
+    unquoted (see `unquote_txt`), and domain names must be fully qualified, which `parse_zone` does when it knows the
+    origin.
+
+    Parameters:
+    - records (Union[ZoneRecords, Iterable[Record]]): The records.
+    - types (Iterable[str], optional): Only include these types. Defaults to all of them.
+
+    Returns:
+    - List[dict]: One {"ownerName", "rrtype", "ttl", "rdata"} dict per owner and type, in the order first seen. The TTL
+      is the lowest of the records.
+
+    Raises:
+    - ValueError: If a domain name in the rdata is still relative, because the zone was parsed without an origin.
+    """
+    if isinstance(records, ZoneRecords):
+        rows = records.rows()
+    else:
+        rows = ((record.owner, record.ttl, record.rrclass, record.rrtype, record.rdata) for record in records)
+    wanted = {rrtype.upper() for rrtype in types} if types is not None else None
+    rrsets = {}
+    for owner, ttl, _, rrtype, rdata in rows:
+        if wanted is not None and rrtype not in wanted:
+            continue
+        if rrtype in TEXT_TYPES:
+            rdata = unquote_txt(rdata)
+        elif rrtype in NAME_FIELDS:
+            fields = rdata.split()
+            for field in NAME_FIELDS[rrtype]:
+                if field < len(fields) and not fields[field].endswith("."):
+                    raise ValueError(f"{owner} {rrtype} has the relative name '{fields[field]}' in its rdata. "
+                                     f"Parse the zone with an origin so it can be qualified.")
+        rrset = rrsets.get((owner, rrtype))
+        if rrset is None:
+            rrsets[(owner, rrtype)] = {"ownerName": owner, "rrtype": rrtype, "ttl": ttl, "rdata": [rdata]}
+        else:
+            rrset["rdata"].append(rdata)
+            if ttl is not None and (rrset["ttl"] is None or ttl < rrset["ttl"]):
+                rrset["ttl"] = ttl
+    return list(rrsets.values())
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Run against the source tree, with the mock server from benchmarks/, whether or not the package is installed
+for path in (os.path.join(ROOT, "src"), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks.mock_server import MockConfig, MockServer  # noqa: E402
+from ultra_auth import UltraApi  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    """A mock UltraDNS API with three zones of five A rrsets each."""
+    with MockServer(MockConfig()) as srv:
+        srv.state.seed(3, 5)
+        yield srv
+
+
+@pytest.fixture
+def client(server):
+    with UltraApi("user", "pass", base_url=server.url) as api:
+        yield api
+
+
+@pytest.fixture
+def make_server():
+    """Start mock servers with non-default behaviour, e.g. `make_server(rate_limit=5)`. They're stopped afterwards."""
+    servers = []
+
+    def start(zones: int = 3, rrsets: int = 5, **config) -> MockServer:
+        srv = MockServer(MockConfig(**config)).start()
+        srv.state.seed(zones, rrsets)
+        servers.append(srv)
+        return srv
+
+    yield start
+    for srv in servers:
+        srv.stop()
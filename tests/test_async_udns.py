@@ -0,0 +1,110 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from ultra_auth import AsyncTaskHandler, AsyncUltraApi  # noqa: E402
+
+
+def run(server, scenario, **kwargs):
+    """Run `scenario(client)` against the server with a fresh client."""
+    async def main():
+        async with AsyncUltraApi("user", "pass", base_url=server.url, **kwargs) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+def test_password_grant(server):
+    async def scenario(client):
+        assert client.access_token and client.refresh_token
+        return await client.get("/v3/zones/zone0.example.")
+    assert run(server, scenario)["properties"]["name"] == "zone0.example."
+
+
+def test_bearer_token_without_password_grant(server):
+    token = server.state.issue_token()
+
+    async def main():
+        async with AsyncUltraApi(token["accessToken"], token["refreshToken"], use_token=True, base_url=server.url) as client:
+            return await client.get("/accounts")
+    assert asyncio.run(main())["accounts"][0]["accountName"] == "bench"
+
+
+def test_401_refreshes_once(server):
+    async def scenario(client):
+        client.access_token = "expired"
+        results = await asyncio.gather(*(client.get("/accounts") for _ in range(5)))
+        return results, client.access_token
+    results, token = run(server, scenario)
+    assert all(result["accounts"] for result in results)
+    assert token != "expired"
+
+
+def test_proactive_refresh_before_expiry(make_server):
+    server = make_server(token_ttl=1)
+
+    async def scenario(client):
+        first = client.access_token
+        await asyncio.sleep(0.6)
+        await client.get("/accounts")
+        return first, client.access_token
+    first, second = run(server, scenario)
+    assert first != second
+
+
+def test_429_is_retried(make_server):
+    server = make_server(rate_limit=3)
+
+    async def scenario(client):
+        return await asyncio.gather(*(client.get("/accounts") for _ in range(6)))
+    results = run(server, scenario)
+    assert len(results) == 6 and all(result["accounts"] for result in results)
+    assert server.state.requests > 7
+
+
+def test_429_gives_up_after_throttle_retries(make_server):
+    import aiohttp
+    server = make_server(rate_limit=0.5)
+
+    async def scenario(client):
+        with pytest.raises(aiohttp.ClientResponseError) as info:
+            await client.get("/accounts")
+        return info.value.status
+    assert run(server, scenario, throttle_retries=0) == 429
+
+
+def test_204_and_write_payloads(server):
+    async def scenario(client):
+        created = await client.post("/v3/zones/zone0.example./rrsets/A/new", {"ttl": 60, "rdata": ["192.0.2.1"]})
+        replaced = await client.put("/v3/zones/zone0.example./rrsets/A/new",
+                                    json.dumps({"ttl": 90, "rdata": ["192.0.2.2"]}), plain_text=True)
+        deleted = await client.delete("/v3/zones/zone0.example./rrsets/A/host0.zone0.example.")
+        return created, replaced, deleted
+    created, replaced, deleted = run(server, scenario)
+    assert created == replaced == {"message": "Successful"}
+    assert deleted == {"status_code": 204, "message": "No content"}
+    assert server.state.zones["zone0.example."]["rrsets"][("new.zone0.example.", "A")] == {"ttl": 90, "rdata": ["192.0.2.2"]}
+
+
+def test_exports_as_tasks_text_and_zip(server):
+    async def scenario(client):
+        single = await client.post("/v3/zones/export", {"zoneNames": ["zone0.example."]})
+        multiple = await client.post("/v3/zones/export", {"zoneNames": ["zone0.example.", "zone1.example."]})
+        handler = AsyncTaskHandler(client)
+        statuses = {task_id: status async for task_id, status in
+                    handler.wait_many([single["task_id"], multiple["task_id"]], initial_interval=0.1, with_ids=True)}
+        text = await handler.result(single["task_id"])
+        archive = await handler.result(multiple["task_id"])
+        return single, statuses, text, archive
+
+    single, statuses, text, archive = run(server, scenario)
+    assert single["message"] == "Pending"
+    assert single["location"] == f"/tasks/{single['task_id']}"
+    assert {status["code"] for status in statuses.values()} == {"COMPLETE"}
+    assert isinstance(text, str) and text.startswith("$ORIGIN zone0.example.")
+    with zipfile.ZipFile(io.BytesIO(archive)) as members:
+        assert sorted(members.namelist()) == ["zone0.example.txt", "zone1.example.txt"]
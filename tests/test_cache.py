@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from ultra_auth import RequestsTransport, ResponseCache, UltraApi
+
+ZONE = "/v3/zones/zone0.example."
+RRSET = "/v3/zones/zone0.example./rrsets/A/host0.zone0.example."
+
+
+@pytest.fixture
+def cached(server):
+    cache = ResponseCache(ttl=30)
+    with UltraApi("user", "pass", base_url=server.url, cache=cache) as api:
+        yield api, cache, server
+
+
+def test_hits_are_served_locally(cached):
+    api, cache, server = cached
+    first = api.get(ZONE)
+    before = server.state.requests
+    assert api.get(ZONE) == first
+    assert server.state.requests == before
+    assert cache.stats()["hits"] == 1
+
+
+def test_cached_values_are_copies(cached):
+    api, cache, _ = cached
+    api.get(ZONE)["properties"]["name"] = "changed"
+    assert api.get(ZONE)["properties"]["name"] == "zone0.example."
+
+
+def test_path_ttls():
+    cache = ResponseCache(ttl=30, path_ttls={"/accounts": 300, "/v3/zones/*/rrsets*": 0})
+    assert cache.ttl_for("/accounts") == 300
+    assert cache.ttl_for(RRSET) == 0
+    assert cache.ttl_for("/tasks/abc") == 0
+    assert cache.ttl_for(ZONE) == 30
+    cache.store(cache.key(RRSET), {"rrSets": []})
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_entries_are_revalidated_with_etags(server):
+    cache = ResponseCache(ttl=0.05)
+    with UltraApi("user", "pass", base_url=server.url, cache=cache) as api:
+        body = api.get(ZONE)
+        time.sleep(0.06)
+        assert api.get(ZONE) == body
+        assert cache.stats()["revalidations"] == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    for uri in ("/a", "/b", "/c"):
+        cache.store(cache.key(uri), uri)
+    assert cache.lookup(cache.key("/a")) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_writes_invalidate_the_zone(cached):
+    api, cache, _ = cached
+    api.get(ZONE)
+    api.get(RRSET)
+    api.get("/v3/zones")
+    api.get("/v3/zones/zone1.example.")
+    api.patch(RRSET, {"ttl": 60, "rdata": ["192.0.2.99"]})
+    assert cache.stats()["size"] == 1
+    assert api.get(RRSET)["rrSets"][0]["rdata"] == ["192.0.2.99"]
+
+
+def test_response_older_than_a_write_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation(RRSET)
+    cache.invalidate_for_write(ZONE + "/rrsets/A/other")
+    cache.store(cache.key(RRSET), {"stale": True}, generation=generation)
+    assert cache.stats()["size"] == 0
+    # Other zones aren't affected
+    generation = cache.generation("/v3/zones/zone1.example.")
+    cache.invalidate_for_write(RRSET)
+    cache.store(cache.key("/v3/zones/zone1.example."), {}, generation=generation)
+    assert cache.stats()["size"] == 1
+
+
+def test_write_during_a_get_keeps_it_out_of_the_cache(server):
+    class WriteMidFlight(RequestsTransport):
+        """Runs a write after the GET's response has been read, but before it's returned."""
+        def request(self, method, url, **kwargs):
+            resp = super().request(method, url, **kwargs)
+            if method == "GET" and url.endswith(RRSET) and not self.written:
+                self.written = True
+                writer.patch(RRSET, {"ttl": 60, "rdata": ["192.0.2.50"]})
+            return resp
+
+    cache = ResponseCache()
+    transport = WriteMidFlight()
+    transport.written = False
+    with UltraApi("user", "pass", base_url=server.url, cache=cache, transport=transport) as writer:
+        stale = writer.get(RRSET)
+        assert stale["rrSets"][0]["rdata"] == ["192.0.2.1"]
+        assert writer.get(RRSET)["rrSets"][0]["rdata"] == ["192.0.2.50"]
@@ -0,0 +1,111 @@
+import json
+
+from ultra_auth.cli import Journal, main, read_manifest
+
+
+def _write_manifest(tmp_path, *ops):
+    path = tmp_path / "manifest.jsonl"
+    path.write_text("".join((op if isinstance(op, str) else json.dumps(op)) + "\n" for op in ops))
+    return str(path)
+
+
+def _run(server, manifest, *args):
+    return main([manifest, "-u", "user", "-p", "pass", "--base-url", server.url, "--workers", "2", *args])
+
+
+def _journal(manifest):
+    with open(f"{manifest}.journal") as f:
+        return [json.loads(line) for line in f]
+
+
+CREATE = {"op": "create_rrset", "zone": "zone0.example.", "owner": "new", "rrtype": "A", "ttl": 300, "rdata": ["192.0.2.9"]}
+UPDATE = {"op": "update_rrset", "zone": "zone0.example.", "owner": "host0", "rrtype": "A", "ttl": 60, "rdata": ["192.0.2.8"]}
+
+
+def test_read_manifest_reports_bad_lines(tmp_path):
+    manifest = _write_manifest(tmp_path, CREATE, "not json", "[1]")
+    entries = list(read_manifest(manifest))
+    assert entries[0] == (1, CREATE)
+    assert [(number, type(op)) for number, op in entries[1:]] == [(2, ValueError), (3, ValueError)]
+    assert str(entries[1][1]).startswith("line 2: invalid JSON")
+
+
+def test_first_run_journals_every_operation(tmp_path, server):
+    manifest = _write_manifest(tmp_path, CREATE, UPDATE)
+    assert _run(server, manifest) == 0
+    assert sorted((entry["line"], entry["status"]) for entry in _journal(manifest)) == [(1, "ok"), (2, "ok")]
+    rrsets = server.state.zones["zone0.example."]["rrsets"]
+    assert rrsets[("new.zone0.example.", "A")]["rdata"] == ["192.0.2.9"]
+    assert rrsets[("host0.zone0.example.", "A")]["ttl"] == 60
+
+
+def test_rerun_skips_finished_operations(tmp_path, server, capsys):
+    manifest = _write_manifest(tmp_path, CREATE, UPDATE)
+    assert _run(server, manifest) == 0
+    modified = server.state.zones["zone0.example."]["modified"]
+    # A second create of the same rrset would fail, so a clean exit means it was skipped
+    assert _run(server, manifest) == 0
+    assert "0 ok, 0 failed, 2 skipped" in capsys.readouterr().err
+    assert server.state.zones["zone0.example."]["modified"] == modified
+    assert len(_journal(manifest)) == 2
+
+
+def test_edited_operation_runs_again(tmp_path, server):
+    manifest = _write_manifest(tmp_path, CREATE, UPDATE)
+    assert _run(server, manifest) == 0
+    _write_manifest(tmp_path, CREATE, dict(UPDATE, rdata=["192.0.2.7"]))
+    assert _run(server, manifest) == 0
+    assert server.state.zones["zone0.example."]["rrsets"][("host0.zone0.example.", "A")]["rdata"] == ["192.0.2.7"]
+
+
+def test_restart_ignores_the_journal(tmp_path, server):
+    manifest = _write_manifest(tmp_path, CREATE)
+    assert _run(server, manifest) == 0
+    # Everything runs again, and the create now collides with the rrset it made the first time
+    assert _run(server, manifest, "--restart") == 1
+    assert [entry["status"] for entry in _journal(manifest)] == ["error"]
+
+
+def test_failures_are_retried_on_rerun(tmp_path, server):
+    manifest = _write_manifest(tmp_path, "not json", dict(CREATE, zone="missing.example."))
+    assert _run(server, manifest) == 1
+    assert sorted((entry["line"], entry["status"]) for entry in _journal(manifest)) == [(1, "error"), (2, "error")]
+    assert any("invalid JSON" in entry["error"] for entry in _journal(manifest))
+
+    server.state.zones["missing.example."] = server.state._new_zone("missing.example.")
+    _write_manifest(tmp_path, {"op": "delete_zone", "zone": "zone2.example."}, dict(CREATE, zone="missing.example."))
+    assert _run(server, manifest) == 0
+    assert ("new.missing.example.", "A") in server.state.zones["missing.example."]["rrsets"]
+    assert "zone2.example." not in server.state.zones
+
+
+def test_pending_tasks_are_confirmed_on_rerun(tmp_path, client, server):
+    task_id = client.post("/v3/zones/export", {"zoneNames": ["zone0.example."]})["task_id"]
+    manifest = _write_manifest(tmp_path, {"op": "delete_zone", "zone": "zone1.example."})
+    with open(f"{manifest}.journal", "w") as f:
+        f.write(json.dumps({"key": "9:abc", "line": 9, "op": "create_zone", "zone": "zone9.example.",
+                            "status": "task", "task_id": task_id}) + "\n")
+    assert Journal(f"{manifest}.journal").pending
+
+    assert _run(server, manifest) == 0
+    journal = Journal(f"{manifest}.journal")
+    assert not journal.pending
+    assert "9:abc" in journal.done
+
+
+def test_sync_zone_is_idempotent(tmp_path, server):
+    zone_file = tmp_path / "zone0.txt"
+    zone_file.write_text("$TTL 300\n@ IN SOA ns1 admin 2 3600 600 604800 300\nhost0 IN A 192.0.2.1\n"
+                         "www 60 IN CNAME host0\ntxt IN TXT \"hello world\"\n")
+    manifest = _write_manifest(tmp_path, {"op": "sync_zone", "zone": "zone0.example.", "file": str(zone_file), "prune": True})
+    assert _run(server, manifest) == 0
+    rrsets = server.state.zones["zone0.example."]["rrsets"]
+    assert sorted(owner for owner, rrtype in rrsets if rrtype != "SOA") == [
+        "host0.zone0.example.", "txt.zone0.example.", "www.zone0.example."]
+    assert rrsets[("www.zone0.example.", "CNAME")]["rdata"] == ["host0.zone0.example."]
+    assert rrsets[("txt.zone0.example.", "TXT")]["rdata"] == ["hello world"]
+
+    # Run again from scratch: the zone already matches the file, so nothing is written
+    modified = server.state.zones["zone0.example."]["modified"]
+    assert _run(server, manifest, "--restart") == 0
+    assert server.state.zones["zone0.example."]["modified"] == modified
@@ -0,0 +1,61 @@
+import dataclasses
+import datetime
+import enum
+import json
+import uuid
+
+import pytest
+
+from ultra_auth import codec
+
+
+class Kind(enum.Enum):
+    A = "A"
+
+
+@dataclasses.dataclass
+class Record:
+    owner: str
+    rrtype: Kind
+    changed: datetime.datetime
+
+
+VALUES = [
+    {"rdata": ["192.0.2.1"], "ttl": 300, "name": "é"},
+    {1: "one", 2.5: "two and a half", None: "none"},
+    {True: "yes", False: "no"},
+    Record("www", Kind.A, datetime.datetime(2024, 1, 2, 3, 4, 5, 6)),
+    [uuid.UUID(int=1), datetime.date(2024, 1, 2), datetime.time(1, 2, 3),
+     datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)],
+]
+
+
+def _stdlib_dumps(value):
+    """`codec.dumps` as it behaves without orjson."""
+    orjson, codec.orjson = codec.orjson, None
+    try:
+        return codec.dumps(value)
+    finally:
+        codec.orjson = orjson
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_stdlib_dumps(value):
+    assert json.loads(_stdlib_dumps(value)) is not None
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_backends_agree(value):
+    pytest.importorskip("orjson")
+    assert codec.dumps(value) == _stdlib_dumps(value)
+
+
+def test_stdlib_dumps_refuses_unknown_types():
+    with pytest.raises(TypeError):
+        _stdlib_dumps({"value": object()})
+
+
+def test_loads_roundtrip():
+    assert codec.loads(codec.dumps({"zones": [{"name": "example.com."}]})) == {"zones": [{"name": "example.com."}]}
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b"{")
@@ -0,0 +1,38 @@
+import io
+import zipfile
+
+import pytest
+
+from ultra_auth.exports import iter_zip_members, iter_zone_files, write_chunks
+
+
+def test_write_chunks(tmp_path):
+    dest = tmp_path / "out.bin"
+    assert write_chunks([b"ab", b"", b"cd"], dest) == 4
+    assert dest.read_bytes() == b"abcd"
+    buffer = io.BytesIO()
+    assert write_chunks(iter([b"x"]), buffer) == 1
+
+
+def test_iter_zone_files(tmp_path):
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("zones/", "")
+        archive.writestr("zone0.example.txt", "$ORIGIN zone0.example.\n")
+        archive.writestr("zone1.example.txt", "$ORIGIN zone1.example.\n")
+    assert list(iter_zone_files(path)) == [("zone0.example.txt", "$ORIGIN zone0.example.\n"),
+                                           ("zone1.example.txt", "$ORIGIN zone1.example.\n")]
+
+
+def test_empty_file_is_not_an_archive(tmp_path):
+    path = tmp_path / "empty.zip"
+    path.write_bytes(b"")
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_zip_members(path))
+
+
+def test_garbage_is_not_an_archive(tmp_path):
+    path = tmp_path / "garbage.zip"
+    path.write_bytes(b"not a zip")
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_zip_members(path))
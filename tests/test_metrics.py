@@ -0,0 +1,30 @@
+from ultra_auth.metrics import Metrics, endpoint_template
+
+
+def test_endpoint_template():
+    assert endpoint_template("/v3/zones/example.com./rrsets/A/www?limit=5") == "/v3/zones/{zone}/rrsets/{rrtype}/{owner}"
+    assert endpoint_template("/tasks/abc/result") == "/tasks/{task_id}/result"
+
+
+def test_snapshot_buckets_are_cumulative():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    for duration in (0.05, 0.5, 5.0):
+        metrics.record("GET", "/v3/zones", 200, duration, retries=1)
+    [series] = metrics.snapshot()
+    assert series["count"] == 3 and series["retries"] == 3
+    assert series["duration_buckets"] == {0.1: 1, 1.0: 2}
+
+
+def test_prometheus_output():
+    metrics = Metrics(buckets=(1.0,))
+    metrics.record("GET", "/v3/zones", 200, 0.5, ttfb=0.1)
+    text = metrics.to_prometheus()
+    assert 'ultra_auth_requests_total{method="GET",endpoint="/v3/zones",status="200"} 1' in text
+    assert 'ultra_auth_request_duration_seconds_bucket{method="GET",endpoint="/v3/zones",status="200",le="+Inf"} 1' in text
+
+
+def test_prometheus_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.record("GET", 'C:\\zones\n"odd"', "error", 0.5)
+    line = next(line for line in metrics.to_prometheus().splitlines() if line.startswith("ultra_auth_requests_total"))
+    assert line == 'ultra_auth_requests_total{method="GET",endpoint="C:\\\\zones\\n\\"odd\\"",status="error"} 1'
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+import requests
+
+from ultra_auth import RetryPolicy, UltraApi, UltraApiPool
+from ultra_auth.pool import zone_of
+
+RRSET = "/v3/zones/zone0.example./rrsets/A/new"
+
+
+def _client(server, **kwargs):
+    return UltraApi("user", "pass", base_url=server.url, throttle_retries=0, **kwargs)
+
+
+@pytest.fixture
+def throttled_pair(make_server):
+    """A pool whose first member is always throttled and whose second member isn't."""
+    busy, free = make_server(rate_limit=0.5), make_server()
+    with UltraApiPool([_client(busy), _client(free)], routing="round_robin") as pool:
+        yield pool, busy, free
+
+
+def test_zone_of():
+    assert zone_of("/v3/zones/Example.COM./rrsets/A/www") == "example.com"
+    assert zone_of("/accounts") is None
+
+
+def test_round_robin_takes_turns(server):
+    with UltraApiPool([_client(server), _client(server)], routing="round_robin") as pool:
+        for _ in range(4):
+            pool.get("/accounts")
+        assert [member["requests"] for member in pool.stats()] == [2, 2]
+
+
+def test_sticky_keeps_a_zone_on_one_member(server):
+    with UltraApiPool([_client(server) for _ in range(3)], routing="sticky") as pool:
+        for _ in range(5):
+            pool.get("/v3/zones/zone1.example.")
+        assert sorted(member["requests"] for member in pool.stats()) == [0, 0, 5]
+
+
+def test_failing_member_is_benched(make_server):
+    broken, healthy = make_server(error_rate=1.0), make_server()
+    clients = [_client(broken, retry_policy=RetryPolicy(max_attempts=1)), _client(healthy)]
+    with UltraApiPool(clients, routing="round_robin", unhealthy_after=1, cooldown=60) as pool:
+        with pytest.raises(requests.HTTPError):
+            pool.get("/accounts")
+        for _ in range(3):
+            pool.get("/accounts")
+        stats = pool.stats()
+        assert not stats[0]["healthy"] and stats[0]["requests"] == 1
+        assert stats[1]["requests"] == 3
+
+
+def test_throttled_request_fails_over(throttled_pair):
+    pool, busy, free = throttled_pair
+    pool.post(RRSET, {"ttl": 60, "rdata": ["192.0.2.1"]})
+    assert pool.stats()[0]["throttles"] == 1
+    assert free.state.zones["zone0.example."]["rrsets"][("new.zone0.example.", "A")]["rdata"] == ["192.0.2.1"]
+
+
+def test_seekable_upload_is_rewound_before_failing_over(throttled_pair):
+    pool, busy, free = throttled_pair
+    pool.post(RRSET, io.BytesIO(b'{"ttl": 60, "rdata": ["192.0.2.2"]}'))
+    rrset = free.state.zones["zone0.example."]["rrsets"][("new.zone0.example.", "A")]
+    assert rrset == {"ttl": 60, "rdata": ["192.0.2.2"]}
+
+
+def test_consumed_iterator_upload_is_not_resent(throttled_pair):
+    pool, busy, free = throttled_pair
+    chunks = iter([b'{"ttl": 60, ', b'"rdata": ["192.0.2.3"]}'])
+    with pytest.raises(requests.HTTPError) as info:
+        pool.post(RRSET, chunks)
+    assert info.value.response.status_code == 429
+    assert ("new.zone0.example.", "A") not in free.state.zones["zone0.example."]["rrsets"]
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+import requests
+
+from ultra_auth import CircuitBreaker, CircuitOpenError, RequestsTransport, RetryPolicy, UltraApi
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_breaker_success_resets_the_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_request()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_request()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_released_trial_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_request()
+    breaker.release_trial()
+    breaker.before_request()
+    assert breaker.state == "half_open"
+
+
+class _ExplodingTransport(RequestsTransport):
+    """Fails with an error that isn't a requests exception once `explode` is set."""
+
+    explode = False
+
+    def request(self, *args, **kwargs):
+        if self.explode:
+            raise ValueError("unmapped transport error")
+        return super().request(*args, **kwargs)
+
+
+def test_client_releases_trial_on_unexpected_errors(make_server):
+    server = make_server(error_rate=1.0)
+    transport = _ExplodingTransport()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    with UltraApi("user", "pass", base_url=server.url, transport=transport, circuit_breaker=breaker,
+                  retry_policy=RetryPolicy(max_attempts=1)) as client:
+        with pytest.raises(requests.HTTPError):
+            client.get("/accounts")
+        assert breaker.state == "open"
+        time.sleep(0.06)
+        transport.explode = True
+        with pytest.raises(ValueError):
+            client.get("/accounts")
+        transport.explode = False
+        server.state.config.error_rate = 0
+        assert client.get("/accounts")["accounts"]
+        assert breaker.state == "closed"
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_attempts=3, backoff=0.5, max_backoff=1.0, jitter=False)
+    assert policy.allows("GET") and policy.allows("DELETE")
+    assert not policy.allows("POST")
+    assert policy.allows("POST", idempotent=True)
+    assert policy.delay(1) <= 1.0 and policy.delay(10) == 1.0
+
+
+def test_transient_errors_are_retried(make_server):
+    server = make_server(error_rate=0.5)
+    with UltraApi("user", "pass", base_url=server.url, retry_policy=RetryPolicy(max_attempts=10, backoff=0.001)) as client:
+        for _ in range(10):
+            assert client.get("/accounts")["accounts"]
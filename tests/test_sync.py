@@ -0,0 +1,74 @@
+from ultra_auth import ZoneSync
+
+ZONE = "zone0.example."
+
+
+def _desired():
+    """The seeded zone with host1 changed, host2 re-TTLed, host3 and host4 left out, and one new rrset."""
+    return [
+        {"ownerName": "host0", "rrtype": "A", "ttl": 300, "rdata": ["192.0.2.1"]},
+        {"ownerName": "host1.zone0.example.", "rrtype": "A", "ttl": 300, "rdata": ["192.0.2.100"]},
+        {"ownerName": "host2", "rrtype": "A (1)", "ttl": 600, "rdata": ["192.0.2.3"]},
+        {"ownerName": "www", "rrtype": "CNAME", "ttl": 60, "rdata": ["host0.zone0.example."]},
+    ]
+
+
+def _rrsets(server):
+    return server.state.zones[ZONE]["rrsets"]
+
+
+def test_plan_writes_nothing(client, server):
+    before = dict(_rrsets(server))
+    report = ZoneSync(client).plan(ZONE, _desired(), prune=True)
+    assert report.dry_run
+    assert [(c.owner, c.rrtype) for c in report.creates] == [("www.zone0.example.", "CNAME")]
+    assert sorted(c.owner for c in report.updates) == ["host1.zone0.example.", "host2.zone0.example."]
+    assert sorted(c.owner for c in report.deletes) == ["host3.zone0.example.", "host4.zone0.example."]
+    assert report.unchanged == 1
+    assert _rrsets(server) == before
+
+
+def test_apply_sends_only_the_difference(client, server):
+    counts = dict(server.state.counts)
+    report = ZoneSync(client).apply(ZONE, _desired())
+    assert report.ok and not report.dry_run
+    assert report.summary()["create"] == 1 and report.summary()["update"] == 2 and report.summary()["delete"] == 0
+    rrsets = _rrsets(server)
+    assert rrsets[("host1.zone0.example.", "A")]["rdata"] == ["192.0.2.100"]
+    assert rrsets[("host2.zone0.example.", "A")]["ttl"] == 600
+    assert rrsets[("www.zone0.example.", "CNAME")]["rdata"] == ["host0.zone0.example."]
+    # Not pruning: rrsets left out of the desired state stay
+    assert ("host4.zone0.example.", "A") in rrsets
+    assert server.state.counts.get("POST", 0) - counts.get("POST", 0) == 1
+    assert server.state.counts.get("PATCH", 0) - counts.get("PATCH", 0) == 2
+
+
+def test_second_apply_is_a_no_op(client):
+    ZoneSync(client).apply(ZONE, _desired(), prune=True)
+    report = ZoneSync(client).apply(ZONE, _desired(), prune=True)
+    assert not report.creates and not report.updates and not report.deletes
+    assert report.unchanged == 4
+
+
+def test_prune_keeps_soa(client, server):
+    report = ZoneSync(client).apply(ZONE, [], prune=True)
+    assert report.ok
+    assert list(_rrsets(server)) == [(ZONE, "SOA")]
+
+
+def test_failed_changes_are_reported(client, server, monkeypatch):
+    sync = ZoneSync(client)
+    plan = sync.plan
+
+    def racing_plan(*args, **kwargs):
+        report = plan(*args, **kwargs)
+        # Someone else creates the rrset between the plan and the write
+        _rrsets(server)[("www.zone0.example.", "CNAME")] = {"ttl": 60, "rdata": ["host0.zone0.example."]}
+        return report
+
+    monkeypatch.setattr(sync, "plan", racing_plan)
+    report = sync.apply(ZONE, _desired())
+    assert not report.ok
+    assert [(change.action, change.owner) for change, _ in report.errors] == [("create", "www.zone0.example.")]
+    # The failed create didn't stop the updates
+    assert _rrsets(server)[("host1.zone0.example.", "A")]["rdata"] == ["192.0.2.100"]
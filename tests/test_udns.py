@@ -0,0 +1,39 @@
+import pytest
+import requests
+
+from ultra_auth import UltraApi, Urllib3Transport
+
+
+def test_password_grant_and_get(client):
+    assert client.access_token and client.refresh_token
+    assert client.get("/v3/zones/zone0.example.")["properties"]["name"] == "zone0.example."
+
+
+def test_expired_token_is_refreshed_once(client):
+    old_refresh = client.refresh_token
+    client.access_token = "expired"
+    assert client.get("/accounts")["accounts"][0]["accountName"] == "bench"
+    assert client.access_token != "expired"
+    assert client.refresh_token != old_refresh
+
+
+def test_error_status_raises_http_error(client):
+    with pytest.raises(requests.HTTPError) as info:
+        client.get("/v3/zones/missing.example.")
+    assert info.value.response.status_code == 404
+
+
+def test_204_and_202_bodies(client):
+    assert client.delete("/v3/zones/zone0.example./rrsets/A/host0.zone0.example.") == \
+        {"status_code": 204, "message": "No content"}
+    task = client.post("/v3/zones/export", {"zoneNames": ["zone0.example."]})
+    assert task["location"] == f"/tasks/{task['task_id']}"
+
+
+def test_urllib3_transport(server):
+    with UltraApi("user", "pass", base_url=server.url, transport=Urllib3Transport()) as api:
+        api.post("/v3/zones/zone1.example./rrsets/A/new", {"ttl": 60, "rdata": ["192.0.2.9"]})
+        rrset = api.get("/v3/zones/zone1.example./rrsets/A/new")["rrSets"][0]
+        assert rrset["rdata"] == ["192.0.2.9"]
+        with pytest.raises(requests.HTTPError):
+            api.get("/v3/zones/missing.example.")
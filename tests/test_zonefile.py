@@ -0,0 +1,95 @@
+import io
+import zipfile
+
+import pytest
+
+from ultra_auth.zonefile import (ZoneRecords, iter_zip_zones, parse_ttl, parse_zone, parse_zone_records, to_rrsets,
+                                 unquote_txt, zone_apex)
+
+ZONE = """$ORIGIN example.com.
+$TTL 1h
+@   IN SOA ns1 hostmaster (
+        2024010101 ; serial
+        3600 600 604800 300 )
+    IN NS  ns1
+    IN NS  ns2.other.net.
+www 300 IN A 192.0.2.1
+www 300 IN A 192.0.2.2
+    IN 60 AAAA 2001:db8::1
+alias CNAME www
+@ MX 10 Mail
+spf TXT "v=spf1 include:example.net" " -all"
+note TXT hello world ; a comment
+quote TXT "say \\"hi\\"\\059 ok"
+$ORIGIN sub.example.com.
+a CNAME b
+"""
+
+
+def test_parse_ttl():
+    assert parse_ttl("3600") == 3600
+    assert parse_ttl("1h30m") == 5400
+    with pytest.raises(ValueError):
+        parse_ttl("soon")
+
+
+def test_parse_zone():
+    records = list(parse_zone(ZONE))
+    soa = records[0]
+    assert (soa.owner, soa.ttl, soa.rrtype) == ("example.com.", 3600, "SOA")
+    assert soa.rdata == "ns1.example.com. hostmaster.example.com. 2024010101 3600 600 604800 300"
+    ns = [r.rdata for r in records if r.rrtype == "NS"]
+    assert ns == ["ns1.example.com.", "ns2.other.net."]
+    aaaa = next(r for r in records if r.rrtype == "AAAA")
+    assert (aaaa.owner, aaaa.ttl) == ("www.example.com.", 60)
+    assert next(r for r in records if r.owner == "alias.example.com.").rdata == "www.example.com."
+    assert next(r for r in records if r.rrtype == "MX").rdata == "10 mail.example.com."
+    assert records[-1].owner == "a.sub.example.com." and records[-1].rdata == "b.sub.example.com."
+
+
+def test_parse_errors():
+    with pytest.raises(ValueError):
+        list(parse_zone("@ IN SOA ns1 ( 1 2 3"))
+    with pytest.raises(ValueError):
+        list(parse_zone("$INCLUDE other.zone"))
+
+
+def test_columns_match_records():
+    records = parse_zone_records(ZONE)
+    assert isinstance(records, ZoneRecords)
+    assert list(records) == list(parse_zone(ZONE))
+    assert records[3].rdata == "192.0.2.1"
+    assert zone_apex(records) == "example.com."
+
+
+def test_unquote_txt():
+    assert unquote_txt('"v=spf1 include:example.net" " -all"') == "v=spf1 include:example.net -all"
+    assert unquote_txt('"abc" "def"') == "abcdef"
+    assert unquote_txt("hello world") == "hello world"
+    assert unquote_txt('"say \\"hi\\"\\059"') == 'say "hi";'
+
+
+def test_to_rrsets():
+    rrsets = {(r["ownerName"], r["rrtype"]): r for r in to_rrsets(parse_zone(ZONE))}
+    assert rrsets[("www.example.com.", "A")] == {"ownerName": "www.example.com.", "rrtype": "A", "ttl": 300,
+                                                 "rdata": ["192.0.2.1", "192.0.2.2"]}
+    assert rrsets[("spf.example.com.", "TXT")]["rdata"] == ["v=spf1 include:example.net -all"]
+    assert rrsets[("note.example.com.", "TXT")]["rdata"] == ["hello world"]
+    assert rrsets[("quote.example.com.", "TXT")]["rdata"] == ['say "hi"; ok']
+    assert [r["rrtype"] for r in to_rrsets(parse_zone_records(ZONE), types=["cname"])] == ["CNAME", "CNAME"]
+
+
+def test_to_rrsets_refuses_relative_names():
+    with pytest.raises(ValueError):
+        to_rrsets(parse_zone("www 300 IN CNAME web"))
+
+
+def test_iter_zip_zones(tmp_path):
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("example.com.txt", ZONE)
+        archive.writestr("other.net.txt", "$ORIGIN other.net.\n@ 300 IN SOA ns1 admin 1 2 3 4 5\nwww 60 IN A 192.0.2.7\n")
+    zones = list(iter_zip_zones(path, max_workers=1))
+    assert [name for name, _ in zones] == ["example.com.txt", "other.net.txt"]
+    assert zone_apex(zones[1][1]) == "other.net."
+    assert len(zones[0][1]) == len(list(parse_zone(io.StringIO(ZONE))))